@@ -0,0 +1,370 @@
+"""
+Formato binário da análise: um diretório analysis_<thread_id>/ com um header JSON
+pequeno e seções colunares em .npy (memory-mapped, carregadas só no primeiro acesso).
+
+  header.json                   formato, versão, campos pequenos (título, nuvem, clusters, sugestões)
+                                e a lista de seções
+  cluster_labels.npy            int32, cluster de cada post
+  posts.data.npy/.offsets.npy   blob UTF-8 com um JSON por post + offsets (int64)
+  word_scores.*                 termos (blob + offsets) e scores.npy (float64)
+  word_to_posts.*               palavras (blob + offsets), offsets.npy e postings.npy (PostingIndex)
+  doc_term.*, vocab.*           matriz doc-termo (contagens, CSR: data/indices/indptr.npy) e vocabulário,
+                                se o Corpus for gravado
+  term_stats.*                  termos (blob + offsets) e arrays .npz da atualização incremental, se houver
+
+O JSON único (analysis_<thread_id>.json) continua disponível como exportação (run.py --format json).
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+import numpy as np
+from scipy import sparse
+
+from analysis.corpus import Corpus
+from analysis.word_to_posts import WORD_INDEX_FORMAT, PostingIndex
+
+ARTIFACT_FORMAT = "tibia-forum-analysis"
+ARTIFACT_VERSION = 1
+HEADER_NAME = "header.json"
+
+# Campos de run_analysis gravados como seções (os demais vão no header)
+SECTION_FIELDS = ("posts", "cluster_labels", "word_scores", "word_to_posts")
+
+
+class StringTable(Sequence):
+    """Sequência de strings guardada como um blob UTF-8 (uint8) + offsets (int64)."""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def load(cls, directory: Path, name: str) -> "StringTable":
+        return cls(
+            np.load(directory / f"{name}.data.npy", mmap_mode="r"),
+            np.load(directory / f"{name}.offsets.npy", mmap_mode="r"),
+        )
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+
+class PostTable(Sequence):
+    """Posts decodificados sob demanda a partir de uma StringTable (um JSON por post)."""
+
+    def __init__(self, strings: StringTable):
+        self.strings = strings
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return json.loads(self.strings[i])
+
+
+def save_strings(directory: Path, name: str, strings) -> None:
+    """Grava uma sequência de strings (em memória) como seção <name>.data.npy + <name>.offsets.npy."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    np.save(directory / f"{name}.data.npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+    np.save(directory / f"{name}.offsets.npy", offsets)
+
+
+class StringTableWriter:
+    """
+    Grava uma seção de strings item a item, direto em arquivos .npy mapeados
+    (para seções maiores que a memória). Exige o número de itens e o total de bytes.
+    """
+
+    def __init__(self, directory: Path, name: str, count: int, total_bytes: int):
+        self.data = np.lib.format.open_memmap(
+            directory / f"{name}.data.npy", mode="w+", dtype=np.uint8, shape=(total_bytes,)
+        )
+        self.offsets = np.lib.format.open_memmap(
+            directory / f"{name}.offsets.npy", mode="w+", dtype=np.int64, shape=(count + 1,)
+        )
+        self.offsets[0] = 0
+        self._n = 0
+
+    def append(self, raw: bytes) -> None:
+        start = int(self.offsets[self._n])
+        self.data[start:start + len(raw)] = np.frombuffer(raw, dtype=np.uint8)
+        self._n += 1
+        self.offsets[self._n] = start + len(raw)
+
+    def close(self) -> None:
+        self.data.flush()
+        self.offsets.flush()
+        del self.data, self.offsets
+
+
+def begin_artifact(out_dir: str | Path) -> Path:
+    """Cria (vazio) o diretório temporário onde as seções de out_dir são gravadas."""
+    out_dir = Path(out_dir)
+    tmp = out_dir.with_name(out_dir.name + ".tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+    return tmp
+
+
+def commit_artifact(tmp: Path, out_dir: str | Path, fields: dict, sections: list[str]) -> Path:
+    """Grava header.json em tmp e troca out_dir pelo diretório completo."""
+    out_dir = Path(out_dir)
+    header = dict(fields)
+    header.update(
+        format=ARTIFACT_FORMAT,
+        version=ARTIFACT_VERSION,
+        word_index_format=WORD_INDEX_FORMAT,
+        sections=sections,
+    )
+    with open(tmp / HEADER_NAME, "w", encoding="utf-8") as f:
+        json.dump(header, f, ensure_ascii=False, indent=2, default=json_default)
+    return replace_dir(tmp, out_dir)
+
+
+def replace_dir(tmp: Path, out_dir: Path) -> Path:
+    """
+    Troca out_dir por tmp. O diretório anterior é renomeado para <out_dir>.old antes da
+    troca e só apagado depois: out_dir nunca é apagado antes de a versão nova estar no lugar
+    (leitores com arquivos já mapeados continuam lendo a versão anterior).
+    """
+    old = out_dir.with_name(out_dir.name + ".old")
+    if old.exists():
+        shutil.rmtree(old)
+    if out_dir.exists():
+        os.replace(out_dir, old)
+    os.replace(tmp, out_dir)
+    shutil.rmtree(old, ignore_errors=True)
+    return out_dir
+
+
+def json_default(value):
+    """default= do json.dump: escalares e arrays numpy, PostingIndex como {palavra: [índices]}."""
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, PostingIndex):
+        return value.to_dict()
+    raise TypeError(f"Objeto não serializável: {type(value).__name__}")
+
+
+_COPY_BLOCK = 1 << 22  # elementos copiados por vez de uma seção mapeada
+
+
+def _blocks(values: np.ndarray, fn=None) -> Iterator[np.ndarray]:
+    """values em blocos de _COPY_BLOCK (fn aplicada a cada um): seções mapeadas não são lidas inteiras."""
+    for start in range(0, len(values), _COPY_BLOCK):
+        block = values[start:start + _COPY_BLOCK]
+        yield block if fn is None else fn(block)
+
+
+def _save_blocks(path: Path, dtype, total: int, blocks: Iterable[np.ndarray]) -> None:
+    """Grava os blocos em sequência num .npy de `total` elementos."""
+    if total == 0:
+        np.save(path, np.zeros(0, dtype=dtype))
+        return
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(total,))
+    pos = 0
+    for block in blocks:
+        out[pos:pos + len(block)] = block
+        pos += len(block)
+    out.flush()
+    del out
+
+
+def append_strings(directory: Path, name: str, base: StringTable, strings) -> None:
+    """Como save_strings, com as strings de `base` copiadas em bloco (sem decodificar) antes das novas."""
+    encoded = [s.encode("utf-8") for s in strings]
+    new_data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    n_bytes = int(base.offsets[-1])
+    new_offsets = n_bytes + np.cumsum([len(b) for b in encoded], dtype=np.int64)
+    _save_blocks(
+        directory / f"{name}.data.npy", np.uint8, n_bytes + len(new_data), [*_blocks(base.data[:n_bytes]), new_data]
+    )
+    _save_blocks(
+        directory / f"{name}.offsets.npy",
+        np.int64,
+        len(base.offsets) + len(new_offsets),
+        [*_blocks(base.offsets), new_offsets],
+    )
+
+
+def _save_doc_term(directory: Path, counts: sparse.csr_matrix) -> None:
+    for part in ("data", "indices", "indptr"):
+        np.save(directory / f"doc_term.{part}.npy", getattr(counts, part))
+
+
+def _append_doc_term(directory: Path, base: "AnalysisArtifact", corpus: Corpus) -> None:
+    """doc_term de base (colunas remapeadas para corpus.vocab, que o contém) seguido das linhas de corpus."""
+    old, new = base["doc_term"], corpus.counts
+    cols = np.searchsorted(corpus.vocab, np.asarray(list(base["vocab"]), dtype=object))
+    nnz_old = int(old.indptr[-1])
+    index_dtype = np.int32 if max(nnz_old + new.nnz, len(corpus.vocab)) < 2 ** 31 else np.int64
+    total = nnz_old + new.nnz
+    _save_blocks(directory / "doc_term.data.npy", new.data.dtype, total, [*_blocks(old.data), new.data])
+    _save_blocks(
+        directory / "doc_term.indices.npy", index_dtype, total, [*_blocks(old.indices, lambda b: cols[b]), new.indices]
+    )
+    _save_blocks(
+        directory / "doc_term.indptr.npy",
+        index_dtype,
+        len(old.indptr) + new.shape[0],
+        [*_blocks(old.indptr), nnz_old + new.indptr[1:]],
+    )
+
+
+def write_artifact(
+    result: Mapping, out_dir: str | Path, corpus: Optional[Corpus] = None, base: Optional["AnalysisArtifact"] = None
+) -> Path:
+    """
+    Grava o resultado de run_analysis em out_dir (diretório; substituído por inteiro).
+    corpus: se informado, grava também a matriz doc-termo e o vocabulário.
+    base: análise anterior cujos posts são um prefixo dos de `result` (atualização
+    incremental): os posts dela são copiados em bloco dos arquivos, sem reserializar, e
+    `corpus` pode ter só as linhas dos posts novos (acrescentadas ao doc_term de base).
+    Retorna o caminho do diretório.
+    """
+    tmp = begin_artifact(out_dir)
+
+    posts = result.get("posts", [])
+    n_base = len(base["posts"]) if base is not None and "posts" in base.sections else 0
+    if n_base and len(posts) >= n_base:
+        new_posts = (json.dumps(p, ensure_ascii=False, default=json_default) for p in posts[n_base:])
+        append_strings(tmp, "posts", base["posts"].strings, new_posts)
+    else:
+        n_base = 0
+        save_strings(tmp, "posts", (json.dumps(p, ensure_ascii=False, default=json_default) for p in posts))
+    np.save(tmp / "cluster_labels.npy", np.asarray(result.get("cluster_labels", []), dtype=np.int32))
+
+    word_scores = result.get("word_scores", {})
+    save_strings(tmp, "word_scores.terms", word_scores.keys())
+    np.save(tmp / "word_scores.scores.npy", np.fromiter(word_scores.values(), dtype=np.float64, count=len(word_scores)))
+
+    index = result.get("word_to_posts", {})
+    if not isinstance(index, PostingIndex):
+        index = PostingIndex.from_dict(index)
+    save_strings(tmp, "word_to_posts.words", index.words)
+    np.save(tmp / "word_to_posts.offsets.npy", index.offsets)
+    np.save(tmp / "word_to_posts.postings.npy", index.postings)
+
+    sections = list(SECTION_FIELDS)
+    if corpus is not None:
+        if corpus.n_docs == len(posts):
+            _save_doc_term(tmp, corpus.counts)
+        elif n_base and "doc_term" in base.sections and n_base + corpus.n_docs == len(posts):
+            _append_doc_term(tmp, base, corpus)
+        else:
+            raise ValueError(f"Corpus com {corpus.n_docs} docs não corresponde aos {len(posts)} posts")
+        save_strings(tmp, "vocab", corpus.vocab)
+        sections += ["doc_term", "vocab"]
+    term_stats = result.get("term_stats")
+    if term_stats is not None:
+        save_strings(tmp, "term_stats.terms", term_stats["terms"])
+        np.savez(tmp / "term_stats.npz", **{k: np.asarray(v) for k, v in term_stats.items() if k != "terms"})
+        sections.append("term_stats")
+
+    fields = {k: v for k, v in result.items() if k not in SECTION_FIELDS and k != "term_stats"}
+    return commit_artifact(tmp, out_dir, fields, sections)
+
+
+class AnalysisArtifact(Mapping):
+    """
+    Análise gravada por write_artifact, com a mesma interface de dict do resultado de
+    run_analysis. Campos do header são lidos na abertura; seções (posts, cluster_labels,
+    word_scores, word_to_posts, doc_term, vocab, term_stats) são mapeadas do disco no primeiro acesso.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path / HEADER_NAME, encoding="utf-8") as f:
+            self.header: dict[str, Any] = json.load(f)
+        if self.header.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(f"Não é um artefato de análise: {self.path}")
+        if self.header.get("version") != ARTIFACT_VERSION:
+            raise ValueError(f"Versão de artefato não suportada: {self.header.get('version')}")
+        self.sections: tuple[str, ...] = tuple(self.header.get("sections", ()))
+        self._loaded: dict[str, Any] = {}
+
+    def _load_section(self, name: str) -> Any:
+        d = self.path
+        if name == "posts":
+            return PostTable(StringTable.load(d, "posts"))
+        if name == "cluster_labels":
+            return np.load(d / "cluster_labels.npy", mmap_mode="r")
+        if name == "word_scores":
+            terms = StringTable.load(d, "word_scores.terms")
+            scores = np.load(d / "word_scores.scores.npy", mmap_mode="r")
+            return dict(zip(terms, scores.tolist()))
+        if name == "word_to_posts":
+            return PostingIndex(
+                StringTable.load(d, "word_to_posts.words"),
+                np.load(d / "word_to_posts.offsets.npy", mmap_mode="r"),
+                np.load(d / "word_to_posts.postings.npy", mmap_mode="r"),
+            )
+        if name == "doc_term":
+            if (d / "doc_term.npz").exists():  # artefatos gravados antes das seções .npy
+                return sparse.load_npz(d / "doc_term.npz")
+            parts = [np.load(d / f"doc_term.{part}.npy", mmap_mode="r") for part in ("data", "indices", "indptr")]
+            return sparse.csr_matrix(tuple(parts), shape=(len(parts[2]) - 1, len(self["vocab"])), copy=False)
+        if name == "vocab":
+            return StringTable.load(d, "vocab")
+        if name == "term_stats":
+            with np.load(d / "term_stats.npz") as arrays:
+                stats = {k: arrays[k] for k in arrays.files}
+            stats["terms"] = np.array(list(StringTable.load(d, "term_stats.terms")), dtype=object)
+            return stats
+        raise KeyError(name)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.sections:
+            if key not in self._loaded:
+                self._loaded[key] = self._load_section(key)
+            return self._loaded[key]
+        if key in ("format", "version", "sections"):
+            raise KeyError(key)
+        return self.header[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from (k for k in self.header if k not in ("format", "version", "sections"))
+        yield from self.sections
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> dict:
+        """Materializa no formato JSON de run_analysis (posts, labels e índice em listas)."""
+        out = {k: self[k] for k in self if k not in ("doc_term", "vocab")}
+        out["posts"] = list(out["posts"])
+        out["cluster_labels"] = out["cluster_labels"].tolist()
+        out["word_to_posts"] = out["word_to_posts"].to_dict()
+        return out
+
+
+def is_artifact(path: str | Path) -> bool:
+    return (Path(path) / HEADER_NAME).is_file()
+
+
+def load_artifact(path: str | Path) -> AnalysisArtifact:
+    return AnalysisArtifact(path)
@@ -0,0 +1,232 @@
+"""
+Benchmark da análise em corpora sintéticos (analysis.synthetic) de vários tamanhos:
+mede tokenização (Corpus), tfidf_scores, cluster_posts, suggest_n_clusters_both,
+build_word_to_posts_index e run_analysis de ponta a ponta, grava os tempos em JSON e
+compara com um resultado anterior (ex.: de outro commit) com limiar de regressão.
+
+Uso:
+  python -m analysis.bench                                   # 1k, 10k e 100k posts
+  python -m analysis.bench --sizes 1000 10000 --out antes.json
+  python -m analysis.bench --sizes 1000 10000 --baseline antes.json --threshold 0.15
+  python -m analysis.bench --load depois.json --baseline antes.json   # só compara
+Sai com código 1 se algum benchmark ficar mais lento que o baseline além do limiar.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from importlib.metadata import version
+from pathlib import Path
+from typing import Callable, Optional
+
+from analysis.clustering import cluster_mode, cluster_posts, suggest_n_clusters_both
+from analysis.config import CLUSTER_LARGE_THRESHOLD, MAX_DF, MIN_DF, N_CLUSTERS_DEFAULT
+from analysis.corpus import Corpus
+from analysis.frequency import tfidf_scores
+from analysis.run import run_analysis
+from analysis.synthetic import SyntheticConfig, generate_posts
+from analysis.word_to_posts import build_word_to_posts_index
+
+BENCHMARKS = ("corpus", "tfidf_scores", "cluster_posts", "suggest_n_clusters_both", "word_index", "run_analysis")
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_THRESHOLD = 0.2  # 20% mais lento que o baseline = regressão
+MIN_DELTA_S = 0.005  # diferenças absolutas menores que isso são ruído de medição
+RESULTS_DIR = Path("data") / "bench"
+
+
+def _fresh(corpus: Corpus) -> Corpus:
+    """Cópia do Corpus sem a matriz TF-IDF em cache (cada medição recalcula)."""
+    return Corpus.from_counts(corpus.counts, corpus.vocab)
+
+
+def best_of(fn: Callable[[], object], repeat: int, setup: Optional[Callable[[], None]] = None) -> float:
+    """Menor tempo (segundos) de `repeat` execuções de fn; setup roda antes de cada uma, fora da medição."""
+    best = float("inf")
+    for _ in range(max(repeat, 1)):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_size(
+    n: int,
+    *,
+    seed: int,
+    config: SyntheticConfig,
+    repeat: int,
+    workers: Optional[int],
+    only: tuple[str, ...] = BENCHMARKS,
+) -> list[dict]:
+    """Mede os benchmarks de `only` num corpus sintético de n posts."""
+    posts = generate_posts(n, seed=seed, config=config)
+    texts = [p["body"] for p in posts]
+    thread = {"thread_id": f"bench-{n}", "title": "benchmark", "posts": posts}
+    base = Corpus(texts)
+    mode = cluster_mode(n, CLUSTER_LARGE_THRESHOLD)
+    state: dict = {}
+
+    def _new_corpus():
+        state["corpus"] = _fresh(base)
+
+    cases: dict[str, tuple[Callable[[], object], Optional[Callable[[], None]]]] = {
+        "corpus": (lambda: Corpus(texts), None),
+        "tfidf_scores": (lambda: tfidf_scores(texts, corpus=state["corpus"]), _new_corpus),
+        "cluster_posts": (
+            lambda: cluster_posts(
+                texts, n_clusters=N_CLUSTERS_DEFAULT, corpus=state["corpus"], workers=workers, mode=mode
+            ),
+            _new_corpus,
+        ),
+        "suggest_n_clusters_both": (
+            lambda: suggest_n_clusters_both(state["X"], workers=workers, mode=mode),
+            lambda: state.update(X=_fresh(base).tfidf(MAX_DF, MIN_DF)[0]),
+        ),
+        "word_index": (lambda: build_word_to_posts_index(posts, corpus=state["corpus"]), _new_corpus),
+        "run_analysis": (lambda: run_analysis(thread, workers=workers), None),
+    }
+    results = []
+    for name in only:
+        fn, setup = cases[name]
+        seconds = best_of(fn, repeat, setup)
+        results.append({
+            "benchmark": name,
+            "n_posts": n,
+            "seconds": round(seconds, 6),
+            "posts_per_second": round(n / seconds, 1) if seconds > 0 else None,
+            "repeat": repeat,
+            "cluster_mode": mode,
+        })
+        print(f"  {name:<24} {seconds:9.3f} s  {n / seconds:12.0f} posts/s")
+    results_meta = {"vocabulary_size": int(len(base.vocab)), "doc_term_nnz": int(base.counts.nnz)}
+    for r in results:
+        r.update(results_meta)
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).resolve().parent,
+            check=True,
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    """Commit, versões e máquina (para saber se dois resultados são comparáveis)."""
+    return {
+        "commit": _git_commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": version("numpy"),
+        "scipy": version("scipy"),
+        "scikit-learn": version("scikit-learn"),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(
+    baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD, min_delta: float = MIN_DELTA_S
+) -> list[dict]:
+    """
+    Compara os tempos de `current` com `baseline` (mesmo benchmark e tamanho).
+    ratio = atual / baseline; regression = ratio > 1 + threshold e a diferença passa de
+    min_delta segundos (medições de milissegundos oscilam mais que o limiar).
+    """
+    base = {(r["benchmark"], r["n_posts"]): r["seconds"] for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        before = base.get((r["benchmark"], r["n_posts"]))
+        if not before:
+            continue
+        ratio = r["seconds"] / before
+        rows.append({
+            "benchmark": r["benchmark"],
+            "n_posts": r["n_posts"],
+            "baseline_s": before,
+            "current_s": r["seconds"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + threshold and r["seconds"] - before > min_delta,
+        })
+    return rows
+
+
+def print_comparison(rows: list[dict], threshold: float, min_delta: float = MIN_DELTA_S) -> None:
+    print(f"\nComparação com o baseline (limiar: +{threshold:.0%})")
+    for row in rows:
+        faster = row["ratio"] < 1 - threshold and row["baseline_s"] - row["current_s"] > min_delta
+        flag = "REGRESSÃO" if row["regression"] else ("melhor" if faster else "")
+        print(
+            f"  {row['benchmark']:<24} {row['n_posts']:>7}  {row['baseline_s']:9.3f} s -> "
+            f"{row['current_s']:9.3f} s  ({row['ratio']:.2f}x)  {flag}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da análise em corpora sintéticos")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Números de posts")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS), help="Benchmarks a rodar")
+    parser.add_argument("--repeat", type=int, default=1, help="Execuções por medição (vale a menor)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="Threads da varredura de k (padrão: CPUs)")
+    parser.add_argument("--topics", type=int, default=SyntheticConfig.n_topics, help="Temas do corpus sintético")
+    parser.add_argument("--vocab-size", type=int, default=SyntheticConfig.vocab_size, help="Palavras de conteúdo distintas")
+    parser.add_argument("--out", default=None, help="JSON de resultados (padrão: data/bench/analysis_<commit>.json)")
+    parser.add_argument("--load", default=None, help="Não roda: usa este JSON de resultados (para comparar)")
+    parser.add_argument("--baseline", default=None, help="JSON de resultados anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Regressão: mais lento que baseline × (1 + limiar)")
+    args = parser.parse_args()
+
+    if args.load:
+        with open(args.load, encoding="utf-8") as f:
+            current = json.load(f)
+    else:
+        config = SyntheticConfig(n_topics=args.topics, vocab_size=args.vocab_size)
+        results = []
+        for n in args.sizes:
+            print(f"{n} posts")
+            results += bench_size(
+                n, seed=args.seed, config=config, repeat=args.repeat, workers=args.workers, only=tuple(args.only)
+            )
+        current = {
+            "environment": environment(),
+            "config": {"seed": args.seed, "sizes": args.sizes, "synthetic": asdict(config)},
+            "results": results,
+        }
+        out = Path(args.out) if args.out else RESULTS_DIR / f"analysis_{current['environment']['commit'] or 'local'}.json"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"Resultados salvos: {out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        env_b, env_c = baseline.get("environment", {}), current.get("environment", {})
+        if (env_b.get("platform"), env_b.get("cpu_count")) != (env_c.get("platform"), env_c.get("cpu_count")):
+            print("Aviso: baseline medido em outra máquina/plataforma; tempos podem não ser comparáveis.")
+        rows = compare(baseline, current, args.threshold)
+        print_comparison(rows, args.threshold)
+        print(f"Baseline: {env_b.get('commit')} ({env_b.get('date')}); atual: {env_c.get('commit')} ({env_c.get('date')})")
+        if any(r["regression"] for r in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
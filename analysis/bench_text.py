@@ -0,0 +1,69 @@
+"""
+Benchmark de normalização + tokenização: implementação anterior, post a post
+(re.sub duas vezes, split e filtros em Python), contra tokenize_batch (padrão
+compilado e filtro de stopwords num único laço; opcionalmente em processos).
+
+Uso:
+  python -m analysis.bench_text                       # 10k, 100k e 1M posts sintéticos
+  python -m analysis.bench_text --sizes 10000 --workers 4
+"""
+import argparse
+import re
+import time
+
+from analysis.config import MIN_TOKEN_LENGTH
+from analysis.synthetic import generate_texts
+from analysis.text_processing import get_stopwords, tokenize_batch
+
+
+def reference_tokenize(texts: list[str], stopwords: frozenset[str], min_length: int = MIN_TOKEN_LENGTH) -> list[list[str]]:
+    """Implementação anterior de tokenize_without_stopwords, aplicada post a post."""
+    out = []
+    for text in texts:
+        if not text:
+            out.append([])
+            continue
+        text = text.lower().strip()
+        text = re.sub(r"[^\w\s]", " ", text, flags=re.UNICODE)
+        text = re.sub(r"\s+", " ", text).strip()
+        tokens = [t for t in text.split() if len(t) >= min_length]
+        out.append([t for t in tokens if t not in stopwords])
+    return out
+
+
+def timed(fn, *args, **kwargs) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de normalização/tokenização em lote")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="Números de posts")
+    parser.add_argument("--workers", type=int, default=0, help="Também medir o modo multiprocesso com N processos")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stopwords = get_stopwords()
+    for n in args.sizes:
+        texts = generate_texts(n, seed=args.seed)
+        ref_time, ref = timed(reference_tokenize, texts, stopwords)
+        batch_time, batch = timed(tokenize_batch, texts, stopwords)
+        if batch != ref:
+            raise SystemExit(f"tokenize_batch difere da implementação anterior ({n} posts)")
+        n_tokens = sum(map(len, batch))
+        print(f"{n} posts ({n_tokens} tokens)")
+        print(f"  anterior (post a post): {ref_time:8.2f} s  {n / ref_time:10.0f} posts/s")
+        print(f"  tokenize_batch:         {batch_time:8.2f} s  {n / batch_time:10.0f} posts/s  ({ref_time / batch_time:.1f}x)")
+        if args.workers > 1:
+            par_time, par = timed(tokenize_batch, texts, stopwords, workers=args.workers)
+            if par != ref:
+                raise SystemExit(f"tokenize_batch(workers={args.workers}) difere ({n} posts)")
+            print(
+                f"  tokenize_batch x{args.workers}:      {par_time:8.2f} s  {n / par_time:10.0f} posts/s  "
+                f"({ref_time / par_time:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Cache de resultados de run_analysis, endereçado pelo conteúdo: a chave é um hash dos
+posts do tópico e de tudo que altera o resultado (k, max_df/min_df, limiar do
+MiniBatchKMeans, intervalo de k, stopwords, versão do pipeline).
+
+Cada entrada é um artefato (analysis.artifact) em <cache_dir>/<chave>/, aberto sob
+demanda; o uso é registrado no mtime do header.json e, passando do limite de bytes,
+as entradas usadas há mais tempo são removidas (LRU). As últimas entradas usadas
+também ficam em memória, então repetir a análise no mesmo processo (ex.: reruns do
+Streamlit) não toca o disco, assim como as varreduras de k (ClusterSweep) usadas
+para trocar só o número de clusters (cached_recluster).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+from functools import lru_cache
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+import numpy as np
+
+from analysis import config
+from analysis.artifact import ARTIFACT_VERSION, HEADER_NAME, is_artifact, load_artifact, replace_dir, write_artifact
+from analysis.clustering import ClusterSweep
+from analysis.corpus import Corpus
+from analysis.text_processing import get_stopwords
+from instrumentation.metrics import Metrics
+
+# Incrementar quando uma mudança no pipeline alterar resultados já gravados
+CACHE_VERSION = 1
+
+
+@lru_cache(maxsize=None)
+def stopwords_digest() -> str:
+    """Hash do conjunto de stopwords em uso (muda se as listas mudarem)."""
+    return hashlib.sha256("\n".join(sorted(get_stopwords())).encode("utf-8")).hexdigest()[:16]
+
+
+def analysis_key(thread_data: dict, n_clusters: Optional[int], large_threshold: int) -> str:
+    """
+    Chave do resultado de run_analysis(thread_data, n_clusters, large_threshold=...).
+    Entram os posts inteiros (o resultado os inclui), thread_id, título e os parâmetros
+    de config que afetam scores, clusters ou sugestões; o número de threads não entra.
+    """
+    params = {
+        "cache_version": CACHE_VERSION,
+        "artifact_version": ARTIFACT_VERSION,
+        "sklearn": version("scikit-learn"),
+        "stopwords": stopwords_digest(),
+        "n_clusters": n_clusters,
+        "large_threshold": large_threshold,
+        "max_df": config.MAX_DF,
+        "min_df": config.MIN_DF,
+        "min_token_length": config.MIN_TOKEN_LENGTH,
+        "max_words_cloud": config.MAX_WORDS_CLOUD,
+        "k_range": list(config.CLUSTER_K_RANGE),
+        "minibatch_size": config.MINIBATCH_SIZE,
+        "silhouette_sample_size": config.SILHOUETTE_SAMPLE_SIZE,
+        "seed": config.CLUSTER_SEED,
+    }
+    h = hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8"))
+    h.update(json.dumps([thread_data.get("thread_id", "unknown"), thread_data.get("title")]).encode("utf-8"))
+    for post in thread_data.get("posts", []):
+        raw = json.dumps(post, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+        h.update(len(raw).to_bytes(8, "little"))
+        h.update(raw)
+    return h.hexdigest()
+
+
+class AnalysisCache:
+    """
+    Cache em disco (cache_dir, até max_bytes) com um nível em memória (memory_items entradas).
+    Os resultados devolvidos são compartilhados: não modificar.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path = config.ANALYSIS_CACHE_DIR,
+        max_bytes: int = config.ANALYSIS_CACHE_MAX_BYTES,
+        memory_items: int = config.ANALYSIS_CACHE_MEMORY_ITEMS,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self._memory: OrderedDict[str, Mapping[str, Any]] = OrderedDict()
+        # Varreduras de k (ClusterSweep) por cluster_fingerprint da análise, só em memória
+        self.sweeps: OrderedDict[str, ClusterSweep] = OrderedDict()
+
+    def path(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    def _remember(self, key: str, result: Mapping[str, Any]) -> None:
+        if self.memory_items <= 0:
+            return
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def remember_sweep(self, result: Mapping[str, Any], sweep: ClusterSweep) -> None:
+        if self.memory_items <= 0:
+            return
+        fp = cluster_fingerprint(result)
+        self.sweeps[fp] = sweep
+        self.sweeps.move_to_end(fp)
+        while len(self.sweeps) > self.memory_items:
+            self.sweeps.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Mapping[str, Any]]:
+        """Resultado guardado (dict ou AnalysisArtifact) ou None."""
+        path = self.path(key)
+        if key in self._memory:
+            if not path.exists():  # removido do disco por outro processo
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            _touch(path)
+            return self._memory[key]
+        if not is_artifact(path):
+            return None
+        try:
+            result = load_artifact(path)
+        except (OSError, ValueError):
+            return None
+        _touch(path)
+        self._remember(key, result)
+        return result
+
+    def put(self, key: str, result: dict, corpus: Optional[Corpus] = None) -> Path:
+        """Grava o resultado (e a matriz doc-termo, se informada) e aplica o limite de tamanho."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = write_artifact(result, self.path(key), corpus=corpus)
+        self._remember(key, result)
+        self.evict(keep=key)
+        return path
+
+    def entries(self) -> list[tuple[Path, float, int]]:
+        """(diretório, último uso, bytes) de cada entrada em disco, da menos para a mais recente."""
+        if not self.cache_dir.is_dir():
+            return []
+        out = []
+        for d in self.cache_dir.iterdir():
+            if not d.is_dir() or d.name.endswith((".tmp", ".old")):
+                continue
+            try:
+                used = (d / HEADER_NAME).stat().st_mtime
+                size = sum(f.stat().st_size for f in d.iterdir() if f.is_file())
+            except OSError:
+                continue
+            out.append((d, used, size))
+        out.sort(key=lambda e: e[1])
+        return out
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Remove as entradas menos usadas até caber em max_bytes. Retorna quantas removeu."""
+        entries = self.entries()
+        total = sum(size for _, _, size in entries)
+        removed = 0
+        for d, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            if d.name == keep:
+                continue
+            shutil.rmtree(d, ignore_errors=True)
+            self._memory.pop(d.name, None)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        self._memory.clear()
+        self.sweeps.clear()
+        if self.cache_dir.is_dir():
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def _touch(path: Path) -> None:
+    try:
+        os.utime(path / HEADER_NAME)
+    except OSError:
+        pass
+
+
+def cluster_fingerprint(result: Mapping[str, Any]) -> str:
+    """Identifica uma análise pelos rótulos de cluster (e tópico/tamanho), sem ler posts."""
+    h = hashlib.sha256(
+        json.dumps([result.get("thread_id"), result.get("title"), result.get("total_posts")]).encode("utf-8")
+    )
+    h.update(np.ascontiguousarray(result.get("cluster_labels", []), dtype=np.int64).tobytes())
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def default_cache() -> AnalysisCache:
+    """Cache do processo (mesmo objeto entre chamadas, para o nível em memória valer)."""
+    return AnalysisCache()
+
+
+def cached_run_analysis(
+    thread_data: dict,
+    n_clusters: Optional[int] = None,
+    *,
+    cache: Optional[AnalysisCache] = None,
+    workers: Optional[int] = config.CLUSTER_WORKERS,
+    large_threshold: int = config.CLUSTER_LARGE_THRESHOLD,
+    metrics: Optional[Metrics] = None,
+) -> tuple[Mapping[str, Any], bool]:
+    """
+    run_analysis com cache. Retorna (resultado, veio_do_cache). Num acerto o resultado
+    pode ser um AnalysisArtifact (mesma interface de dict, seções lidas do disco).
+    metrics: etapas cache_lookup, tokenize, as de run_analysis e cache_write.
+    """
+    from analysis.run import run_analysis
+
+    metrics = metrics or Metrics.disabled()
+    cache = cache or default_cache()
+    with metrics.stage("cache_lookup"):
+        key = analysis_key(thread_data, n_clusters, large_threshold)
+        hit = cache.get(key)
+    if hit is not None:
+        return hit, True
+    with metrics.stage("tokenize"):
+        corpus = Corpus([p.get("body") or "" for p in thread_data.get("posts", [])])
+    sweeps: list[ClusterSweep] = []
+    result = run_analysis(
+        thread_data,
+        n_clusters=n_clusters,
+        corpus=corpus,
+        workers=workers,
+        large_threshold=large_threshold,
+        sweep_out=sweeps,
+        metrics=metrics,
+    )
+    with metrics.stage("cache_write"):
+        cache.put(key, result, corpus=corpus)
+    if sweeps:
+        cache.remember_sweep(result, sweeps[0])
+    return result, False
+
+
+def cached_recluster(
+    result: Mapping[str, Any],
+    n_clusters: int,
+    *,
+    cache: Optional[AnalysisCache] = None,
+) -> dict:
+    """
+    recluster_analysis reaproveitando a varredura de k guardada em memória para esta
+    análise (se ela foi calculada neste processo ou já reclusterizada antes).
+    """
+    from analysis.run import recluster_analysis
+
+    cache = cache or default_cache()
+    sweep = cache.sweeps.get(cluster_fingerprint(result))
+    out, sweep = recluster_analysis(result, n_clusters, sweep=sweep)
+    cache.remember_sweep(result, sweep)
+    cache.remember_sweep(out, sweep)
+    return out
+
+
+def copy_entry(cache: AnalysisCache, key: str, out_dir: str | Path) -> Path:
+    """
+    Copia a entrada para out_dir (substituído por inteiro), com hard links quando possível:
+    artefatos nunca são alterados no lugar, só trocados por inteiro.
+    """
+    out_dir = Path(out_dir)
+    tmp = out_dir.with_name(out_dir.name + ".tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+
+    def _link(src, dst):
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+    shutil.copytree(cache.path(key), tmp, copy_function=_link)
+    return replace_dir(tmp, out_dir)
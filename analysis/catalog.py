@@ -0,0 +1,256 @@
+"""
+Catálogo das análises salvas em data/ (artefatos analysis_<id>/ e JSON analysis_<id>.json)
+para o seletor do app: por análise, thread_id, título, número de posts e assinatura do
+arquivo (mtime, tamanho, inode), sem carregar a análise.
+
+O catálogo só relê uma análise quando a assinatura dela muda (para artefatos basta o
+header.json; um JSON exportado é lido uma vez) e é persistido em
+data/.analysis_catalog.json, então vale entre reruns, sessões e reinícios do app.
+A análise escolhida é carregada por load(), memoizado no objeto (o app mantém um por
+processo com st.cache_resource): invalidado pela assinatura do arquivo e limitado em
+memória (bytes estimados pelo tamanho em disco), descartando as análises usadas há
+mais tempo (LRU).
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+from analysis import config
+from analysis.artifact import HEADER_NAME, is_artifact, load_artifact
+
+CATALOG_VERSION = 1
+CATALOG_NAME = ".analysis_catalog.json"
+
+
+@dataclass
+class CatalogEntry:
+    """Uma análise salva: id (o que vem depois de analysis_), caminho e resumo."""
+    id: str
+    path: str
+    kind: str  # "artifact" (diretório) ou "json"
+    signature: tuple[int, int, int]  # (mtime_ns, tamanho, inode)
+    size_bytes: int
+    thread_id: Optional[str] = None
+    title: Optional[str] = None
+    total_posts: Optional[int] = None
+
+    @property
+    def mtime(self) -> float:
+        return self.signature[0] / 1e9
+
+    def label(self) -> str:
+        """Texto do seletor: título (ou thread) e número de posts."""
+        name = self.title or f"Thread {self.thread_id or self.id}"
+        return f"{name} ({self.total_posts} posts)" if self.total_posts is not None else name
+
+
+def analysis_paths(data_dir: str | Path) -> dict[str, Path]:
+    """
+    id -> caminho das análises em data_dir. Artefatos (analysis_<id>/) têm precedência
+    sobre o JSON exportado do mesmo tópico; diretórios .tmp (gravação em andamento) e .old
+    (versão anterior sendo trocada) ficam de fora.
+    """
+    data_dir = Path(data_dir)
+    paths = {p.stem.removeprefix("analysis_"): p for p in data_dir.glob("analysis_*.json") if p.is_file()}
+    paths.update({
+        p.name.removeprefix("analysis_"): p
+        for p in data_dir.glob("analysis_*")
+        if p.is_dir() and not p.name.endswith((".tmp", ".old"))
+    })
+    return paths
+
+
+def signature(path: Path) -> tuple[int, int, int]:
+    """
+    (mtime_ns, tamanho, inode). Para artefatos usa o stat do diretório: ele é trocado por
+    inteiro a cada gravação, e o mtime do header.json muda também quando a entrada do
+    cache de análises com hard link para ele é usada.
+    """
+    st = path.stat()
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _disk_size(path: Path) -> int:
+    if path.is_dir():
+        return sum(f.stat().st_size for f in path.iterdir() if f.is_file())
+    return path.stat().st_size
+
+
+def load_analysis(path: str | Path) -> Optional[Mapping[str, Any]]:
+    """
+    Carrega uma análise: diretório analysis_<id>/ (artefato com seções lidas sob demanda)
+    ou JSON analysis_<id>.json. Retorna um mapeamento no formato de run_analysis ou None.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    if path.is_dir():
+        return load_artifact(path) if is_artifact(path) else None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _summary(path: Path) -> Optional[dict]:
+    """thread_id, título e número de posts lidos do header (artefato) ou do JSON."""
+    if path.is_dir():
+        if not is_artifact(path):
+            return None
+        with open(path / HEADER_NAME, encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            return None
+        if "total_posts" not in data:
+            data["total_posts"] = len(data.get("posts", []))
+    tid = data.get("thread_id")
+    return {
+        "thread_id": None if tid is None else str(tid),
+        "title": data.get("title"),
+        "total_posts": data.get("total_posts"),
+    }
+
+
+class AnalysisCatalog:
+    """
+    Catálogo de data_dir e carregador memoizado das análises. Seguro entre threads
+    (sessões do Streamlit rodam em threads do mesmo processo). Os resultados devolvidos
+    por load() são compartilhados: não modificar.
+    """
+
+    def __init__(
+        self,
+        data_dir: str | Path,
+        *,
+        manifest_path: Optional[str | Path] = None,
+        max_memory_bytes: int = config.ANALYSIS_CATALOG_MEMORY_BYTES,
+    ):
+        self.data_dir = Path(data_dir)
+        self.manifest_path = Path(manifest_path) if manifest_path else self.data_dir / CATALOG_NAME
+        self.max_memory_bytes = max_memory_bytes
+        self._lock = threading.Lock()  # catálogo e memória; nunca mantido durante a leitura de uma análise
+        self._key_locks: dict[str, threading.Lock] = {}
+        self._entries: dict[str, CatalogEntry] = self._read_manifest()
+        # id -> (assinatura, análise, bytes estimados), do menos para o mais usado
+        self._loaded: OrderedDict[str, tuple[tuple[int, int, int], Mapping[str, Any], int]] = OrderedDict()
+        self._loaded_bytes = 0
+
+    def _read_manifest(self) -> dict[str, CatalogEntry]:
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                raw = json.load(f)
+            if raw.get("version") != CATALOG_VERSION:
+                return {}
+            return {
+                e["id"]: CatalogEntry(**{**e, "signature": tuple(e["signature"])}) for e in raw["entries"]
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+
+    def _write_manifest(self) -> None:
+        payload = {"version": CATALOG_VERSION, "entries": [asdict(e) for e in self._entries.values()]}
+        tmp = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        try:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp, self.manifest_path)
+        except OSError:
+            pass  # sem permissão de escrita: o catálogo continua valendo em memória
+
+    def refresh(self) -> list[CatalogEntry]:
+        """
+        Atualiza o catálogo com um glob + stat de data_dir: só análises novas ou com
+        assinatura diferente são lidas. Retorna as entradas ordenadas por id.
+        """
+        with self._lock:
+            known = dict(self._entries)
+        # Leitura dos resumos fora do lock: um JSON novo grande não trava as outras sessões
+        changed = False
+        current: dict[str, CatalogEntry] = {}
+        for aid, path in analysis_paths(self.data_dir).items():
+            try:
+                sig = signature(path)
+                entry = known.get(aid)
+                if entry is None or entry.signature != sig or entry.path != str(path):
+                    summary = _summary(path)
+                    if summary is None:
+                        continue
+                    kind = "artifact" if path.is_dir() else "json"
+                    entry = CatalogEntry(aid, str(path), kind, sig, _disk_size(path), **summary)
+                    changed = True
+            except (OSError, ValueError):
+                continue
+            current[aid] = entry
+        with self._lock:
+            if changed or current.keys() != self._entries.keys():
+                self._entries = current
+                self._write_manifest()
+                for aid in [a for a in self._loaded if a not in current]:
+                    self._drop(aid)
+            return [self._entries[a] for a in sorted(self._entries)]
+
+    def entries(self) -> list[CatalogEntry]:
+        """Entradas conhecidas, sem olhar o disco."""
+        with self._lock:
+            return [self._entries[a] for a in sorted(self._entries)]
+
+    def get(self, aid: str) -> Optional[CatalogEntry]:
+        with self._lock:
+            return self._entries.get(aid)
+
+    def _drop(self, aid: str) -> None:
+        _, _, size = self._loaded.pop(aid)
+        self._loaded_bytes -= size
+
+    def load(self, aid: str) -> Optional[Mapping[str, Any]]:
+        """
+        Análise `aid` (dict ou AnalysisArtifact), da memória se o arquivo não mudou desde
+        a última leitura. Passando de max_memory_bytes, descarta as usadas há mais tempo
+        (a última carregada sempre fica). A leitura do arquivo é feita fora do lock geral,
+        sob um lock da própria análise: sessões que abrem outras análises não esperam.
+        """
+        with self._lock:
+            entry = self._entries.get(aid)
+            if entry is None:
+                return None
+            key_lock = self._key_locks.setdefault(aid, threading.Lock())
+        path = Path(entry.path)
+        with key_lock:
+            try:
+                sig = signature(path)
+            except OSError:
+                return None
+            with self._lock:
+                cached = self._loaded.get(aid)
+                if cached is not None and cached[0] == sig:
+                    self._loaded.move_to_end(aid)
+                    return cached[1]
+            # Outra sessão pedindo a mesma análise espera aqui e depois a encontra em memória
+            try:
+                result = load_analysis(path)
+                size = _disk_size(path)
+            except (OSError, ValueError):
+                return None
+            if result is None:
+                return None
+            with self._lock:
+                if aid in self._loaded:
+                    self._drop(aid)
+                self._loaded[aid] = (sig, result, size)
+                self._loaded_bytes += size
+                while self._loaded_bytes > self.max_memory_bytes and len(self._loaded) > 1:
+                    self._drop(next(iter(self._loaded)))
+            return result
+
+    def memory_bytes(self) -> int:
+        """Bytes estimados (tamanho em disco) das análises mantidas em memória."""
+        with self._lock:
+            return self._loaded_bytes
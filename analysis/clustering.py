@@ -1,90 +1,288 @@
 """
 Clustering de posts por TF-IDF + K-means.
 Sugestão de número de clusters via silhouette e elbow.
+Acima de CLUSTER_LARGE_THRESHOLD posts usa MiniBatchKMeans e silhouette amostrado.
 """
 from __future__ import annotations
 
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy import sparse
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.metrics import silhouette_score
+from threadpoolctl import threadpool_limits
 
 from analysis.config import (
     CLUSTER_K_RANGE,
+    CLUSTER_LARGE_THRESHOLD,
+    CLUSTER_SEED,
     CLUSTER_SUGGEST_METHOD,
+    CLUSTER_WORKERS,
     MAX_DF,
     MIN_DF,
+    MINIBATCH_SIZE,
     N_CLUSTERS_DEFAULT,
+    SILHOUETTE_SAMPLE_SIZE,
 )
-from analysis.text_processing import get_stopwords, normalize_text
+from analysis.corpus import Corpus
+
+
+MODE_FULL = "kmeans"
+MODE_MINIBATCH = "minibatch"
+
+
+def cluster_mode(n_docs: int, threshold: int = CLUSTER_LARGE_THRESHOLD) -> str:
+    """Modo de clustering para um corpus de n_docs posts: "kmeans" ou "minibatch" (acima do limiar)."""
+    return MODE_MINIBATCH if n_docs > threshold else MODE_FULL
+
+
+def _make_model(k: int, mode: str, init: np.ndarray | None = None) -> KMeans | MiniBatchKMeans:
+    """init: centróides iniciais (k x n_termos); com init, um único ajuste a partir deles."""
+    if mode == MODE_MINIBATCH:
+        return MiniBatchKMeans(
+            n_clusters=k,
+            random_state=CLUSTER_SEED,
+            batch_size=MINIBATCH_SIZE,
+            init="k-means++" if init is None else init,
+            n_init=3 if init is None else 1,
+        )
+    if init is not None:
+        return KMeans(n_clusters=k, random_state=CLUSTER_SEED, init=init, n_init=1)
+    return KMeans(n_clusters=k, random_state=CLUSTER_SEED, n_init=10)
+
+
+def stratified_sample(
+    labels: np.ndarray,
+    size: int = SILHOUETTE_SAMPLE_SIZE,
+    seed: int = CLUSTER_SEED,
+) -> np.ndarray:
+    """
+    Índices (ordenados) de uma amostra de até ~`size` documentos, com cada cluster
+    representado na proporção do seu tamanho (ao menos 2 por cluster, se houver).
+    """
+    labels = np.asarray(labels)
+    n = len(labels)
+    if n <= size:
+        return np.arange(n)
+    rng = np.random.default_rng(seed)
+    picked = []
+    for c in np.unique(labels):
+        members = np.flatnonzero(labels == c)
+        take = min(len(members), max(2, int(round(size * len(members) / n))))
+        picked.append(rng.choice(members, size=take, replace=False))
+    return np.sort(np.concatenate(picked))
+
+
+def _silhouette(X, labels: np.ndarray, mode: str) -> float | None:
+    """Silhouette exato no modo "kmeans"; estimado numa amostra estratificada no modo "minibatch"."""
+    if mode == MODE_MINIBATCH:
+        idx = stratified_sample(labels)
+        X, labels = X[idx], labels[idx]
+    if len(set(labels)) < 2 or len(set(labels)) >= X.shape[0]:
+        return None
+    return float(silhouette_score(X, labels))
+
+
+def _fit_k(X, k: int, mode: str = MODE_FULL) -> tuple[KMeans | MiniBatchKMeans, float | None]:
+    """Ajusta o modelo com k clusters; retorna (modelo, silhouette ou None se não definido)."""
+    model = _make_model(k, mode)
+    labels = model.fit_predict(X)
+    silhouette = _silhouette(X, labels, mode) if k < X.shape[0] else None
+    return model, silhouette
+
+
+_OPENMP_INIT_LOCK = threading.Lock()
+
+
+def _single_threaded_worker() -> None:
+    """
+    Inicializador das threads da varredura: OpenMP (usado pelo KMeans) com 1 thread.
+    O limite de OpenMP vale por thread, então é definido uma vez em cada worker
+    (em série: threadpoolctl não é seguro entre threads) e nunca desfeito.
+    """
+    with _OPENMP_INIT_LOCK:
+        threadpool_limits(limits=1, user_api="openmp")
+
+
+def sweep_k(
+    X,
+    k_range: tuple[int, int] = CLUSTER_K_RANGE,
+    *,
+    workers: int | None = CLUSTER_WORKERS,
+    mode: str | None = None,
+) -> tuple[dict[int, KMeans], dict[int, float]]:
+    """
+    Ajusta um KMeans por k do intervalo (uma única varredura, k em paralelo em
+    `workers` threads; None = número de CPUs). Com mais de uma thread, BLAS e OpenMP
+    ficam limitados a 1 thread durante a varredura (o paralelismo é entre os k, sem
+    CPUs² threads); com workers=1 cada ajuste usa as threads nativas do scikit-learn.
+    Cada modelo fornece a inércia (model.inertia_) e o silhouette.
+    mode: "kmeans" ou "minibatch" (None = cluster_mode(n)).
+    Retorna (models {k: modelo}, silhouettes {k: score}).
+    """
+    n = X.shape[0]
+    k_min, k_max = k_range
+    k_max = min(k_max, n)
+    ks = list(range(max(k_min, 1), k_max + 1))
+    if not ks:
+        return {}, {}
+    mode = mode or cluster_mode(n)
+    workers = min(workers or os.cpu_count() or 1, len(ks))
+    if workers > 1:
+        # Um único limite, tomado fora do pool: os limites que o KMeans entra e sai em
+        # cada thread passam a ser no-ops (1 -> 1) em vez de alterar o estado global
+        with threadpool_limits(limits=1, user_api="blas"), ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="kmeans", initializer=_single_threaded_worker
+        ) as pool:
+            fitted = list(pool.map(lambda k: _fit_k(X, k, mode), ks))
+    else:
+        fitted = [_fit_k(X, k, mode) for k in ks]
+    models = {k: model for k, (model, _) in zip(ks, fitted)}
+    silhouettes = {k: sil for k, (_, sil) in zip(ks, fitted) if sil is not None}
+    return models, silhouettes
+
+
+def _elbow_k(inertias: dict[int, float]) -> int:
+    """Elbow: ponto de maior distância à reta (k_min, iner_min) -> (k_max, iner_max)."""
+    ks = np.array(sorted(inertias))
+    iners = np.array([inertias[k] for k in ks])
+    k0, k1 = ks[0], ks[-1]
+    i0, i1 = iners[0], iners[-1]
+    denom = np.sqrt((k1 - k0) ** 2 + (i1 - i0) ** 2) or 1.0
+    dists = np.abs((ks - k0) * (i1 - i0) - (iners - i0) * (k1 - k0)) / denom
+    return int(ks[int(np.argmax(dists))])
+
+
+def _suggestions_from_sweep(
+    models: dict[int, KMeans],
+    silhouettes: dict[int, float],
+    k_range: tuple[int, int],
+    n: int,
+) -> dict[str, dict[str, Any]]:
+    k_min, k_max = k_range
+    fallback_k = max(2, min(k_min, n))
+    if k_min >= min(k_max, n) or n < 2:
+        return {"silhouette": {"k": fallback_k, "scores": {}}, "elbow": {"k": fallback_k, "scores": {}}}
+    inertias = {k: float(m.inertia_) for k, m in models.items()}
+    return {
+        "silhouette": {
+            "k": max(silhouettes, key=silhouettes.get) if silhouettes else fallback_k,
+            "scores": silhouettes,
+        },
+        "elbow": {
+            "k": _elbow_k(inertias) if len(inertias) >= 2 else k_min,
+            "scores": inertias,
+        },
+    }
 
 
 def suggest_n_clusters(
     X,
     k_range: tuple[int, int] = CLUSTER_K_RANGE,
     method: str = "silhouette",
+    *,
+    workers: int | None = CLUSTER_WORKERS,
+    mode: str | None = None,
 ) -> tuple[int, dict[int, float]]:
     """
     Sugere o número de clusters testando k no intervalo k_range.
     Retorna (best_k, scores) onde scores é um dict k -> score (silhouette ou inertia).
     """
-    n = X.shape[0]
-    k_min, k_max = k_range
-    k_max = min(k_max, n)
-    fallback_k = max(2, min(k_min, n))
-    if k_min >= k_max or n < 2:
-        return fallback_k, {}
-
-    scores: dict[int, float] = {}
-    if method == "silhouette":
-        for k in range(k_min, k_max + 1):
-            if k >= n:
-                break
-            kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-            labels = kmeans.fit_predict(X)
-            if len(set(labels)) < 2:
-                continue
-            scores[k] = float(silhouette_score(X, labels))
-        best_k = max(scores, key=scores.get) if scores else fallback_k
-        return best_k, scores
-
-    if method == "elbow":
-        inertias = []
-        for k in range(k_min, k_max + 1):
-            kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-            kmeans.fit(X)
-            scores[k] = float(kmeans.inertia_)
-            inertias.append((k, kmeans.inertia_))
-        if len(inertias) < 2:
-            return k_min, scores
-        # Elbow: ponto de maior distância à reta (k_min, iner_min) -> (k_max, iner_max)
-        ks = [p[0] for p in inertias]
-        iners = np.array([p[1] for p in inertias])
-        k0, k1 = ks[0], ks[-1]
-        i0, i1 = iners[0], iners[-1]
-        denom = np.sqrt((k1 - k0) ** 2 + (i1 - i0) ** 2) or 1.0
-        dists = np.abs((ks - k0) * (i1 - i0) - (iners - i0) * (k1 - k0)) / denom
-        best_k = ks[int(np.argmax(dists))]
-        return best_k, scores
-
-    return max(k_min, min(N_CLUSTERS_DEFAULT, k_max)), {}
+    if method not in ("silhouette", "elbow"):
+        n = X.shape[0]
+        return max(k_range[0], min(N_CLUSTERS_DEFAULT, k_range[1], n)), {}
+    suggestion = suggest_n_clusters_both(X, k_range=k_range, workers=workers, mode=mode)[method]
+    return suggestion["k"], suggestion["scores"]
 
 
 def suggest_n_clusters_both(
     X,
     k_range: tuple[int, int] = CLUSTER_K_RANGE,
+    *,
+    workers: int | None = CLUSTER_WORKERS,
+    mode: str | None = None,
 ) -> dict[str, dict[str, Any]]:
     """
-    Calcula sugestão de k para silhouette e elbow.
+    Calcula sugestão de k para silhouette e elbow numa única varredura (sweep_k).
     Retorna {"silhouette": {"k": int, "scores": {k: score}}, "elbow": {"k": int, "scores": {k: inertia}}}.
     """
-    result: dict[str, dict[str, Any]] = {}
-    for method in ("silhouette", "elbow"):
-        best_k, scores = suggest_n_clusters(X, k_range=k_range, method=method)
-        result[method] = {"k": best_k, "scores": scores}
-    return result
+    models, silhouettes = sweep_k(X, k_range, workers=workers, mode=mode)
+    return _suggestions_from_sweep(models, silhouettes, k_range, X.shape[0])
+
+
+def top_terms_from_centers(centers: np.ndarray, vocab, n_terms: int = 15) -> list[list[str]]:
+    """Termos de maior peso (positivo) em cada centróide."""
+    top_terms_per_cluster = []
+    for center in centers:
+        top_indices = np.argsort(center)[::-1][:n_terms]
+        terms = [vocab[i] for i in top_indices if center[i] > 0]
+        top_terms_per_cluster.append(terms)
+    return top_terms_per_cluster
+
+
+def cluster_sums(X, labels: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Soma das linhas de X e número de docs por cluster."""
+    n = X.shape[0]
+    membership = sparse.csr_matrix((np.ones(n), (labels, np.arange(n))), shape=(k, n))
+    return np.asarray((membership @ X).todense()), np.bincount(labels, minlength=k)
+
+
+def warm_start_centers(X, labels: np.ndarray, k: int) -> np.ndarray:
+    """
+    Centróides iniciais para k clusters a partir de rótulos anteriores (qualquer k):
+    as médias dos k maiores clusters e, se faltarem, os docs mais distantes do
+    centróide do seu cluster.
+    """
+    labels = np.asarray(labels)
+    k_prev = int(labels.max(initial=-1)) + 1
+    sums, sizes = cluster_sums(X, labels, k_prev)
+    centers = sums / np.maximum(sizes, 1)[:, None]
+    keep = np.argsort(-sizes, kind="stable")[:k]
+    init = centers[keep[sizes[keep] > 0]]
+    if len(init) < k:
+        # x·c do próprio cluster tirado do produto n x k_prev (sem expandir os centróides por doc)
+        n = X.shape[0]
+        dot = np.asarray(X @ centers.T)[np.arange(n), labels]
+        dist2 = np.asarray(X.multiply(X).sum(axis=1)).ravel() - 2 * dot + (centers ** 2).sum(axis=1)[labels]
+        far = np.argsort(-dist2, kind="stable")[: k - len(init)]
+        init = np.vstack([init, X[far].toarray()])
+    return init
+
+
+class ClusterSweep:
+    """
+    Rótulos e centróides de cada k já ajustado sobre X (varredura de k e reclusterizações),
+    em memória, para trocar o número de clusters sem refazer TF-IDF, índice nem varredura.
+    """
+
+    def __init__(self, X, vocab, mode: str = MODE_FULL, models: dict[int, KMeans] | None = None):
+        self.X = X
+        self.vocab = vocab
+        self.mode = mode
+        self.fits: dict[int, tuple[np.ndarray, np.ndarray]] = {
+            k: (m.labels_, m.cluster_centers_) for k, m in (models or {}).items()
+        }
+
+    def cluster(self, k: int, previous_labels=None) -> tuple[np.ndarray, list[list[str]]]:
+        """
+        (rótulos, top_terms_per_cluster) para k clusters. k da varredura vem da memória;
+        senão, um ajuste partindo dos rótulos anteriores (warm_start_centers), se houver,
+        ou o ajuste completo.
+        """
+        k = max(1, min(k, self.X.shape[0]))
+        if k not in self.fits:
+            if previous_labels is not None and len(previous_labels) == self.X.shape[0]:
+                init = warm_start_centers(self.X, previous_labels, k)
+                model = _make_model(k, self.mode, init=init).fit(self.X)
+            else:
+                model = _make_model(k, self.mode).fit(self.X)
+            self.fits[k] = (model.labels_, model.cluster_centers_)
+        labels, centers = self.fits[k]
+        return labels, top_terms_from_centers(centers, self.vocab)
 
 
 def cluster_posts(
@@ -94,56 +292,56 @@ def cluster_posts(
     max_df: float = MAX_DF,
     min_df: int = MIN_DF,
     k_range: tuple[int, int] = CLUSTER_K_RANGE,
-) -> tuple[list[int], list[list[str]], TfidfVectorizer, dict[str, dict[str, Any]]]:
+    corpus: Corpus | None = None,
+    workers: int | None = CLUSTER_WORKERS,
+    mode: str | None = None,
+    sweep_out: list | None = None,
+) -> tuple[list[int], list[list[str]], Corpus, dict[str, dict[str, Any]]]:
     """
     Agrupa documentos (corpo dos posts) em clusters.
     Se n_clusters for None, usa o k sugerido pelo método silhouette.
+    corpus: Corpus já construído sobre `texts` (evita tokenizar de novo).
+    workers: threads da varredura de k; o modelo do k escolhido é reaproveitado.
+    mode: "kmeans" ou "minibatch" (None = cluster_mode(len(texts))).
+    sweep_out: se informado, recebe o ClusterSweep da varredura (para trocar k depois).
     Retorna:
       - labels: lista de tamanho len(texts) com o cluster de cada post
       - top_terms_per_cluster: lista de n_clusters listas com termos mais representativos
-      - vectorizer: o TfidfVectorizer usado
+      - corpus: o Corpus usado (vocabulário e matriz doc-termo)
       - suggestions: {"silhouette": {"k", "scores"}, "elbow": {"k", "scores"}}
     """
     empty_suggestions = {"silhouette": {"k": 2, "scores": {}}, "elbow": {"k": 2, "scores": {}}}
-    normalized = [normalize_text(t) for t in texts]
-    vectorizer = TfidfVectorizer(
-        max_df=max_df,
-        min_df=min_df,
-        stop_words=list(get_stopwords()),
-        token_pattern=r"(?u)\b\w{2,}\b",
-    )
+    if corpus is None:
+        corpus = Corpus(texts)
     try:
-        X = vectorizer.fit_transform(normalized)
+        X, vocab = corpus.tfidf(max_df, min_df)
     except ValueError:
         n = len(texts)
         k_use = n_clusters if n_clusters is not None else N_CLUSTERS_DEFAULT
         return (
             list(range(n)),
             [[] for _ in range(min(k_use, n))],
-            vectorizer,
+            corpus,
             empty_suggestions,
         )
 
     n = X.shape[0]
     if n < 2:
-        return list(range(n)), [[]] * n, vectorizer, empty_suggestions
+        return list(range(n)), [[]] * n, corpus, empty_suggestions
 
-    suggestions = suggest_n_clusters_both(X, k_range=k_range)
+    mode = mode or cluster_mode(n)
+    models, silhouettes = sweep_k(X, k_range, workers=workers, mode=mode)
+    suggestions = _suggestions_from_sweep(models, silhouettes, k_range, n)
     if n_clusters is None:
         k_used = suggestions[CLUSTER_SUGGEST_METHOD]["k"]
     else:
         k_used = n_clusters
     actual_k = max(1, min(k_used, n))
 
-    kmeans = KMeans(n_clusters=actual_k, random_state=42, n_init=10)
-    labels = kmeans.fit_predict(X)
-
-    vocab = vectorizer.get_feature_names_out()
-    top_terms_per_cluster = []
-    for c in range(actual_k):
-        center = kmeans.cluster_centers_[c]
-        top_indices = np.argsort(center)[::-1][:15]
-        terms = [vocab[i] for i in top_indices if center[i] > 0]
-        top_terms_per_cluster.append(terms)
+    # Mesmo random_state/n_init da varredura: reaproveitar o modelo equivale a reajustar
+    sweep = ClusterSweep(X, vocab, mode, models)
+    labels, top_terms_per_cluster = sweep.cluster(actual_k)
+    if sweep_out is not None:
+        sweep_out.append(sweep)
 
-    return list(labels), top_terms_per_cluster, vectorizer, suggestions
+    return labels.tolist(), top_terms_per_cluster, corpus, suggestions
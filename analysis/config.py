@@ -2,6 +2,7 @@
 Configuração do pipeline de análise: stopwords (PT/EN), parâmetros da nuvem e clustering.
 """
 import os
+from pathlib import Path
 
 # NLTK data path (evitar conflitos em alguns ambientes)
 NLTK_DATA = os.environ.get("NLTK_DATA")
@@ -9,9 +10,16 @@ NLTK_DATA = os.environ.get("NLTK_DATA")
 # Idiomas de stopwords
 STOPWORDS_LANGUAGES = ("english", "portuguese")
 
+# Stopwords: por padrão, listas embutidas em analysis/data/stopwords_<idioma>.txt
+# (sem rede nem NLTK). ANALYSIS_NLTK_STOPWORDS=1 usa as listas do NLTK.
+USE_NLTK_STOPWORDS = os.environ.get("ANALYSIS_NLTK_STOPWORDS", "").lower() in ("1", "true", "yes")
+
 # Mínimo de caracteres por token
 MIN_TOKEN_LENGTH = 2
 
+# Textos por bloco no modo multiprocesso de tokenize_batch
+TOKENIZE_CHUNK_SIZE = 5000
+
 # Máximo de palavras na nuvem (mais relevantes)
 MAX_WORDS_CLOUD = 150
 
@@ -21,7 +29,43 @@ N_CLUSTERS_DEFAULT = 6
 # Sugestão automática de k: intervalo testado e método padrão
 CLUSTER_K_RANGE = (2, 15)
 CLUSTER_SUGGEST_METHOD = "silhouette"
+# Threads da varredura de k (None = número de CPUs). Com mais de uma, cada ajuste roda
+# com BLAS/OpenMP em 1 thread (sweep_k), então o total de threads fica em `workers`;
+# com 1, a varredura é sequencial e cada KMeans usa as threads nativas em todos os núcleos
+CLUSTER_WORKERS = int(os.environ["ANALYSIS_CLUSTER_WORKERS"]) if os.environ.get("ANALYSIS_CLUSTER_WORKERS") else None
+
+# Corpus grande (ex.: vários tópicos mesclados): acima deste número de posts o
+# clustering usa MiniBatchKMeans e o silhouette é estimado numa amostra estratificada
+CLUSTER_LARGE_THRESHOLD = int(os.environ.get("ANALYSIS_CLUSTER_LARGE_THRESHOLD", "20000"))
+MINIBATCH_SIZE = 4096
+SILHOUETTE_SAMPLE_SIZE = 5000
+CLUSTER_SEED = 42
+
+# Análise em streaming (analysis.streaming): posts por bloco e dimensão do HashingVectorizer
+STREAM_CHUNK_SIZE = 2000
+HASHING_N_FEATURES = 2 ** 18
+# Termos distintos (1ª passada) e pares termo-post (2ª passada) mantidos em memória antes
+# de gravar uma run ordenada em disco; as runs são intercaladas no final
+STREAM_RUN_TERMS = 200_000
+STREAM_RUN_POSTINGS = 1_000_000
+
+# Atualização incremental (posts novos acrescentados ao tópico): refaz o clustering
+# completo quando alguma métrica de drift passa do limite
+INCREMENTAL_MAX_NEW_FRACTION = 0.25  # posts acrescentados desde o último ajuste / posts no ajuste
+INCREMENTAL_MAX_DISTANCE_RATIO = 1.5  # dist² média dos novos ao centróide / dist² média dos antigos
+INCREMENTAL_MAX_OOV_FRACTION = 0.2  # fração dos tokens novos em termos fora do vocabulário anterior
+
+# Cache de resultados (analysis.cache): diretório, limite em disco e entradas mantidas em memória
+ANALYSIS_CACHE_DIR = Path(
+    os.environ.get("ANALYSIS_CACHE_DIR", Path(__file__).resolve().parent.parent / "data" / ".analysis_cache")
+)
+ANALYSIS_CACHE_MAX_BYTES = int(os.environ.get("ANALYSIS_CACHE_MAX_BYTES", str(1024 ** 3)))
+ANALYSIS_CACHE_MEMORY_ITEMS = 4
+
+# Catálogo das análises do app (analysis.catalog): limite das análises mantidas em memória
+ANALYSIS_CATALOG_MEMORY_BYTES = int(os.environ.get("ANALYSIS_CATALOG_MEMORY_BYTES", str(512 * 1024 ** 2)))
 
 # Parâmetros TF-IDF
 MAX_DF = 0.95  # ignorar termos em mais de 95% dos docs
 MIN_DF = 1     # termo deve aparecer em pelo menos 1 doc
+TFIDF_MAX_FEATURES = 5000  # termos considerados nos scores da nuvem (tfidf_scores)
@@ -0,0 +1,173 @@
+"""
+Corpus compartilhado do pipeline: tokeniza cada post uma única vez e monta a matriz
+esparsa doc-termo (contagens) e o vocabulário. Scores TF-IDF, clustering e índice
+palavra->posts são derivados daqui, sem renormalizar nem revetorizar os textos.
+"""
+from __future__ import annotations
+
+from numbers import Integral
+from typing import Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from analysis.config import MIN_TOKEN_LENGTH
+from analysis.text_processing import get_stopwords, tokenize_batch
+
+
+def df_limits(n_docs: int, max_df: float, min_df: float) -> tuple[float, float]:
+    """(mín, máx) de docs por termo para os filtros min_df/max_df (int = contagem, float = fração)."""
+    max_count = max_df if isinstance(max_df, Integral) else max_df * n_docs
+    min_count = min_df if isinstance(min_df, Integral) else min_df * n_docs
+    if max_count < min_count:
+        raise ValueError("max_df corresponds to < documents than min_df")
+    return min_count, max_count
+
+
+def select_terms(
+    df: np.ndarray,
+    n_docs: int,
+    max_df: float,
+    min_df: float,
+    max_features: Optional[int] = None,
+    tf: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Índices dos termos mantidos pelos filtros max_df/min_df/max_features (como no sklearn).
+    df: docs por termo; tf: ocorrências totais por termo (necessário com max_features).
+    """
+    if len(df) == 0:
+        raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+    min_count, max_count = df_limits(n_docs, max_df, min_df)
+    cols = np.flatnonzero((df <= max_count) & (df >= min_count))
+    if len(cols) == 0:
+        raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+    if max_features is not None and len(cols) > max_features:
+        keep = np.sort(np.argsort(-tf[cols], kind="stable")[:max_features])
+        cols = cols[keep]
+    return cols
+
+
+class Corpus:
+    """
+    Documentos tokenizados (sem stopwords) e matriz de contagens termo x documento.
+    - vocab: array de termos em ordem alfabética (mesma ordem do TfidfVectorizer)
+    - counts: csr_matrix (n_docs x n_termos) com a contagem de cada termo em cada doc
+    - df: número de documentos que contém cada termo
+    tfidf() reproduz TfidfVectorizer(max_df, min_df, max_features) sobre os mesmos tokens.
+    """
+
+    def __init__(
+        self,
+        texts: list[str],
+        stopwords: Optional[set[str]] = None,
+        min_length: int = MIN_TOKEN_LENGTH,
+        workers: int = 1,
+    ):
+        if stopwords is None:
+            stopwords = get_stopwords()
+        term_ids: dict[str, int] = {}
+        indptr = [0]
+        indices: list[int] = []
+        setdefault = term_ids.setdefault
+        for tokens in tokenize_batch(texts, stopwords=stopwords, min_length=min_length, workers=workers):
+            indices.extend([setdefault(t, len(term_ids)) for t in tokens])
+            indptr.append(len(indices))
+
+        n_docs, n_terms = len(texts), len(term_ids)
+        counts = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int64), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+            shape=(n_docs, n_terms),
+        )
+        counts.sum_duplicates()
+        # Colunas em ordem alfabética dos termos
+        terms = np.array(list(term_ids), dtype=object)
+        order = np.argsort(terms.astype(str), kind="stable") if n_terms else np.array([], dtype=np.int64)
+        self.vocab: np.ndarray = terms[order]
+        self.counts: sparse.csr_matrix = counts[:, order].tocsr() if n_terms else counts
+        # Índices ordenados: _remap_columns compartilha `data` com esta matriz e depende disso
+        self.counts.sort_indices()
+        self.df: np.ndarray = np.bincount(self.counts.indices, minlength=n_terms)
+        self._tfidf_cache: dict[tuple, tuple[sparse.csr_matrix, np.ndarray]] = {}
+
+    @classmethod
+    def from_counts(cls, counts, vocab) -> "Corpus":
+        """Corpus a partir de uma matriz de contagens (n_docs x n_termos) e do vocabulário (ordenado)."""
+        corpus = cls.__new__(cls)
+        corpus.vocab = np.asarray(vocab, dtype=object)
+        corpus.counts = sparse.csr_matrix(counts, dtype=np.int64)
+        corpus.df = np.bincount(corpus.counts.indices, minlength=len(corpus.vocab))
+        corpus._tfidf_cache = {}
+        return corpus
+
+    def extend(
+        self,
+        texts: list[str],
+        stopwords: Optional[set[str]] = None,
+        min_length: int = MIN_TOKEN_LENGTH,
+    ) -> "Corpus":
+        """
+        Novo Corpus com os documentos de `texts` acrescentados ao final.
+        Só os novos textos são tokenizados; as colunas antigas são remapeadas para o vocabulário unido.
+        """
+        return Corpus.concat([self, Corpus(texts, stopwords=stopwords, min_length=min_length)])
+
+    @classmethod
+    def concat(cls, parts: list["Corpus"]) -> "Corpus":
+        """Corpus com os documentos de `parts` em sequência, sobre a união (ordenada) dos vocabulários."""
+        if not parts:
+            return cls([])
+        vocab = np.unique(np.concatenate([p.vocab for p in parts])).astype(object)
+        blocks = []
+        df = np.zeros(len(vocab), dtype=np.int64)
+        for part in parts:
+            cols = np.searchsorted(vocab, part.vocab)
+            blocks.append(_remap_columns(part.counts, cols, len(vocab)))
+            np.add.at(df, cols, part.df)
+        corpus = cls.__new__(cls)
+        corpus.vocab = vocab
+        corpus.counts = sparse.vstack(blocks, format="csr")
+        corpus.df = df
+        corpus._tfidf_cache = {}
+        return corpus
+
+    @classmethod
+    def from_posts(cls, posts: list[dict], stopwords: Optional[set[str]] = None) -> "Corpus":
+        return cls([p.get("body") or "" for p in posts], stopwords=stopwords)
+
+    @property
+    def n_docs(self) -> int:
+        return self.counts.shape[0]
+
+    def _term_columns(self, max_df: float, min_df: float, max_features: Optional[int]) -> np.ndarray:
+        """Índices das colunas mantidas pelos filtros max_df/min_df/max_features (como no sklearn)."""
+        tf = np.asarray(self.counts.sum(axis=0)).ravel() if max_features is not None else None
+        return select_terms(self.df, self.n_docs, max_df, min_df, max_features, tf=tf)
+
+    def tfidf(
+        self,
+        max_df: float,
+        min_df: float,
+        max_features: Optional[int] = None,
+    ) -> tuple[sparse.csr_matrix, np.ndarray]:
+        """
+        Matriz TF-IDF (idf suavizado, linhas com norma L2) e termos das colunas.
+        Levanta ValueError se nenhum termo sobrar após os filtros (como o TfidfVectorizer).
+        """
+        key = (max_df, min_df, max_features)
+        if key not in self._tfidf_cache:
+            cols = self._term_columns(max_df, min_df, max_features)
+            idf = np.log((1 + self.n_docs) / (1 + self.df[cols])) + 1.0
+            X = self.counts[:, cols].astype(np.float64) @ sparse.diags(idf)
+            X = normalize(sparse.csr_matrix(X), norm="l2", copy=False)
+            self._tfidf_cache[key] = (X, self.vocab[cols])
+        return self._tfidf_cache[key]
+
+
+def _remap_columns(counts: sparse.csr_matrix, cols: np.ndarray, n_terms: int) -> sparse.csr_matrix:
+    """Mesma matriz com a coluna j movida para cols[j] (cols crescente: mantém índices ordenados)."""
+    return sparse.csr_matrix(
+        (counts.data, cols[counts.indices] if len(cols) else counts.indices, counts.indptr),
+        shape=(counts.shape[0], n_terms),
+    )
@@ -4,10 +4,9 @@ Contagem de termos e TF-IDF para relevância na nuvem de palavras.
 from collections import Counter
 from typing import Optional
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-
-from analysis.config import MIN_DF, MAX_DF, MAX_WORDS_CLOUD
-from analysis.text_processing import get_stopwords, tokenize_without_stopwords, normalize_text
+from analysis.config import MIN_DF, MAX_DF, MAX_WORDS_CLOUD, TFIDF_MAX_FEATURES
+from analysis.corpus import Corpus
+from analysis.text_processing import tokenize_batch
 
 
 def count_terms(texts: list[str], stopwords: Optional[set[str]] = None) -> Counter:
@@ -15,11 +14,8 @@ def count_terms(texts: list[str], stopwords: Optional[set[str]] = None) -> Count
     Contagem bruta de termos em todos os textos (após tokenização e stopwords).
     Retorna Counter palavra -> frequência.
     """
-    if stopwords is None:
-        stopwords = get_stopwords()
     counter: Counter = Counter()
-    for text in texts:
-        tokens = tokenize_without_stopwords(text, stopwords=stopwords)
+    for tokens in tokenize_batch(texts, stopwords=stopwords):
         counter.update(tokens)
     return counter
 
@@ -29,26 +25,20 @@ def tfidf_scores(
     *,
     max_df: float = MAX_DF,
     min_df: int = MIN_DF,
-    max_features: int = 5000,
+    max_features: int = TFIDF_MAX_FEATURES,
+    corpus: Optional[Corpus] = None,
 ) -> dict[str, float]:
     """
     Calcula relevância por TF-IDF. Cada elemento de `texts` é um documento (ex.: um post).
     Retorna dict palavra -> score (soma dos TF-IDF da palavra em todos os docs).
+    corpus: Corpus já construído sobre `texts` (evita tokenizar de novo).
     """
-    # TF-IDF espera strings; usamos texto normalizado por doc
-    normalized = [normalize_text(t) for t in texts]
-    vectorizer = TfidfVectorizer(
-        max_df=max_df,
-        min_df=min_df,
-        max_features=max_features,
-        stop_words=list(get_stopwords()),
-        token_pattern=r"(?u)\b\w{2,}\b",
-    )
+    if corpus is None:
+        corpus = Corpus(texts)
     try:
-        X = vectorizer.fit_transform(normalized)
+        X, vocab = corpus.tfidf(max_df, min_df, max_features)
     except ValueError:
         return {}
-    vocab = vectorizer.get_feature_names_out()
     # Soma dos TF-IDF por termo (coluna)
     sums = X.sum(axis=0).A1
     return dict(zip(vocab, sums))
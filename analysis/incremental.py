@@ -0,0 +1,338 @@
+"""
+Atualização incremental de uma análise quando o tópico ganha posts novos (no final).
+
+O custo de uma atualização é proporcional aos posts novos: só eles são tokenizados e
+vetorizados. O que a análise precisa dos posts anteriores fica em term_stats, gravado
+junto com a análise e atualizado só com as linhas novas:
+  - terms, df, tf: vocabulário, docs e ocorrências por termo (IDF e filtros max_df/min_df/max_features)
+  - score_sums: Σ contagem / ‖linha TF-IDF‖ de cada termo (o score da nuvem é idf × score_sums)
+  - cluster_sums, cluster_sizes: o mesmo por cluster (o centróide é idf × cluster_sums / tamanho)
+  - sq_norms: Σ ‖linha TF-IDF‖² (docs com algum termo), para a dist² média ao centróide
+As normas das linhas antigas ficam com o IDF da época em que entraram (aproximação: o IDF
+muda pouco com poucos posts novos); o refit, disparado pelo drift, recalcula tudo do zero.
+Os novos posts vão para o centróide mais próximo e os postings são acrescentados ao índice.
+"""
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Mapping
+from typing import Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.metrics.pairwise import euclidean_distances
+
+from analysis.clustering import cluster_sums, top_terms_from_centers
+from analysis.config import (
+    CLUSTER_LARGE_THRESHOLD,
+    CLUSTER_WORKERS,
+    INCREMENTAL_MAX_DISTANCE_RATIO,
+    INCREMENTAL_MAX_NEW_FRACTION,
+    INCREMENTAL_MAX_OOV_FRACTION,
+    MAX_DF,
+    MAX_WORDS_CLOUD,
+    MIN_DF,
+    TFIDF_MAX_FEATURES,
+)
+from analysis.corpus import Corpus, _remap_columns, select_terms
+from analysis.frequency import top_words_for_cloud
+from analysis.run import run_analysis
+from analysis.word_to_posts import WORD_INDEX_FORMAT, PostingIndex
+from scraper.posts import post_key
+
+
+def posts_digest(posts, previous: str = "") -> str:
+    """
+    Hash encadeado das chaves (post_key) dos posts: H(hash anterior + chaves dos posts
+    acrescentados). Cada atualização só processa os posts novos.
+    """
+    keys = "\n".join(repr(post_key(post)) for post in posts)
+    return hashlib.sha256(f"{previous}\n{keys}".encode("utf-8")).hexdigest()
+
+
+def _chained_digest(posts, segments: list[int]) -> str:
+    """Hash de `posts` encadeado nos mesmos trechos (número de posts por atualização) da análise."""
+    digest, start = "", 0
+    for size in segments:
+        digest = posts_digest(posts[start:start + size], digest)
+        start += size
+    return digest
+
+
+def split_new_posts(previous: Mapping, posts: list[dict]) -> Optional[list[dict]]:
+    """
+    Posts de `posts` acrescentados depois dos posts da análise `previous`.
+    Retorna None se os posts anteriores não forem um prefixo de `posts` (edição ou
+    remoção no meio do tópico): nesse caso a análise precisa ser refeita do zero.
+    Com o hash gravado pela atualização anterior, os posts salvos nem são lidos.
+    """
+    info = previous.get("incremental") or {}
+    segments = info.get("digest_segments")
+    if info.get("posts_digest") and segments:
+        n_old = sum(segments)
+        if len(posts) < n_old or _chained_digest(posts[:n_old], segments) != info["posts_digest"]:
+            return None
+        return posts[n_old:]
+    previous_posts = previous["posts"]
+    n_old = len(previous_posts)
+    if len(posts) < n_old:
+        return None
+    for i in range(n_old):
+        if post_key(previous_posts[i]) != post_key(posts[i]):
+            return None
+    return posts[n_old:]
+
+
+def _previous_corpus(previous: Mapping) -> Corpus:
+    if "doc_term" in previous and "vocab" in previous:
+        return Corpus.from_counts(previous["doc_term"], list(previous["vocab"]))
+    # Análise em JSON (sem matriz doc-termo): tokenizar os posts anteriores
+    return Corpus.from_posts(list(previous["posts"]))
+
+
+_RECOMPUTED = ("posts", "cluster_labels", "word_scores", "word_to_posts", "doc_term", "vocab", "term_stats")
+
+
+def _materialize(previous: Mapping) -> dict:
+    """Cópia da análise anterior como dict no formato de run_analysis."""
+    if hasattr(previous, "to_dict"):
+        return previous.to_dict()
+    return dict(previous)
+
+
+def _idf(df: np.ndarray, n_docs: int) -> np.ndarray:
+    """IDF suavizado, como em Corpus.tfidf."""
+    return np.log((1 + n_docs) / (1 + df)) + 1.0
+
+
+def _inverse_norms(counts: sparse.csr_matrix, idf: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """1 / ‖linha TF-IDF‖ de cada doc nas colunas `cols` (0 para docs sem nenhum desses termos)."""
+    weights = np.zeros(len(idf))
+    weights[cols] = idf[cols] ** 2
+    norms = np.sqrt(counts.power(2) @ weights)
+    return np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+
+
+def _columns(df: np.ndarray, tf: np.ndarray, n_docs: int) -> tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """Colunas dos scores da nuvem (tfidf_scores) e do clustering (None se nenhum termo sobrar)."""
+    try:
+        score_cols = select_terms(df, n_docs, MAX_DF, MIN_DF, TFIDF_MAX_FEATURES, tf=tf)
+        cluster_cols = select_terms(df, n_docs, MAX_DF, MIN_DF)
+    except ValueError:
+        return None, None
+    return score_cols, cluster_cols
+
+
+def _row_sums(counts: sparse.csr_matrix, idf: np.ndarray, cols: Optional[np.ndarray]) -> tuple[sparse.csr_matrix, int]:
+    """Contagens divididas pela norma TF-IDF de cada linha e número de linhas com norma > 0."""
+    if cols is None:
+        return sparse.csr_matrix(counts.shape), 0
+    inv = _inverse_norms(counts, idf, cols)
+    return sparse.diags(inv) @ counts, int(np.count_nonzero(inv))
+
+
+def term_stats(corpus: Corpus, labels: np.ndarray, k: int) -> dict:
+    """Estado incremental (ver docstring do módulo) calculado do zero a partir do Corpus e dos rótulos."""
+    n = corpus.n_docs
+    tf = np.asarray(corpus.counts.sum(axis=0)).ravel()
+    idf = _idf(corpus.df, n)
+    score_cols, cluster_cols = _columns(corpus.df, tf, n)
+    scaled, _ = _row_sums(corpus.counts, idf, score_cols)
+    clustered, nonzero = _row_sums(corpus.counts, idf, cluster_cols)
+    sums, sizes = cluster_sums(clustered, np.asarray(labels, dtype=np.int64), k)
+    return {
+        "terms": corpus.vocab,
+        "df": corpus.df.astype(np.int64),
+        "tf": tf.astype(np.int64),
+        "score_sums": np.asarray(scaled.sum(axis=0)).ravel(),
+        "cluster_sums": sums,
+        "cluster_sizes": sizes.astype(np.int64),
+        "sq_norms": float(nonzero),
+    }
+
+
+def _previous_stats(previous: Mapping, labels: np.ndarray, k: int) -> dict:
+    """term_stats da análise anterior (calculado uma vez, se ela ainda não tiver)."""
+    stats = previous.get("term_stats")
+    if stats is not None and np.shape(stats["cluster_sums"])[0] == k:
+        return {key: np.asarray(value, dtype=object if key == "terms" else None) for key, value in stats.items()}
+    return term_stats(_previous_corpus(previous), labels, k)
+
+
+def _grow(values: np.ndarray, cols: np.ndarray, n_terms: int) -> np.ndarray:
+    """values (última dimensão = termos antigos) com os termos movidos para cols num vocabulário de n_terms."""
+    out = np.zeros(values.shape[:-1] + (n_terms,), dtype=values.dtype)
+    out[..., cols] = values
+    return out
+
+
+def update_analysis(
+    previous: Mapping,
+    new_posts: list[dict],
+    *,
+    posts: Optional[list[dict]] = None,
+    corpus: Optional[Corpus] = None,
+    n_clusters: int | None = None,
+    workers: int | None = CLUSTER_WORKERS,
+    large_threshold: int = CLUSTER_LARGE_THRESHOLD,
+    max_new_fraction: float = INCREMENTAL_MAX_NEW_FRACTION,
+    max_distance_ratio: float = INCREMENTAL_MAX_DISTANCE_RATIO,
+    max_oov_fraction: float = INCREMENTAL_MAX_OOV_FRACTION,
+) -> tuple[dict, Optional[Corpus]]:
+    """
+    Atualiza a análise `previous` (resultado de run_analysis ou AnalysisArtifact) com
+    `new_posts` acrescentados ao final do tópico.
+    posts: lista completa (anteriores + novos), se já estiver em memória (evita decodificar os posts salvos).
+    corpus: Corpus dos posts anteriores, se já estiver em memória (usado no refit).
+    Retorna (análise no formato de run_analysis, Corpus). Com refit ou `corpus` informado,
+    o Corpus é o de todos os posts; se a análise anterior tem a matriz doc-termo, é o
+    dos posts novos (sobre o vocabulário unido), para write_artifact(..., base=previous)
+    acrescentar as linhas às já gravadas; senão é None. O campo "incremental" registra
+    posts acrescentados, métricas de drift, se houve refit e o hash encadeado dos posts.
+    n_clusters/workers/large_threshold valem para o refit completo.
+    """
+    n_old = int(previous.get("total_posts") or len(previous["posts"]))
+    if posts is None:
+        posts = list(previous["posts"]) + list(new_posts)
+    if not new_posts:
+        if corpus is None and "doc_term" in previous and "vocab" in previous:
+            corpus = _previous_corpus(previous)
+        return _materialize(previous), corpus
+    new_corpus = Corpus([p.get("body") or "" for p in new_posts])
+
+    info = dict(previous.get("incremental") or {})
+    fit_docs = info.get("fit_docs") or n_old
+    added_since_fit = len(posts) - fit_docs
+    # Hash encadeado: só os posts novos entram (o prefixo é hasheado uma vez, na primeira atualização)
+    if info.get("posts_digest") and info.get("digest_segments"):
+        old_digest, segments = info["posts_digest"], list(info["digest_segments"])
+    else:
+        old_digest, segments = posts_digest(posts[:n_old]), [n_old]
+    digest = {"posts_digest": posts_digest(new_posts, old_digest), "digest_segments": segments + [len(new_posts)]}
+
+    def _refit(reason: str, drift: dict) -> tuple[dict, Corpus]:
+        full = Corpus.concat([corpus if corpus is not None else _previous_corpus(previous), new_corpus])
+        thread_data = {"thread_id": previous.get("thread_id"), "title": previous.get("title"), "posts": posts}
+        result = run_analysis(
+            thread_data, n_clusters=n_clusters, corpus=full, workers=workers, large_threshold=large_threshold
+        )
+        result["term_stats"] = term_stats(full, result["cluster_labels"], result["n_clusters_used"])
+        result["incremental"] = {
+            "fit_docs": len(posts),
+            "added_posts": len(new_posts),
+            "refit": True,
+            "refit_reason": reason,
+            "drift": drift,
+            **digest,
+        }
+        return result, full
+
+    old_labels = np.asarray(previous.get("cluster_labels", []), dtype=np.int64)
+    k = int(previous.get("n_clusters_used") or 0)
+    if n_old < 2 or k < 1 or len(old_labels) != n_old or old_labels.max(initial=-1) >= k:
+        return _refit("análise anterior sem clusters utilizáveis", {})
+    stats = _previous_stats(previous, old_labels, k)
+
+    # Vocabulário unido; estado anterior e contagens novas nas colunas dele
+    old_terms = stats["terms"]
+    vocab = np.union1d(old_terms, new_corpus.vocab).astype(object) if len(new_corpus.vocab) else old_terms
+    old_cols = np.searchsorted(vocab, old_terms)
+    new_cols = np.searchsorted(vocab, new_corpus.vocab)
+    new_counts = _remap_columns(new_corpus.counts, new_cols, len(vocab))
+    n = n_old + new_corpus.n_docs
+    df = _grow(stats["df"], old_cols, len(vocab)) + np.bincount(new_counts.indices, minlength=len(vocab))
+    tf = _grow(stats["tf"], old_cols, len(vocab)) + np.asarray(new_counts.sum(axis=0)).ravel()
+    idf = _idf(df, n)
+    score_cols, cluster_cols = _columns(df, tf, n)
+    if cluster_cols is None:
+        return _refit("vocabulário vazio", {})
+
+    # Centróides a partir do estado anterior, sob o IDF atualizado
+    sums = _grow(stats["cluster_sums"], old_cols, len(vocab))
+    sizes = stats["cluster_sizes"]
+    old_centers = sums[:, cluster_cols] * idf[cluster_cols]
+    centers = old_centers / np.maximum(sizes, 1)[:, None]
+    clustered, new_nonzero = _row_sums(new_counts, idf, cluster_cols)
+    X_new = sparse.csr_matrix(clustered[:, cluster_cols] @ sparse.diags(idf[cluster_cols]))
+    dist2 = euclidean_distances(X_new, centers, squared=True)
+    new_labels = dist2.argmin(axis=1)
+
+    # dist² média dos antigos ao centróide: (Σ‖x‖² − Σ ‖soma_c‖²/n_c) / n
+    nonempty = sizes > 0
+    within = stats["sq_norms"] - ((old_centers[nonempty] ** 2).sum(axis=1) / sizes[nonempty]).sum()
+    old_mean = max(float(within), 0.0) / n_old
+    pos = np.minimum(np.searchsorted(old_terms, new_corpus.vocab), max(len(old_terms) - 1, 0))
+    in_old_vocab = old_terms[pos] == new_corpus.vocab if len(old_terms) else np.zeros(len(new_corpus.vocab), bool)
+    new_tokens = new_corpus.counts.sum()
+    drift = {
+        "new_fraction": added_since_fit / max(fit_docs, 1),
+        "distance_ratio": float(dist2.min(axis=1).mean()) / old_mean if old_mean > 0 else 0.0,
+        "oov_fraction": float(new_corpus.counts[:, ~in_old_vocab].sum() / new_tokens) if new_tokens else 0.0,
+    }
+    limits = {
+        "new_fraction": max_new_fraction,
+        "distance_ratio": max_distance_ratio,
+        "oov_fraction": max_oov_fraction,
+    }
+    exceeded = [name for name, value in drift.items() if value > limits[name]]
+    if exceeded:
+        return _refit(", ".join(exceeded), drift)
+
+    new_sums, new_sizes = cluster_sums(clustered, new_labels, k)
+    sums += new_sums
+    sizes = sizes + new_sizes
+    centers = sums[:, cluster_cols] * idf[cluster_cols] / np.maximum(sizes, 1)[:, None]
+    labels = np.concatenate([old_labels, new_labels])
+
+    scaled, _ = _row_sums(new_counts, idf, score_cols)
+    score_sums = _grow(stats["score_sums"], old_cols, len(vocab)) + np.asarray(scaled.sum(axis=0)).ravel()
+    word_scores = {}
+    if score_cols is not None:
+        word_scores = dict(zip(vocab[score_cols], (idf[score_cols] * score_sums[score_cols]).tolist()))
+    word_cloud = top_words_for_cloud(word_scores, max_words=MAX_WORDS_CLOUD)
+
+    new_index = PostingIndex.from_counts(new_counts, vocab, doc_offset=n_old)
+    old_index = previous.get("word_to_posts")
+    if isinstance(old_index, PostingIndex):
+        word_to_posts = old_index.extend(new_index)
+    elif previous.get("word_index_format") == WORD_INDEX_FORMAT:
+        word_to_posts = PostingIndex.from_dict(old_index).extend(new_index)
+    else:
+        word_to_posts = PostingIndex.from_corpus(_previous_corpus(previous)).extend(new_index)
+
+    if corpus is not None:
+        out_corpus = Corpus.concat([corpus, new_corpus])
+    elif "doc_term" in previous and "vocab" in previous:
+        out_corpus = Corpus.from_counts(new_counts, vocab)  # só as linhas novas: o artefato acrescenta
+    else:
+        out_corpus = None
+
+    # Campos não recalculados (sugestões de k, modo, título...) vêm da análise anterior
+    result = {key: previous[key] for key in previous if key not in _RECOMPUTED}
+    result.update(
+        total_posts=len(posts),
+        posts=posts,
+        word_scores=word_scores,
+        word_cloud=[[w, float(s)] for w, s in word_cloud],
+        cluster_labels=labels,
+        top_terms_per_cluster=top_terms_from_centers(centers, vocab[cluster_cols]),
+        word_to_posts=word_to_posts,
+        word_index_format=WORD_INDEX_FORMAT,
+        term_stats={
+            "terms": vocab,
+            "df": df,
+            "tf": tf,
+            "score_sums": score_sums,
+            "cluster_sums": sums,
+            "cluster_sizes": sizes,
+            "sq_norms": float(stats["sq_norms"]) + new_nonzero,
+        },
+        incremental={
+            "fit_docs": fit_docs,
+            "added_posts": len(new_posts),
+            "refit": False,
+            "drift": drift,
+            **digest,
+        },
+    )
+    return result, out_corpus
@@ -0,0 +1,176 @@
+"""
+Análise de vários tópicos com vocabulário e IDF compartilhados, para comparar
+feedbacks (ex.: um tópico por vocação). Cada tópico é tokenizado num processo do
+pool; os corpora são unidos numa única matriz doc-termo e os scores por tópico e
+as diferenças entre tópicos saem de operações esparsas sobre a mesma matriz TF-IDF.
+
+Uso:
+  python -m analysis.multi data/thread_1.json data/thread_2.json --name monk_vs_knight
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from analysis.config import MAX_DF, MAX_WORDS_CLOUD, MIN_DF, TFIDF_MAX_FEATURES
+from analysis.corpus import Corpus
+
+TOP_DISTINCTIVE = 30
+
+
+def _thread_corpus(texts: list[str]) -> Corpus:
+    return Corpus(texts)
+
+
+def build_shared_corpus(threads: list[dict], workers: int = 1) -> tuple[Corpus, np.ndarray]:
+    """
+    Tokeniza cada tópico (em `workers` processos) e une os corpora.
+    Retorna (Corpus de todos os posts, em ordem de tópico; tópico de cada doc).
+    """
+    texts = [[p.get("body") or "" for p in t.get("posts", [])] for t in threads]
+    if workers > 1 and len(threads) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(threads))) as pool:
+            parts = list(pool.map(_thread_corpus, texts))
+    else:
+        parts = [_thread_corpus(t) for t in texts]
+    doc_thread = np.repeat(np.arange(len(threads)), [len(t) for t in texts])
+    return Corpus.concat(parts), doc_thread
+
+
+def thread_term_scores(
+    X: sparse.csr_matrix,
+    doc_thread: np.ndarray,
+    n_threads: int,
+) -> tuple[sparse.csr_matrix, np.ndarray]:
+    """
+    Soma dos TF-IDF de cada termo por tópico (n_threads x n_termos, esparsa) e número de posts por tópico.
+    """
+    n_docs = X.shape[0]
+    membership = sparse.csr_matrix(
+        (np.ones(n_docs), (doc_thread, np.arange(n_docs))), shape=(n_threads, n_docs)
+    )
+    return (membership @ X).tocsr(), np.bincount(doc_thread, minlength=n_threads)
+
+
+def thread_means(sums: sparse.csr_matrix, sizes: np.ndarray) -> sparse.csr_matrix:
+    """TF-IDF médio por post de cada termo em cada tópico (comparável entre tópicos de tamanhos diferentes)."""
+    return (sparse.diags(1.0 / np.maximum(sizes, 1).astype(np.float64)) @ sums).tocsr()
+
+
+def term_differences(sums: sparse.csr_matrix, sizes: np.ndarray) -> sparse.csr_matrix:
+    """
+    Para cada tópico, TF-IDF médio por post do termo no tópico menos o médio nos demais
+    (n_threads x n_termos, esparsa). Positivo: termo mais característico do tópico.
+    Só há entradas onde o termo ocorre no tópico: nos demais termos a diferença é ≤ 0.
+    """
+    sums = sums.tocsr()
+    sizes = sizes.astype(np.float64)
+    total = np.asarray(sums.sum(axis=0)).ravel()
+    rest_sizes = np.maximum(sizes.sum() - sizes, 1)
+    rows = np.repeat(np.arange(sums.shape[0]), np.diff(sums.indptr))
+    data = sums.data / np.maximum(sizes, 1)[rows] - (total[sums.indices] - sums.data) / rest_sizes[rows]
+    return sparse.csr_matrix((data, sums.indices, sums.indptr), shape=sums.shape)
+
+
+def _top(row: sparse.spmatrix, vocab, n: int) -> list[list]:
+    """Os n termos de maior valor positivo em `row` (linha esparsa: só os valores guardados são ordenados)."""
+    row = sparse.csr_matrix(row).sorted_indices()
+    order = np.argsort(-row.data, kind="stable")[:n]
+    return [[vocab[row.indices[k]], float(row.data[k])] for k in order if row.data[k] > 0]
+
+
+def run_multi_analysis(
+    threads: list[dict],
+    *,
+    workers: int = 1,
+    max_df: float = MAX_DF,
+    min_df: int = MIN_DF,
+    max_features: int = TFIDF_MAX_FEATURES,
+    top_n: int = TOP_DISTINCTIVE,
+) -> dict:
+    """
+    Analisa os tópicos com vocabulário e IDF comuns.
+    Retorna:
+      - threads: por tópico, thread_id, title, total_posts, word_cloud (scores no vocabulário comum)
+        e distinctive_terms (termos com maior diferença de TF-IDF médio em relação aos demais)
+      - pairwise: {"<a>|<b>": termos mais característicos de a em relação a b}
+    Levanta ValueError se dois tópicos tiverem o mesmo thread_id (as chaves de pairwise colidiriam).
+    """
+    ids = [str(t.get("thread_id", i)) for i, t in enumerate(threads)]
+    repeated = sorted({tid for tid in ids if ids.count(tid) > 1})
+    if repeated:
+        raise ValueError(f"thread_id repetido entre as entradas: {', '.join(repeated)}")
+    corpus, doc_thread = build_shared_corpus(threads, workers=workers)
+    try:
+        X, vocab = corpus.tfidf(max_df, min_df, max_features)
+    except ValueError:
+        X, vocab = sparse.csr_matrix((corpus.n_docs, 0)), np.array([], dtype=object)
+    sums, sizes = thread_term_scores(X, doc_thread, len(threads))
+    diffs = term_differences(sums, sizes)
+    means = thread_means(sums, sizes)
+
+    out_threads = []
+    for i, t in enumerate(threads):
+        out_threads.append({
+            "thread_id": ids[i],
+            "title": t.get("title"),
+            "total_posts": int(sizes[i]),
+            "word_cloud": _top(sums[i], vocab, MAX_WORDS_CLOUD),
+            "distinctive_terms": _top(diffs[i], vocab, top_n),
+        })
+    pairwise = {
+        f"{ids[a]}|{ids[b]}": _top(means[a] - means[b], vocab, top_n)
+        for a in range(len(threads))
+        for b in range(len(threads))
+        if a != b
+    }
+    return {
+        "thread_ids": ids,
+        "total_posts": int(corpus.n_docs),
+        "vocabulary_size": int(len(vocab)),
+        "threads": out_threads,
+        "pairwise": pairwise,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara vários tópicos com vocabulário e IDF comuns")
+    parser.add_argument("inputs", nargs="+", help="JSONs de tópicos (ex: data/thread_4992269.json)")
+    parser.add_argument("-o", "--output-dir", default="data", help="Diretório de saída")
+    parser.add_argument("--name", default=None, help="Nome da comparação (padrão: ids dos tópicos)")
+    parser.add_argument("--workers", type=int, default=1, help="Processos para tokenizar os tópicos em paralelo")
+    parser.add_argument("--top", type=int, default=TOP_DISTINCTIVE, help="Termos característicos por tópico/par")
+    args = parser.parse_args()
+
+    threads = []
+    for p in map(Path, args.inputs):
+        if not p.exists():
+            raise SystemExit(f"Arquivo não encontrado: {p}")
+        with open(p, encoding="utf-8") as f:
+            threads.append(json.load(f))
+
+    try:
+        result = run_multi_analysis(threads, workers=args.workers, top_n=args.top)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    name = args.name or "_".join(result["thread_ids"])
+    out_dir = Path(args.output_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / f"multi_{name}.json"
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    print(f"Comparação salva: {out_path}")
+    print(f"  Vocabulário comum: {result['vocabulary_size']} termos, {result['total_posts']} posts")
+    for t in result["threads"]:
+        terms = ", ".join(w for w, _ in t["distinctive_terms"][:8])
+        print(f"  {t['thread_id']}: {terms}")
+
+
+if __name__ == "__main__":
+    main()
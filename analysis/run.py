@@ -1,40 +1,95 @@
 """
 Orquestra o pipeline de análise: carrega JSON do scraper, processa, gera scores,
-clustering e índice palavra->posts; salva artefatos em data/analysis_<thread_id>.json.
+clustering e índice palavra->posts; salva o artefato em data/analysis_<thread_id>/
+(ou data/analysis_<thread_id>.json com --format json).
 """
 import argparse
 import json
+from collections.abc import Mapping
 from pathlib import Path
 
-from analysis.config import MAX_WORDS_CLOUD, N_CLUSTERS_DEFAULT
-from analysis.text_processing import get_stopwords
+import numpy as np
+from scipy import sparse
+
+from analysis.artifact import AnalysisArtifact, json_default, is_artifact, load_artifact, write_artifact
+from analysis.config import (
+    ANALYSIS_CACHE_DIR,
+    CLUSTER_LARGE_THRESHOLD,
+    CLUSTER_WORKERS,
+    MAX_DF,
+    MAX_WORDS_CLOUD,
+    MIN_DF,
+    N_CLUSTERS_DEFAULT,
+)
+from analysis.corpus import Corpus
 from analysis.frequency import tfidf_scores, top_words_for_cloud
-from analysis.clustering import cluster_posts
-from analysis.word_to_posts import build_word_to_posts_index
+from analysis.clustering import MODE_FULL, MODE_MINIBATCH, ClusterSweep, cluster_mode, cluster_posts
+from analysis.word_to_posts import WORD_INDEX_FORMAT, build_word_to_posts_index
+from instrumentation.metrics import Metrics, format_stages, profiled
 
 
-def run_analysis(thread_data: dict, n_clusters: int | None = None) -> dict:
+def run_analysis(
+    thread_data: dict,
+    n_clusters: int | None = None,
+    *,
+    corpus: Corpus | None = None,
+    workers: int | None = CLUSTER_WORKERS,
+    large_threshold: int = CLUSTER_LARGE_THRESHOLD,
+    sweep_out: list | None = None,
+    metrics: Metrics | None = None,
+) -> dict:
     """
     Recebe o dict do thread (thread_id, posts, ...) e retorna o dict de análise.
     Se n_clusters for None, usa o k sugerido pelo método silhouette.
     Inclui suggested_k_silhouette, suggested_k_elbow e n_clusters_used.
+    Os posts são tokenizados uma única vez (Corpus); scores, clusters e índice
+    derivam da mesma matriz doc-termo. `corpus` permite reaproveitar um já construído.
+    workers: threads da varredura de k do clustering (None = número de CPUs).
+    large_threshold: acima deste número de posts, clustering em modo "minibatch"
+    (registrado em cluster_mode).
+    sweep_out: se informado, recebe o ClusterSweep da varredura (ver recluster_analysis).
+    metrics: registra tempo/memória por etapa (tokenize, word_scores, vectorize, k_sweep,
+    word_index, serialize) e contadores (posts, vocabulário, nnz).
     """
+    metrics = metrics or Metrics.disabled()
     posts = thread_data.get("posts", [])
     texts = [p.get("body") or "" for p in posts]
     thread_id = thread_data.get("thread_id", "unknown")
 
-    stopwords = get_stopwords()
-    word_scores = tfidf_scores(texts)
-    word_cloud = top_words_for_cloud(word_scores, max_words=MAX_WORDS_CLOUD)
-    labels, top_terms_per_cluster, _, suggestions = cluster_posts(texts, n_clusters=n_clusters)
-    word_to_posts = build_word_to_posts_index(posts, stopwords=stopwords)
+    if corpus is None:
+        with metrics.stage("tokenize"):
+            corpus = Corpus(texts)
+    metrics.count("posts", len(posts))
+    metrics.count("vocabulary_size", len(corpus.vocab))
+    metrics.count("doc_term_nnz", int(corpus.counts.nnz))
+    with metrics.stage("word_scores"):
+        word_scores = tfidf_scores(texts, corpus=corpus)
+        word_cloud = top_words_for_cloud(word_scores, max_words=MAX_WORDS_CLOUD)
+    with metrics.stage("vectorize"):
+        try:
+            X, _ = corpus.tfidf(MAX_DF, MIN_DF)  # em cache no Corpus; cluster_posts reaproveita
+            metrics.count("tfidf_shape", list(X.shape))
+            metrics.count("tfidf_nnz", int(X.nnz))
+        except ValueError:
+            pass
+    mode = cluster_mode(len(texts), large_threshold)
+    with metrics.stage("k_sweep"):
+        labels, top_terms_per_cluster, _, suggestions = cluster_posts(
+            texts, n_clusters=n_clusters, corpus=corpus, workers=workers, mode=mode, sweep_out=sweep_out
+        )
+    metrics.count("k_swept", len(suggestions["elbow"]["scores"]))
+    metrics.count("n_clusters", len(top_terms_per_cluster))
+    with metrics.stage("word_index"):
+        word_to_posts = build_word_to_posts_index(posts, corpus=corpus)
 
-    # Serializar: word_to_posts com chaves string; word_cloud como lista de [word, score]
-    word_cloud_serializable = [[w, float(s)] for w, s in word_cloud]
-    word_scores_serializable = {k: float(v) for k, v in word_scores.items()}
-    # Scores por k: chaves int -> int no JSON
-    suggested_scores_silhouette = {int(k): v for k, v in suggestions["silhouette"]["scores"].items()}
-    suggested_scores_elbow = {int(k): v for k, v in suggestions["elbow"]["scores"].items()}
+    with metrics.stage("serialize"):
+        # Serializar: word_to_posts como {palavra: [índices em posts]}; word_cloud como lista de [word, score]
+        word_cloud_serializable = [[w, float(s)] for w, s in word_cloud]
+        word_scores_serializable = {k: float(v) for k, v in word_scores.items()}
+        # Scores por k: chaves int -> int no JSON
+        suggested_scores_silhouette = {int(k): v for k, v in suggestions["silhouette"]["scores"].items()}
+        suggested_scores_elbow = {int(k): v for k, v in suggestions["elbow"]["scores"].items()}
+        word_to_posts_serializable = word_to_posts.to_dict()
 
     return {
         "thread_id": thread_id,
@@ -44,9 +99,11 @@ def run_analysis(thread_data: dict, n_clusters: int | None = None) -> dict:
         "word_cloud": word_cloud_serializable,
         "cluster_labels": labels,
         "top_terms_per_cluster": top_terms_per_cluster,
-        "word_to_posts": word_to_posts,
+        "word_to_posts": word_to_posts_serializable,
+        "word_index_format": WORD_INDEX_FORMAT,
         "posts": posts,
         "n_clusters_used": len(top_terms_per_cluster),
+        "cluster_mode": mode,
         "suggested_k_silhouette": suggestions["silhouette"]["k"],
         "suggested_k_elbow": suggestions["elbow"]["k"],
         "suggested_scores_silhouette": suggested_scores_silhouette,
@@ -54,32 +111,207 @@ def run_analysis(thread_data: dict, n_clusters: int | None = None) -> dict:
     }
 
 
+def recluster_analysis(
+    result: Mapping,
+    n_clusters: int,
+    *,
+    sweep: ClusterSweep | None = None,
+    corpus: Corpus | None = None,
+) -> tuple[dict, ClusterSweep]:
+    """
+    Troca só o número de clusters de uma análise (dict ou AnalysisArtifact): recalcula
+    cluster_labels, top_terms_per_cluster e n_clusters_used; scores, índice e sugestões
+    são mantidos (seções do artefato não são lidas).
+    sweep: ClusterSweep da mesma análise (run_analysis(..., sweep_out=...) ou de uma
+    chamada anterior); os k já ajustados saem da memória. Sem ele, a matriz vem do
+    artefato (doc_term/vocab), de `corpus` ou dos posts, e o ajuste parte dos rótulos atuais.
+    Retorna (nova análise, sweep para as próximas trocas).
+    """
+    if sweep is None:
+        if corpus is None:
+            if "doc_term" in result and "vocab" in result:
+                corpus = Corpus.from_counts(result["doc_term"], list(result["vocab"]))
+            else:
+                corpus = Corpus([p.get("body") or "" for p in result.get("posts", [])])
+        try:
+            X, vocab = corpus.tfidf(MAX_DF, MIN_DF)
+        except ValueError:
+            X, vocab = sparse.csr_matrix((corpus.n_docs, 0)), np.array([], dtype=object)
+        mode = result.get("cluster_mode")
+        if mode not in (MODE_FULL, MODE_MINIBATCH):
+            mode = cluster_mode(X.shape[0])
+        sweep = ClusterSweep(X, vocab, mode)
+
+    previous = np.asarray(result.get("cluster_labels", []), dtype=np.int64)
+    if sweep.X.shape[0] < 2 or sweep.X.shape[1] == 0:
+        labels, top_terms = np.arange(sweep.X.shape[0]), [[] for _ in range(min(n_clusters, sweep.X.shape[0]))]
+    else:
+        labels, top_terms = sweep.cluster(n_clusters, previous_labels=previous if len(previous) else None)
+
+    # term_stats (atualização incremental) acompanha os rótulos anteriores: recalculado no próximo --incremental
+    out = {k: result[k] for k in result if k not in ("doc_term", "vocab", "term_stats")}
+    out.update(
+        cluster_labels=labels.tolist(),
+        top_terms_per_cluster=top_terms,
+        n_clusters_used=len(top_terms),
+    )
+    return out, sweep
+
+
+def _update_existing(thread_data: dict, artifact_path: Path, json_path: Path, args) -> tuple:
+    """
+    Atualização incremental a partir da análise salva (artefato ou JSON).
+    Retorna (análise, Corpus, artefato anterior ou None); análise None se não houver
+    análise anterior compatível (faz a análise completa). Sem posts novos, a análise é o
+    próprio artefato anterior (nada a regravar).
+    """
+    from analysis.incremental import split_new_posts, update_analysis
+
+    if is_artifact(artifact_path):
+        previous = load_artifact(artifact_path)
+    elif json_path.exists():
+        with open(json_path, encoding="utf-8") as f:
+            previous = json.load(f)
+    else:
+        print("Sem análise anterior: análise completa.")
+        return None, None, None
+    posts = thread_data.get("posts", [])
+    new_posts = split_new_posts(previous, posts)
+    if new_posts is None:
+        print("Posts anteriores alterados: análise completa.")
+        return None, None, None
+    base = previous if isinstance(previous, AnalysisArtifact) else None
+    if not new_posts and base is not None:
+        print("  Nenhum post novo")
+        return base, None, base
+    result, corpus = update_analysis(
+        previous,
+        new_posts,
+        posts=posts,
+        n_clusters=args.clusters,
+        workers=args.workers,
+        large_threshold=args.large_threshold,
+    )
+    info = result.get("incremental", {})
+    if not new_posts:
+        print("  Nenhum post novo")
+    elif info.get("refit"):
+        print(f"  {len(new_posts)} posts novos; clustering refeito ({info.get('refit_reason')})")
+    else:
+        print(f"  {len(new_posts)} posts novos atribuídos aos clusters existentes")
+    return result, corpus, base
+
+
 def main():
     parser = argparse.ArgumentParser(description="Análise NLP de um tópico já baixado")
     parser.add_argument("input", help="Caminho do JSON do thread (ex: data/thread_4992269.json)")
     parser.add_argument("-o", "--output-dir", default="data", help="Diretório de saída")
     parser.add_argument("--clusters", type=int, default=None, help="Número de clusters (omitir para sugestão automática)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=CLUSTER_WORKERS,
+        help="Threads da varredura de k do clustering (padrão: número de CPUs)",
+    )
+    parser.add_argument(
+        "--large-threshold",
+        type=int,
+        default=CLUSTER_LARGE_THRESHOLD,
+        help="Acima deste número de posts usa MiniBatchKMeans e silhouette amostrado",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("artifact", "json"),
+        default="artifact",
+        help="artifact: diretório binário com seções mapeadas sob demanda (padrão); json: arquivo único",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Atualiza a análise existente em -o com os posts novos do tópico, sem refazer tudo",
+    )
+    parser.add_argument("--cache-dir", default=ANALYSIS_CACHE_DIR, help="Diretório do cache de resultados")
+    parser.add_argument("--no-cache", action="store_true", help="Não ler nem gravar o cache de resultados")
+    parser.add_argument("--metrics-out", default=None, help="Grava tempo, CPU e memória por etapa neste JSON")
+    parser.add_argument("--profile", default=None, help="Grava um dump do cProfile da execução neste arquivo")
     args = parser.parse_args()
 
     path = Path(args.input)
     if not path.exists():
         raise SystemExit(f"Arquivo não encontrado: {path}")
 
-    with open(path, encoding="utf-8") as f:
-        thread_data = json.load(f)
+    metrics = Metrics("analysis", trace_memory=True) if args.metrics_out else None
+    with profiled(args.profile):
+        _analyze(path, args, metrics or Metrics.disabled())
+    if metrics is not None:
+        metrics.write_json(args.metrics_out)
+        metrics.close()
+        print(format_stages(metrics.to_dict()))
+        print(f"Métricas salvas: {args.metrics_out}")
+    if args.profile:
+        print(f"Profile salvo: {args.profile}")
+
+
+def _analyze(path: Path, args, metrics: Metrics) -> None:
+    with metrics.stage("load_input"):
+        with open(path, encoding="utf-8") as f:
+            thread_data = json.load(f)
 
-    result = run_analysis(thread_data, n_clusters=args.clusters)  # None = sugestão automática
-    thread_id = result["thread_id"]
+    thread_id = thread_data.get("thread_id", "unknown")
     out_dir = Path(args.output_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / f"analysis_{thread_id}.json"
+    artifact_path = out_dir / f"analysis_{thread_id}"
+    json_path = out_dir / f"analysis_{thread_id}.json"
+
+    result = None
+    corpus = None
+    cache = key = base = None
+    if args.incremental:
+        with metrics.stage("incremental"):
+            result, corpus, base = _update_existing(thread_data, artifact_path, json_path, args)
+    elif not args.no_cache:
+        from analysis.cache import AnalysisCache, analysis_key
+
+        with metrics.stage("cache_lookup"):
+            cache = AnalysisCache(args.cache_dir)
+            key = analysis_key(thread_data, args.clusters, args.large_threshold)
+            result = cache.get(key)
+        if result is not None:
+            print("Resultado encontrado no cache.")
+    if result is None:
+        with metrics.stage("tokenize"):
+            corpus = Corpus([p.get("body") or "" for p in thread_data.get("posts", [])])
+        result = run_analysis(
+            thread_data,
+            n_clusters=args.clusters,  # None = sugestão automática
+            corpus=corpus,
+            workers=args.workers,
+            large_threshold=args.large_threshold,
+            metrics=metrics,
+        )
+        if cache is not None:
+            with metrics.stage("cache_write"):
+                cache.put(key, result, corpus=corpus)
+
+    with metrics.stage("write"):
+        if args.format == "json":
+            out_path = json_path
+            if isinstance(result, AnalysisArtifact):
+                result = result.to_dict()
+            with open(out_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2, default=json_default)
+        elif cache is not None:
+            from analysis.cache import copy_entry
 
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+            out_path = copy_entry(cache, key, artifact_path)
+        elif result is base:
+            out_path = artifact_path  # sem posts novos: a análise salva já está atualizada
+        else:
+            out_path = write_artifact(result, artifact_path, corpus=corpus, base=base)
 
     print(f"Análise salva: {out_path}")
     print(f"  Palavras na nuvem: {len(result['word_cloud'])}")
-    print(f"  Clusters: {len(result['top_terms_per_cluster'])}")
+    print(f"  Clusters: {len(result['top_terms_per_cluster'])} ({result.get('cluster_mode', 'kmeans')})")
 
 
 if __name__ == "__main__":
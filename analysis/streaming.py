@@ -0,0 +1,353 @@
+"""
+Análise em streaming (out-of-core) sobre posts em JSONL, para corpora que não cabem
+em memória (ex.: vários tópicos mesclados). Os posts são lidos em blocos:
+
+  1ª passada: tokeniza, acumula df no espaço do HashingVectorizer (IDF do clustering),
+              df/tf por termo (em runs ordenadas gravadas em disco) e o tamanho dos posts
+  intercalação das runs: vocabulário e offsets do índice gravados direto no artefato;
+              um heap guarda os max_features termos da nuvem (maior tf)
+  2ª passada: MiniBatchKMeans.partial_fit por bloco; grava os posts; soma os TF-IDF dos
+              termos da nuvem; pares (termo, post) vão para runs ordenadas em disco,
+              intercaladas no final direto nos postings do índice
+  3ª passada: rótulos de cluster de cada post com o modelo final
+
+A memória não cresce com o vocabulário nem com o número de posts: fica limitada ao bloco,
+às runs em memória (run_terms termos, run_postings pares), aos max_features termos da nuvem,
+ao df hasheado (n_features) e aos centróides (n_clusters x n_features), mais um buffer de
+leitura por run na intercalação. Os termos principais de cada cluster são escolhidos entre
+os termos da nuvem. Saída: artefato analysis_<id>/ (ver analysis.artifact).
+
+Uso:
+  python -m analysis.streaming data/thread_4992269.posts.jsonl [outros.jsonl ...] --id merged
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import tempfile
+from collections import Counter
+from operator import itemgetter
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from analysis.artifact import StringTableWriter, begin_artifact, commit_artifact, save_strings
+from analysis.clustering import top_terms_from_centers
+from analysis.config import (
+    CLUSTER_SEED,
+    HASHING_N_FEATURES,
+    MAX_DF,
+    MAX_WORDS_CLOUD,
+    MIN_DF,
+    N_CLUSTERS_DEFAULT,
+    STREAM_CHUNK_SIZE,
+    STREAM_RUN_POSTINGS,
+    STREAM_RUN_TERMS,
+    TFIDF_MAX_FEATURES,
+)
+from analysis.corpus import df_limits
+from analysis.frequency import top_words_for_cloud
+from analysis.text_processing import get_stopwords, tokenize_batch
+
+
+def iter_jsonl_posts(paths: Iterable[str | Path]) -> Iterator[dict]:
+    """Posts de um ou mais arquivos JSONL (um post por linha), na ordem dos arquivos."""
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def iter_chunks(paths: list[Path], chunk_size: int) -> Iterator[list[dict]]:
+    chunk: list[dict] = []
+    for post in iter_jsonl_posts(paths):
+        chunk.append(post)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _identity(tokens: list[str]) -> list[str]:
+    return tokens
+
+
+def _term_counts(tokens: list[list[str]], term_ids: dict[str, int], n_terms: int) -> sparse.csr_matrix:
+    """Matriz de contagens (docs do bloco x termos de term_ids); os demais termos são ignorados."""
+    indptr = [0]
+    indices: list[int] = []
+    for doc in tokens:
+        indices.extend(term_ids[t] for t in doc if t in term_ids)
+        indptr.append(len(indices))
+    counts = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.int64), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+        shape=(len(tokens), n_terms),
+    )
+    counts.sum_duplicates()
+    return counts
+
+
+def _spill(run_dir: Path, rows: Iterable[tuple], runs: list[Path]) -> None:
+    """Grava uma run (linhas já ordenadas por termo, campos separados por tab) em run_dir."""
+    path = run_dir / f"run_{len(runs):05d}.tsv"
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines("\t".join(map(str, row)) + "\n" for row in rows)
+    runs.append(path)
+
+
+def _read_run(path: Path) -> Iterator[list[str]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            yield line.rstrip("\n").split("\t")
+
+
+def _merge_runs(runs: list[Path]) -> Iterator[list[str]]:
+    """Linhas de todas as runs em ordem de termo; empates na ordem das runs (estável)."""
+    return heapq.merge(*(_read_run(p) for p in runs), key=itemgetter(0))
+
+
+def _term_totals(runs: list[Path]) -> Iterator[tuple[str, int, int]]:
+    """(termo, df, tf) de cada termo, em ordem alfabética, somando as runs da 1ª passada."""
+    term, df, tf = None, 0, 0
+    for t, d, f in _merge_runs(runs):
+        if t != term:
+            if term is not None:
+                yield term, df, tf
+            term, df, tf = t, 0, 0
+        df += int(d)
+        tf += int(f)
+    if term is not None:
+        yield term, df, tf
+
+
+def stream_analysis(
+    paths: list[str | Path],
+    out_dir: str | Path,
+    *,
+    analysis_id: str = "stream",
+    title: Optional[str] = None,
+    n_clusters: int = N_CLUSTERS_DEFAULT,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    n_features: int = HASHING_N_FEATURES,
+    max_df: float = MAX_DF,
+    min_df: int = MIN_DF,
+    max_features: int = TFIDF_MAX_FEATURES,
+    run_terms: int = STREAM_RUN_TERMS,
+    run_postings: int = STREAM_RUN_POSTINGS,
+) -> Path:
+    """
+    Analisa os posts dos JSONL em `paths` sem carregá-los todos em memória e grava o
+    artefato em out_dir. Mesmos scores da nuvem que tfidf_scores; o clustering usa
+    TF-IDF sobre features hasheadas (n_features) e k fixo (n_clusters, sem varredura).
+    run_terms/run_postings: tamanho das runs em memória antes de irem para o disco.
+    Retorna o diretório do artefato.
+    """
+    paths = [Path(p) for p in paths]
+    stopwords = get_stopwords()
+    chunk_size = max(chunk_size, 3 * n_clusters)
+    hasher = HashingVectorizer(
+        analyzer=_identity, n_features=n_features, alternate_sign=False, norm=None
+    )
+
+    def _tokenize(chunk: list[dict]) -> list[list[str]]:
+        return tokenize_batch([p.get("body") or "" for p in chunk], stopwords=stopwords)
+
+    tmp = begin_artifact(out_dir)
+    with tempfile.TemporaryDirectory(prefix=".stream_runs_", dir=tmp.parent) as run_dir:
+        run_dir = Path(run_dir)
+
+        # 1ª passada: estatísticas; df/tf por termo em runs ordenadas
+        n_docs = 0
+        posts_bytes = 0
+        hashed_df = np.zeros(n_features, dtype=np.int64)
+        term_df: Counter = Counter()
+        term_tf: Counter = Counter()
+        term_runs: list[Path] = []
+        for chunk in iter_chunks(paths, chunk_size):
+            tokens = _tokenize(chunk)
+            hashed = hasher.transform(tokens)
+            hashed_df += np.bincount(hashed.indices, minlength=n_features)
+            for doc in tokens:
+                term_tf.update(doc)
+                term_df.update(set(doc))
+            posts_bytes += sum(len(json.dumps(p, ensure_ascii=False).encode("utf-8")) for p in chunk)
+            n_docs += len(chunk)
+            if len(term_tf) >= run_terms:
+                _spill(run_dir, ((t, term_df[t], term_tf[t]) for t in sorted(term_tf)), term_runs)
+                term_df.clear()
+                term_tf.clear()
+        if term_tf or not term_runs:
+            _spill(run_dir, ((t, term_df[t], term_tf[t]) for t in sorted(term_tf)), term_runs)
+        del term_df, term_tf
+        hashed_idf = np.log((1 + n_docs) / (1 + hashed_df)) + 1.0
+
+        # Intercalação: tamanho do vocabulário e termos da nuvem (max_features de maior tf,
+        # empate pelo primeiro em ordem alfabética, como select_terms)
+        try:
+            min_count, max_count = df_limits(n_docs, max_df, min_df)
+        except ValueError:
+            min_count, max_count = 1, 0  # nenhum termo passa
+        n_terms = words_bytes = 0
+        heap: list[tuple[int, int, str, int]] = []
+        for rank, (term, d, f) in enumerate(_term_totals(term_runs)):
+            n_terms += 1
+            words_bytes += len(term.encode("utf-8"))
+            if min_count <= d <= max_count:
+                item = (f, -rank, term, d)
+                if len(heap) < max_features:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        heap.sort(key=itemgetter(2))
+        score_terms = [t for _, _, t, _ in heap]
+        score_ids = {t: i for i, t in enumerate(score_terms)}
+        score_idf = np.log((1 + n_docs) / (1 + np.array([d for *_, d in heap], dtype=np.int64))) + 1.0
+        del heap
+        k = max(1, min(n_clusters, n_docs))
+
+        # Vocabulário e offsets do índice, direto nos arquivos do artefato
+        words_out = StringTableWriter(tmp, "word_to_posts.words", n_terms, words_bytes)
+        offsets = np.lib.format.open_memmap(
+            tmp / "word_to_posts.offsets.npy", mode="w+", dtype=np.int64, shape=(n_terms + 1,)
+        )
+        offsets[0] = 0
+        for j, (term, d, _) in enumerate(_term_totals(term_runs)):
+            words_out.append(term.encode("utf-8"))
+            offsets[j + 1] = offsets[j] + d
+        words_out.close()
+        n_postings = int(offsets[-1])
+        offsets.flush()
+        del offsets
+
+        posts_out = StringTableWriter(tmp, "posts", n_docs, posts_bytes)
+        score_sums = np.zeros(len(score_terms))
+        model = MiniBatchKMeans(n_clusters=k, random_state=CLUSTER_SEED, batch_size=chunk_size, n_init=3)
+
+        def _features(tokens: list[list[str]]) -> sparse.csr_matrix:
+            return normalize(hasher.transform(tokens) @ sparse.diags(hashed_idf), norm="l2")
+
+        # 2ª passada: partial_fit, posts, scores e runs de pares (termo, post)
+        first_doc = 0
+        pending: list[sparse.csr_matrix] = []  # só até o primeiro partial_fit ter >= k docs
+        pairs: list[tuple[str, int]] = []
+        pair_runs: list[Path] = []
+        for chunk in iter_chunks(paths, chunk_size):
+            tokens = _tokenize(chunk)
+            pending.append(_features(tokens))
+            if sum(m.shape[0] for m in pending) >= k:
+                model.partial_fit(sparse.vstack(pending, format="csr"))
+                pending = []
+            for p in chunk:
+                posts_out.append(json.dumps(p, ensure_ascii=False).encode("utf-8"))
+
+            for i, doc in enumerate(tokens, start=first_doc):
+                pairs.extend((t, i) for t in set(doc))
+            if len(pairs) >= run_postings:
+                pairs.sort(key=itemgetter(0))  # estável: posts em ordem crescente dentro do termo
+                _spill(run_dir, pairs, pair_runs)
+                pairs = []
+            if score_terms:
+                counts = _term_counts(tokens, score_ids, len(score_terms))
+                weighted = normalize(counts @ sparse.diags(score_idf), norm="l2")
+                score_sums += np.asarray(weighted.sum(axis=0)).ravel()
+            first_doc += len(chunk)
+        if pending:
+            model.partial_fit(sparse.vstack(pending, format="csr"))
+        if pairs:
+            pairs.sort(key=itemgetter(0))
+            _spill(run_dir, pairs, pair_runs)
+        del pairs
+        posts_out.close()
+
+        # Postings: runs intercaladas em ordem de termo = ordem do vocabulário (e dos offsets)
+        postings = np.lib.format.open_memmap(
+            tmp / "word_to_posts.postings.npy", mode="w+", dtype=np.int32, shape=(n_postings,)
+        )
+        block: list[int] = []
+        written = 0
+        for _, doc in _merge_runs(pair_runs):
+            block.append(int(doc))
+            if len(block) >= run_postings:
+                postings[written:written + len(block)] = block
+                written += len(block)
+                block = []
+        postings[written:written + len(block)] = block
+        postings.flush()
+        del postings
+
+    # 3ª passada: rótulos com o modelo final
+    labels = np.lib.format.open_memmap(tmp / "cluster_labels.npy", mode="w+", dtype=np.int32, shape=(n_docs,))
+    first_doc = 0
+    if n_docs:
+        for chunk in iter_chunks(paths, chunk_size):
+            labels[first_doc:first_doc + len(chunk)] = model.predict(_features(_tokenize(chunk)))
+            first_doc += len(chunk)
+    labels.flush()
+    del labels
+
+    save_strings(tmp, "word_scores.terms", score_terms)
+    np.save(tmp / "word_scores.scores.npy", score_sums)
+    word_scores = dict(zip(score_terms, score_sums.tolist()))
+
+    if n_docs and score_terms:
+        term_hash = hasher.transform([[t] for t in score_terms]).indices
+        top_terms = top_terms_from_centers(model.cluster_centers_[:, term_hash], score_terms)
+    else:
+        top_terms = [[] for _ in range(k)]
+
+    fields = {
+        "thread_id": analysis_id,
+        "title": title,
+        "total_posts": n_docs,
+        "word_cloud": [[w, float(s)] for w, s in top_words_for_cloud(word_scores, max_words=MAX_WORDS_CLOUD)],
+        "top_terms_per_cluster": top_terms,
+        "n_clusters_used": len(top_terms),
+        "cluster_mode": "streaming",
+        "suggested_k_silhouette": None,
+        "suggested_k_elbow": None,
+        "suggested_scores_silhouette": {},
+        "suggested_scores_elbow": {},
+        "sources": [str(p) for p in paths],
+    }
+    return commit_artifact(tmp, out_dir, fields, ["posts", "cluster_labels", "word_scores", "word_to_posts"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Análise em streaming de posts em JSONL (corpora grandes)")
+    parser.add_argument("inputs", nargs="+", help="Arquivos JSONL de posts (ex: data/thread_4992269.posts.jsonl)")
+    parser.add_argument("-o", "--output-dir", default="data", help="Diretório de saída")
+    parser.add_argument("--id", default=None, help="Identificador da análise (padrão: thread do primeiro arquivo)")
+    parser.add_argument("--title", default=None)
+    parser.add_argument("--clusters", type=int, default=N_CLUSTERS_DEFAULT, help="Número de clusters (fixo)")
+    parser.add_argument("--chunk-size", type=int, default=STREAM_CHUNK_SIZE, help="Posts por bloco")
+    parser.add_argument("--n-features", type=int, default=HASHING_N_FEATURES, help="Dimensão do HashingVectorizer")
+    args = parser.parse_args()
+
+    paths = [Path(p) for p in args.inputs]
+    missing = [p for p in paths if not p.exists()]
+    if missing:
+        raise SystemExit(f"Arquivo não encontrado: {missing[0]}")
+    analysis_id = args.id or paths[0].name.split(".")[0].replace("thread_", "")
+    out_path = stream_analysis(
+        paths,
+        Path(args.output_dir) / f"analysis_{analysis_id}",
+        analysis_id=analysis_id,
+        title=args.title,
+        n_clusters=args.clusters,
+        chunk_size=args.chunk_size,
+        n_features=args.n_features,
+    )
+    print(f"Análise salva: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
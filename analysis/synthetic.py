@@ -0,0 +1,132 @@
+"""
+Posts sintéticos (feedback em inglês/português, com pontuação, acentos, maiúsculas,
+números e links) para benchmarks da análise sem dados reais.
+
+O gerador é determinístico (seed) e controlável por SyntheticConfig: tamanho do
+vocabulário (palavras reais do jogo + pseudo-palavras), distribuição do tamanho dos
+posts (lognormal), mistura de temas (cada post tem um tema dominante, sorteado pelos
+pesos dos temas; parte das palavras de conteúdo vem de outros temas) e fração de posts
+em português.
+"""
+import random
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Optional
+
+from scraper.synthetic import WORDS
+
+FILLER_EN = "the and is it this that to of for with not but you we they".split()
+FILLER_PT = "de que não para com uma os as muito mais isso está".split()
+
+PUNCTUATION = (".", ",", "!", "?", "...", ":", ";", " -", "!!", "?!")
+EXTRAS = ("100k", "lvl 500", "2x", "10%", ":)", "xD", "https://www.tibia.com/news", "@CipSoft", "#monk", "(edit)")
+
+_ONSETS = ("b", "c", "d", "f", "g", "k", "l", "m", "n", "p", "r", "s", "t", "v", "x", "z", "br", "ch", "tr", "qu")
+_VOWELS = ("a", "e", "i", "o", "u", "ã", "é", "ó")
+
+
+@dataclass
+class SyntheticConfig:
+    """Parâmetros do corpus sintético."""
+    vocab_size: int = 2000  # palavras de conteúdo distintas (as do jogo + pseudo-palavras)
+    n_topics: int = 8
+    topic_weights: Optional[tuple[float, ...]] = None  # None: peso 1/(t+1) (temas de tamanhos desiguais)
+    topic_purity: float = 0.75  # fração das palavras de conteúdo vindas do tema dominante
+    zipf_s: float = 1.1  # expoente de Zipf das palavras dentro de cada tema
+    filler_fraction: float = 0.45  # fração de palavras funcionais (stopwords)
+    extra_fraction: float = 0.03  # números, links, emoticons, menções
+    upper_fraction: float = 0.05
+    pt_fraction: float = 0.4  # posts com palavras funcionais em português
+    sentences_mu: float = 1.0  # log da mediana de frases por post
+    sentences_sigma: float = 0.6
+    words_mu: float = 2.0  # log da mediana de palavras por frase
+    words_sigma: float = 0.5
+    paragraph_prob: float = 0.2
+
+
+def _pseudo_words(n: int, rng: random.Random, taken: set[str]) -> list[str]:
+    words = []
+    while len(words) < n:
+        w = "".join(rng.choice(_ONSETS) + rng.choice(_VOWELS) for _ in range(rng.randint(2, 4)))
+        if w not in taken:
+            taken.add(w)
+            words.append(w)
+    return words
+
+
+class _Vocabulary:
+    """Palavras de cada tema com pesos de Zipf (cumulativos, para random.choices)."""
+
+    def __init__(self, config: SyntheticConfig, rng: random.Random):
+        n_topics = max(1, config.n_topics)
+        base = WORDS[: config.vocab_size]
+        words = base + _pseudo_words(max(0, config.vocab_size - len(base)), rng, set(base))
+        self.topics = [words[t::n_topics] or base for t in range(n_topics)]
+        self.cum_weights = [
+            list(accumulate(1.0 / (i + 1) ** config.zipf_s for i in range(len(ws)))) for ws in self.topics
+        ]
+        weights = config.topic_weights or tuple(1.0 / (t + 1) for t in range(n_topics))
+        self.topic_cum = list(accumulate(weights[:n_topics]))
+
+    def word(self, rng: random.Random, topic: int) -> str:
+        return rng.choices(self.topics[topic], cum_weights=self.cum_weights[topic])[0]
+
+
+class PostGenerator:
+    """Gera corpos de posts com um SyntheticConfig; cada post tem um tema dominante."""
+
+    def __init__(self, config: Optional[SyntheticConfig] = None, seed: int = 0):
+        self.config = config or SyntheticConfig()
+        self.rng = random.Random(seed)
+        self.vocab = _Vocabulary(self.config, random.Random(seed + 1))
+
+    def _sentence(self, topic: int, filler: list[str]) -> str:
+        cfg, rng = self.config, self.rng
+        words = []
+        for _ in range(max(2, int(rng.lognormvariate(cfg.words_mu, cfg.words_sigma)))):
+            r = rng.random()
+            if r < cfg.extra_fraction:
+                word = rng.choice(EXTRAS)
+            elif r < cfg.extra_fraction + cfg.filler_fraction:
+                word = rng.choice(filler)
+            else:
+                t = topic if rng.random() < cfg.topic_purity else rng.randrange(len(self.vocab.topics))
+                word = self.vocab.word(rng, t)
+            if rng.random() < cfg.upper_fraction:
+                word = word.upper()
+            words.append(word)
+        words[0] = words[0].capitalize()
+        return " ".join(words) + rng.choice(PUNCTUATION)
+
+    def body(self) -> tuple[str, int]:
+        """(corpo do post, tema dominante)."""
+        cfg, rng = self.config, self.rng
+        topic = rng.choices(range(len(self.vocab.topic_cum)), cum_weights=self.vocab.topic_cum)[0]
+        filler = FILLER_PT if rng.random() < cfg.pt_fraction else FILLER_EN
+        n_sentences = max(1, int(rng.lognormvariate(cfg.sentences_mu, cfg.sentences_sigma)))
+        sentences = [self._sentence(topic, filler) for _ in range(n_sentences)]
+        sep = "\n\n" if rng.random() < cfg.paragraph_prob else " "
+        return sep.join(sentences), topic
+
+
+def generate_posts(n: int, seed: int = 0, config: Optional[SyntheticConfig] = None) -> list[dict]:
+    """n posts determinísticos (post_id, author, date, body)."""
+    gen = PostGenerator(config, seed)
+    rng = gen.rng
+    posts = []
+    for i in range(n):
+        body, _ = gen.body()
+        posts.append({
+            "post_id": str(40_000_000 + i),
+            "author": f"Player {rng.randint(1, max(1, n // 5))}",
+            "date": f"{rng.randint(1, 28):02d}.01.2026 {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00",
+            "body": body,
+        })
+    return posts
+
+
+def generate_texts(n: int, seed: int = 0, config: Optional[SyntheticConfig] = None) -> list[str]:
+    """Só os corpos dos posts (mais rápido para benchmarks de texto)."""
+    gen = PostGenerator(config, seed)
+    return [gen.body()[0] for _ in range(n)]
+
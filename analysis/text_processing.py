@@ -2,9 +2,21 @@
 Normalização, tokenização e remoção de stopwords.
 """
 import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from pathlib import Path
 from typing import Optional
 
-from analysis.config import STOPWORDS_LANGUAGES, MIN_TOKEN_LENGTH, NLTK_DATA
+from analysis.config import (
+    MIN_TOKEN_LENGTH,
+    NLTK_DATA,
+    STOPWORDS_LANGUAGES,
+    TOKENIZE_CHUNK_SIZE,
+    USE_NLTK_STOPWORDS,
+)
+
+STOPWORDS_DIR = Path(__file__).resolve().parent / "data"
 
 
 def _ensure_nltk_data():
@@ -22,12 +34,11 @@ def _ensure_nltk_data():
         nltk.download("punkt", quiet=True)
 
 
-def get_stopwords() -> set[str]:
-    """Retorna conjunto unificado de stopwords em inglês e português."""
+def _nltk_stopwords(languages: tuple[str, ...]) -> set[str]:
     import nltk
     _ensure_nltk_data()
     stop = set()
-    for lang in STOPWORDS_LANGUAGES:
+    for lang in languages:
         try:
             stop.update(nltk.corpus.stopwords.words(lang))
         except OSError:
@@ -35,22 +46,59 @@ def get_stopwords() -> set[str]:
     return stop
 
 
+def _bundled_stopwords(languages: tuple[str, ...]) -> set[str]:
+    """Lê as listas embutidas (uma palavra por linha) em analysis/data/."""
+    stop = set()
+    for lang in languages:
+        path = STOPWORDS_DIR / f"stopwords_{lang}.txt"
+        if path.exists():
+            stop.update(w for w in path.read_text(encoding="utf-8").split() if w)
+    return stop
+
+
+@lru_cache(maxsize=None)
+def get_stopwords(use_nltk: bool = USE_NLTK_STOPWORDS) -> frozenset[str]:
+    """
+    Retorna conjunto unificado (imutável) de stopwords em inglês e português.
+    Carregado uma vez por processo; o NLTK só é importado com use_nltk=True
+    (ou ANALYSIS_NLTK_STOPWORDS=1).
+    """
+    if use_nltk:
+        return frozenset(_nltk_stopwords(STOPWORDS_LANGUAGES))
+    return frozenset(_bundled_stopwords(STOPWORDS_LANGUAGES))
+
+
+_NON_WORD = re.compile(r"[^\w\s]")
+
+
+@lru_cache(maxsize=None)
+def _token_pattern(min_length: int) -> re.Pattern:
+    """
+    Tokens = sequências maximais de \w com pelo menos min_length caracteres. Equivale a
+    normalize_text (troca o que não é \w nem espaço por espaço) + split + filtro de tamanho.
+    """
+    return re.compile(rf"\w{{{max(min_length, 1)},}}")
+
+
 def normalize_text(text: str) -> str:
     """Lowercase e remove caracteres que não são letras (mantém espaços)."""
     if not text:
         return ""
-    text = text.lower().strip()
-    # Manter apenas letras unicode e espaços
-    text = re.sub(r"[^\w\s]", " ", text, flags=re.UNICODE)
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    # Manter apenas letras unicode e espaços; " ".join(split()) colapsa os espaços
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def normalize_batch(texts: list[str]) -> list[str]:
+    """normalize_text para uma lista de documentos."""
+    sub, out = _NON_WORD.sub, []
+    for text in texts:
+        out.append(" ".join(sub(" ", text.lower()).split()) if text else "")
+    return out
 
 
 def tokenize(text: str, min_length: int = MIN_TOKEN_LENGTH) -> list[str]:
     """Tokenização simples por espaços, após normalização; filtra por tamanho mínimo."""
-    normalized = normalize_text(text)
-    tokens = normalized.split()
-    return [t for t in tokens if len(t) >= min_length]
+    return _token_pattern(min_length).findall(text.lower()) if text else []
 
 
 def tokenize_without_stopwords(
@@ -65,11 +113,42 @@ def tokenize_without_stopwords(
     return [t for t in tokens if t not in stopwords]
 
 
+def _tokenize_chunk(texts: list[str], stopwords: frozenset[str], min_length: int) -> list[list[str]]:
+    findall = _token_pattern(min_length).findall
+    return [[t for t in findall(text.lower()) if t not in stopwords] if text else [] for text in texts]
+
+
+def tokenize_batch(
+    texts: list[str],
+    stopwords: Optional[set[str]] = None,
+    min_length: int = MIN_TOKEN_LENGTH,
+    *,
+    workers: int = 1,
+    chunk_size: int = TOKENIZE_CHUNK_SIZE,
+) -> list[list[str]]:
+    """
+    Tokeniza (sem stopwords) uma lista de documentos de uma vez: mesmo resultado que
+    tokenize_without_stopwords em cada texto, com o padrão compilado e o filtro de
+    stopwords num único laço. workers > 1: blocos de chunk_size textos num pool de processos.
+    """
+    if stopwords is None:
+        stopwords = get_stopwords()
+    stopwords = frozenset(stopwords)
+    if workers <= 1 or len(texts) <= chunk_size:
+        return _tokenize_chunk(texts, stopwords, min_length)
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    out: list[list[str]] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for tokens in pool.map(
+            _tokenize_chunk, chunks, repeat(stopwords, len(chunks)), repeat(min_length, len(chunks))
+        ):
+            out.extend(tokens)
+    return out
+
+
 def process_corpus(texts: list[str], stopwords: Optional[set[str]] = None) -> list[list[str]]:
     """
     Processa uma lista de documentos (ex.: corpo de cada post).
     Retorna lista de listas de tokens (sem stopwords) por documento.
     """
-    if stopwords is None:
-        stopwords = get_stopwords()
-    return [tokenize_without_stopwords(t, stopwords=stopwords) for t in texts]
+    return tokenize_batch(texts, stopwords=stopwords)
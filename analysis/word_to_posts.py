@@ -1,37 +1,146 @@
 """
-Índice palavra -> lista de posts (para filtrar comentários ao clicar na nuvem).
+Índice palavra -> posts (para filtrar comentários ao clicar na nuvem).
+Armazenado como listas de postings: para cada palavra, os índices (ordenados) dos
+posts em `posts` que a contêm. O conteúdo dos posts é resolvido sob demanda.
 """
-from typing import Optional
+from functools import cached_property
+from typing import Iterator, Optional, Sequence
 
-from analysis.text_processing import get_stopwords, tokenize_without_stopwords
+import numpy as np
+
+from analysis.corpus import Corpus
+
+# Marcador gravado na análise (campo word_index_format) para o formato de word_to_posts
+WORD_INDEX_FORMAT = "postings"
+EXCERPT_LENGTH = 300
+
+
+class PostingIndex:
+    """
+    Listas de postings em arrays contíguos:
+    - words: palavras em ordem alfabética
+    - offsets: int64 (len(words) + 1); postings de words[j] = postings[offsets[j]:offsets[j + 1]]
+    - postings: int32, índices dos posts (ordenados dentro de cada palavra)
+    """
+
+    def __init__(self, words: Sequence[str], offsets: np.ndarray, postings: np.ndarray):
+        self.words = list(words)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.postings = np.asarray(postings, dtype=np.int32)
+
+    @cached_property
+    def _position(self) -> dict[str, int]:
+        return {w: j for j, w in enumerate(self.words)}
+
+    @classmethod
+    def from_corpus(cls, corpus: Corpus) -> "PostingIndex":
+        return cls.from_counts(corpus.counts, corpus.vocab)
+
+    @classmethod
+    def from_counts(cls, counts, vocab: Sequence[str], doc_offset: int = 0) -> "PostingIndex":
+        """Índice de uma matriz doc-termo; doc_offset é somado aos índices (linha 0 = post doc_offset)."""
+        csc = counts.tocsc()
+        csc.sort_indices()
+        present = np.diff(csc.indptr) > 0
+        words = np.asarray(vocab, dtype=object)[present]
+        offsets = np.concatenate(([0], np.cumsum(np.diff(csc.indptr)[present])))
+        return cls(words, offsets, csc.indices + doc_offset)
+
+    def extend(self, other: "PostingIndex") -> "PostingIndex":
+        """
+        Índice com os postings de `other` acrescentados aos de cada palavra.
+        Os índices de `other` devem ser maiores que os deste índice (posts novos no final).
+        Os dois arrays de postings são copiados em bloco para as novas posições (sem laço por palavra).
+        """
+        old_words = np.asarray(self.words, dtype=object)
+        new_words = np.asarray(other.words, dtype=object)
+        words = np.union1d(old_words, new_words) if len(old_words) or len(new_words) else old_words
+        old_pos = np.searchsorted(words, old_words)
+        new_pos = np.searchsorted(words, new_words)
+        old_lengths = np.zeros(len(words), dtype=np.int64)
+        old_lengths[old_pos] = np.diff(self.offsets)
+        lengths = old_lengths.copy()
+        lengths[new_pos] += np.diff(other.offsets)
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        postings = np.empty(int(offsets[-1]), dtype=np.int32)
+        # Postings antigos no início do bloco de cada palavra, novos logo depois
+        postings[_moved(self.offsets, offsets[old_pos])] = self.postings
+        postings[_moved(other.offsets, offsets[new_pos] + old_lengths[new_pos])] = other.postings
+        return PostingIndex(words, offsets, postings)
+
+    @classmethod
+    def from_dict(cls, index: dict[str, Sequence[int]]) -> "PostingIndex":
+        """Reconstrói a partir de {palavra: [índices]} (formato serializado)."""
+        words = sorted(index)
+        lengths = np.fromiter((len(index[w]) for w in words), dtype=np.int64, count=len(words))
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        postings = np.fromiter(
+            (i for w in words for i in index[w]), dtype=np.int32, count=int(offsets[-1])
+        )
+        return cls(words, offsets, postings)
+
+    def get(self, word: str, default=None) -> np.ndarray:
+        """Índices dos posts que contêm `word` (default, ou array vazio, se a palavra não está no índice)."""
+        j = self._position.get(word)
+        if j is None:
+            return self.postings[:0] if default is None else default
+        return self.postings[self.offsets[j]:self.offsets[j + 1]]
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._position
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.words)
+
+    def items(self) -> Iterator[tuple[str, np.ndarray]]:
+        for j, word in enumerate(self.words):
+            yield word, self.postings[self.offsets[j]:self.offsets[j + 1]]
+
+    def to_dict(self) -> dict[str, list[int]]:
+        """Formato serializável em JSON: {palavra: [índices dos posts]}."""
+        return {word: ids.tolist() for word, ids in self.items()}
+
+
+def _moved(offsets: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Posição de destino de cada posting quando o bloco j (offsets[j]:offsets[j + 1]) passa a começar em starts[j]."""
+    return np.arange(int(offsets[-1])) + np.repeat(starts - offsets[:-1], np.diff(offsets))
 
 
 def build_word_to_posts_index(
     posts: list[dict],
     stopwords: Optional[set[str]] = None,
-) -> dict[str, list[dict]]:
+    corpus: Optional[Corpus] = None,
+) -> PostingIndex:
+    """
+    Constrói índice: para cada palavra (token sem stopword), índices dos posts que a contêm.
+    corpus: Corpus já construído sobre os posts (evita tokenizar de novo).
+    """
+    if corpus is None:
+        corpus = Corpus.from_posts(posts, stopwords=stopwords)
+    return PostingIndex.from_corpus(corpus)
+
+
+def post_entry(posts: list[dict], i: int) -> dict:
+    """Dict exibido para o post i: post_index, post_id, author, date, body, excerpt."""
+    post = posts[i]
+    body = post.get("body") or ""
+    excerpt = (body[:EXCERPT_LENGTH] + "…") if len(body) > EXCERPT_LENGTH else body
+    return {
+        "post_index": i,
+        "post_id": post.get("post_id"),
+        "author": post.get("author", ""),
+        "date": post.get("date", ""),
+        "body": body,
+        "excerpt": excerpt,
+    }
+
+
+def resolve_word_posts(posts: list[dict], postings: Sequence) -> list[dict]:
     """
-    Constrói índice: para cada palavra (token sem stopword), lista de posts que a contêm.
-    Cada item da lista é um dict com keys: post_index, author, date, body (e opcionalmente excerpt).
+    Resolve uma lista de postings (índices em `posts`) para os dicts de post_entry.
+    Aceita também o formato antigo (lista de dicts já resolvidos), devolvido como está.
     """
-    if stopwords is None:
-        stopwords = get_stopwords()
-    index: dict[str, list[dict]] = {}
-    for i, post in enumerate(posts):
-        body = post.get("body") or ""
-        tokens = set(tokenize_without_stopwords(body, stopwords=stopwords))
-        excerpt = (body[:300] + "…") if len(body) > 300 else body
-        entry = {
-            "post_index": i,
-            "post_id": post.get("post_id"),
-            "author": post.get("author", ""),
-            "date": post.get("date", ""),
-            "body": body,
-            "excerpt": excerpt,
-        }
-        for word in tokens:
-            word_lower = word.lower()
-            if word_lower not in index:
-                index[word_lower] = []
-            index[word_lower].append(entry)
-    return index
+    return [p if isinstance(p, dict) else post_entry(posts, int(p)) for p in postings]
@@ -21,25 +21,71 @@ from wordcloud import WordCloud
 DATA_DIR = ROOT / "data"
 
 
-def load_analysis(path: Path) -> dict | None:
-    """Carrega JSON de análise."""
-    if not path.exists():
-        return None
-    with open(path, encoding="utf-8") as f:
-        return json.load(f)
+@st.cache_resource
+def get_catalog():
+    """Catálogo das análises em data/ (um por processo, compartilhado entre sessões e reruns)."""
+    from analysis.catalog import AnalysisCatalog
+    return AnalysisCatalog(DATA_DIR)
+
+
+def analyze(thread_data: dict, metrics=None):
+    """
+    Análise (com cache) registrando tempo e memória por etapa; o registro fica em
+    session_state["analysis_metrics"] para show_metrics.
+    """
+    from analysis.cache import cached_run_analysis
+    from instrumentation.metrics import Metrics
+
+    metrics = metrics or Metrics("analysis")
+    result, from_cache = cached_run_analysis(thread_data, metrics=metrics)
+    record = metrics.to_dict()
+    record["from_cache"] = from_cache
+    st.session_state["analysis_metrics"] = record
+    return result
+
+
+def show_metrics() -> None:
+    """Tempo, CPU e memória por etapa da última análise feita nesta sessão."""
+    record = st.session_state.get("analysis_metrics")
+    if not record:
+        return
+    with st.expander(f"Tempo por etapa da última análise ({record['wall_s']:.2f} s)"):
+        if record.get("from_cache"):
+            st.caption("Resultado reaproveitado do cache (posts e parâmetros iguais).")
+        df = pd.DataFrame([
+            {
+                "Etapa": s["stage"],
+                "Chamadas": s["calls"],
+                "Tempo (s)": s["wall_s"],
+                "CPU (s)": s["cpu_s"],
+                "RSS início (MB)": s.get("rss_start_mb"),
+                "+pico RSS (MB)": s.get("rss_peak_delta_mb"),
+                "Pico RSS do processo (MB)": s.get("process_rss_peak_mb"),
+            }
+            for s in record["stages"]
+        ])
+        st.dataframe(df, use_container_width=True, hide_index=True)
+        if record["counters"]:
+            st.caption(", ".join(f"{k}: {v}" for k, v in record["counters"].items()))
 
 
 def scrape_and_analyze(url: str) -> dict | None:
     """Executa scraping do tópico e análise NLP. Retorna dict de análise ou None em caso de erro."""
     try:
-        from scraper.pagination import scrape_thread
-        from analysis.run import run_analysis
+        from scraper.pagination import make_client, scrape_thread
+        from instrumentation.metrics import Metrics
     except ImportError as e:
         st.error(f"Erro ao importar módulos: {e}. Execute a partir da raiz do projeto.")
         return None
+    metrics = Metrics("scrape+analysis")
     try:
-        with st.spinner("Baixando páginas do fórum…"):
-            thread_data = scrape_thread(url, delay=1.2, max_pages=None)
+        with st.spinner("Baixando páginas do fórum…"), make_client(delay=1.2, concurrency=2, adaptive=True) as client:
+            thread_data = scrape_thread(url, max_pages=None, concurrency=2, client=client, metrics=metrics)
+            report = client.limiter.report()
+        st.caption(
+            f"Download: {report['throughput']:.2f} páginas/s efetivas "
+            f"(taxa final {report['rate']:.2f} req/s, {report['throttled']} respostas 429/503)."
+        )
     except requests.HTTPError as e:
         code = e.response.status_code if e.response is not None else "?"
         st.error(
@@ -56,7 +102,7 @@ def scrape_and_analyze(url: str) -> dict | None:
         return None
     try:
         with st.spinner("Analisando textos (TF-IDF e clusters)…"):
-            result = run_analysis(thread_data)
+            result = analyze(thread_data, metrics)
     except Exception as e:
         st.error(f"Erro durante a análise: {e}")
         return None
@@ -119,8 +165,7 @@ def main():
                         st.rerun()
                     elif "posts" in data and "thread_id" in data:
                         with st.spinner("Analisando textos…"):
-                            from analysis.run import run_analysis
-                            result = run_analysis(data)
+                            result = analyze(data)
                         st.session_state["analysis_result"] = result
                         st.session_state["analysis_thread_id"] = result.get("thread_id")
                         st.success(f"Tópico analisado: {len(result.get('posts', []))} posts.")
@@ -146,8 +191,7 @@ def main():
                 elif "posts" in data and "thread_id" in data:
                     # É thread bruto: rodar análise
                     with st.spinner("Analisando textos…"):
-                        from analysis.run import run_analysis
-                        result = run_analysis(data)
+                        result = analyze(data)
                     st.session_state["analysis_result"] = result
                     st.session_state["analysis_thread_id"] = result.get("thread_id")
                     st.success(f"Tópico analisado: {len(result.get('posts', []))} posts.")
@@ -157,41 +201,35 @@ def main():
             except json.JSONDecodeError as e:
                 st.error(f"Arquivo JSON inválido: {e}")
 
+    show_metrics()
+
     # Fonte dos dados: análise em memória ou arquivos em data/
     data = st.session_state["analysis_result"]
-    data_dir = DATA_DIR
-    data_dir.mkdir(parents=True, exist_ok=True)
-    analysis_files = list(data_dir.glob("analysis_*.json"))
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    # Catálogo (id, título, nº de posts): só glob + stat a cada rerun; só a análise escolhida é carregada
+    catalog = get_catalog()
+    entries = {e.id: e for e in catalog.refresh()}
     reanalyzed_tid = st.session_state.get("reanalyzed_thread_id")
-    options = {}
-    if data:
-        options["_current"] = data  # análise feita pela URL
-    for f in sorted(analysis_files, key=lambda p: p.name):
-        tid = f.stem.replace("analysis_", "")
-        loaded = load_analysis(f)
-        if loaded and reanalyzed_tid is not None and loaded.get("thread_id") == reanalyzed_tid:
-            loaded = st.session_state.get("analysis_result") or loaded
-        options[tid] = loaded
-    # Remover entradas None (arquivo não carregado)
-    options = {k: v for k, v in options.items() if v is not None}
+    options = ["_current"] if data else []  # análise feita pela URL
+    options += list(entries)
 
     if not options:
         st.info("Use **Baixar e analisar** com a URL do tópico ou, se o site bloquear, abra **Gerar JSON no navegador** e siga os passos (sem instalar nada no PC).")
         st.stop()
 
     # Seletor de análise (se mais de uma, mostrar no sidebar)
-    if len(options) == 1 and "_current" in options:
-        data = options["_current"]
-    else:
-        choice_labels = {"_current": "Último analisado (URL)"}
-        choice_labels.update({tid: f"Thread {tid}" for tid in options if tid != "_current"})
+    if options != ["_current"]:
         selected_id = st.sidebar.selectbox(
             "Tópico (thread)",
-            options=list(options.keys()),
-            format_func=lambda x: choice_labels.get(x, f"Thread {x}"),
+            options=options,
+            format_func=lambda x: "Último analisado (URL)" if x == "_current" else entries[x].label(),
             key="selected_analysis_id",
         )
-        data = options[selected_id]
+        # Tópico reclusterizado nesta sessão: mostra a versão em memória
+        entry = entries.get(selected_id)
+        reanalyzed = bool(data) and entry is not None and reanalyzed_tid is not None and entry.thread_id == str(reanalyzed_tid)
+        if selected_id != "_current" and not reanalyzed:
+            data = catalog.load(selected_id)
 
     if not data:
         st.error("Erro ao carregar os dados.")
@@ -269,7 +307,9 @@ def main():
     selected_word = st.session_state.get("selected_word")
 
     if selected_word:
-        entries = word_to_posts.get(selected_word.lower(), [])
+        from analysis.word_to_posts import resolve_word_posts
+        # word_to_posts guarda índices em posts (análises antigas: dicts completos)
+        entries = resolve_word_posts(posts, word_to_posts.get(selected_word.lower(), []))
         if not entries:
             st.info(f"Nenhum comentário encontrado com a palavra \"{selected_word}\".")
         else:
@@ -328,6 +368,8 @@ def main():
         st.caption(f"**Elbow** sugere: **{suggested_elbow}** clusters.")
     if suggested_silhouette is None and suggested_elbow is None and top_terms_per_cluster:
         st.caption("Sugestões não disponíveis (análise antiga).")
+    if data.get("cluster_mode") == "minibatch":
+        st.caption("Corpus grande: MiniBatchKMeans e silhouette estimado em amostra.")
 
     n_clusters_input = st.number_input(
         "Número de clusters a usar:",
@@ -337,14 +379,15 @@ def main():
         key="n_clusters_input",
     )
     if st.button("Reanalisar com N clusters", key="btn_reanalyze_clusters"):
-        thread_data = {
-            "posts": data["posts"],
-            "thread_id": data.get("thread_id"),
-            "title": data.get("title"),
-        }
+        # Só os clusters mudam: reaproveita a matriz doc-termo e a varredura de k
         with st.spinner("Reanalisando clusters…"):
-            from analysis.run import run_analysis
-            new_result = run_analysis(thread_data, n_clusters=n_clusters_input)
+            from analysis.cache import cached_recluster
+            from instrumentation.metrics import Metrics
+            metrics = Metrics("recluster")
+            with metrics.stage("recluster"):
+                new_result = cached_recluster(data, int(n_clusters_input))
+            metrics.count("n_clusters", new_result["n_clusters_used"])
+            st.session_state["analysis_metrics"] = metrics.to_dict()
         st.session_state["analysis_result"] = new_result
         st.session_state["reanalyzed_thread_id"] = new_result.get("thread_id")
         if "selected_analysis_id" in st.session_state:
@@ -358,7 +401,7 @@ def main():
             st.sidebar.caption(f"Tema {i+1}: {', '.join(terms[:8])}")
 
     st.subheader("Temas (clusters) – copiar para IA")
-    if top_terms_per_cluster and cluster_labels and len(cluster_labels) == len(posts):
+    if top_terms_per_cluster and len(cluster_labels) and len(cluster_labels) == len(posts):
         from analysis.utils import split_texts_into_batches
         for c in range(len(top_terms_per_cluster)):
             terms = top_terms_per_cluster[c]
@@ -0,0 +1 @@
+# Instrumentação: tempo, CPU e memória por etapa dos pipelines
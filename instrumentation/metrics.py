@@ -0,0 +1,229 @@
+"""
+Métricas por etapa dos pipelines (scraping e análise): tempo de parede, tempo de CPU,
+RSS no início da etapa, quanto a etapa elevou o pico de RSS do processo e pico de
+memória alocada pelo Python (tracemalloc), mais contadores (páginas, posts,
+vocabulário, nnz). Saída como registro JSON (--metrics-out) e,
+opcionalmente, dump do cProfile (--profile).
+
+  metrics = Metrics("analysis", trace_memory=True)
+  with metrics.stage("tfidf"):
+      ...
+  metrics.count("vocabulary_size", len(vocab))
+  metrics.write_json("metrics.json")
+
+Uma etapa repetida (ex.: "fetch", uma vez por página) acumula tempo e chamadas. Etapas
+executadas em threads somam o tempo de cada chamada (o total pode passar do tempo de
+parede do pipeline); o CPU é o do processo inteiro durante a etapa. O pico de RSS
+(ru_maxrss) é do processo inteiro e nunca diminui: por etapa só faz sentido o quanto
+ela o elevou (rss_peak_delta_mb; 0 se a etapa ficou abaixo de um pico anterior), e
+process_rss_peak_mb é o pico do processo ao fim da etapa. tracemalloc só é medido nas
+etapas da thread que criou o Metrics.
+"""
+from __future__ import annotations
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MB = 1024 * 1024
+
+
+def current_rss_mb() -> Optional[float]:
+    """RSS atual do processo (/proc/self/statm); None fora do Linux."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(pages * os.sysconf("SC_PAGE_SIZE") / MB, 1)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de RSS do processo até agora (ru_maxrss: KB no Linux, bytes no macOS); None no Windows."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / MB if sys.platform == "darwin" else peak / 1024, 1)
+
+
+class Metrics:
+    """Registro de etapas e contadores de uma execução. enabled=False: tudo vira no-op."""
+
+    def __init__(self, name: str = "run", *, trace_memory: bool = False, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self.trace_memory = trace_memory and enabled
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.stages: dict[str, dict] = {}
+        self.counters: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._owner = threading.get_ident()
+        self._open: list[dict] = []  # etapas abertas na thread dona (para o pico do tracemalloc)
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self._started_tracing = False
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    @classmethod
+    def disabled(cls) -> "Metrics":
+        return cls(enabled=False)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        traced = self.trace_memory and threading.get_ident() == self._owner
+        if traced:
+            current, peak = tracemalloc.get_traced_memory()
+            for parent in self._open:  # reset_peak abaixo apagaria o pico dos pais
+                parent["peak"] = max(parent["peak"], peak)
+            tracemalloc.reset_peak()
+            frame = {"start": current, "peak": current}
+            self._open.append(frame)
+        rss0, peak0 = current_rss_mb(), peak_rss_mb()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall0
+            cpu = time.process_time() - cpu0
+            py_peak = None
+            if traced:
+                self._open.pop()
+                _, peak = tracemalloc.get_traced_memory()
+                frame["peak"] = max(frame["peak"], peak)
+                for parent in self._open:
+                    parent["peak"] = max(parent["peak"], frame["peak"])
+                py_peak = (frame["peak"] - frame["start"]) / MB
+            self._record(name, wall, cpu, py_peak, rss0, peak0)
+
+    def _record(
+        self,
+        name: str,
+        wall: float,
+        cpu: float,
+        py_peak: Optional[float],
+        rss_start: Optional[float],
+        peak_start: Optional[float],
+    ) -> None:
+        peak = peak_rss_mb()
+        with self._lock:
+            rec = self.stages.setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0})
+            rec["calls"] += 1
+            rec["wall_s"] += wall
+            rec["cpu_s"] += cpu
+            rec.setdefault("rss_start_mb", rss_start)  # na primeira chamada
+            if peak is not None and peak_start is not None:
+                rec["rss_peak_delta_mb"] = round(rec.get("rss_peak_delta_mb", 0.0) + peak - peak_start, 1)
+            rec["process_rss_peak_mb"] = peak
+            if py_peak is not None:
+                rec["py_peak_mb"] = round(max(rec.get("py_peak_mb", 0.0), py_peak), 2)
+
+    def timed(self, name: str, fn: Callable) -> Callable:
+        """fn com cada chamada registrada na etapa `name` (ex.: fetch de cada página)."""
+        if not self.enabled:
+            return fn
+
+        def _wrapped(*args, **kwargs):
+            with self.stage(name):
+                return fn(*args, **kwargs)
+
+        return _wrapped
+
+    def count(self, name: str, value: float) -> None:
+        """Define o contador `name`."""
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = value
+
+    def add(self, name: str, value: float = 1) -> None:
+        """Soma `value` ao contador `name`."""
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            stages = [
+                {"stage": name, **{k: round(v, 4) if isinstance(v, float) else v for k, v in rec.items()}}
+                for name, rec in self.stages.items()
+            ]
+            counters = dict(self.counters)
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "wall_s": round(time.perf_counter() - self._wall0, 4),
+            "cpu_s": round(time.process_time() - self._cpu0, 4),
+            "process_rss_peak_mb": peak_rss_mb(),
+            "stages": stages,
+            "counters": counters,
+        }
+
+    def write_json(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+    def close(self) -> None:
+        """Para o tracemalloc, se foi iniciado por este Metrics."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+def format_stages(record: dict) -> str:
+    """Tabela de texto das etapas de um registro (to_dict), para o terminal."""
+    def _mb(value) -> str:
+        return "-" if value is None else f"{value:.1f}"
+
+    lines = [
+        f"{'etapa':<20} {'chamadas':>8} {'parede (s)':>11} {'CPU (s)':>9} {'RSS início (MB)':>16} "
+        f"{'+pico RSS (MB)':>15} {'pico RSS proc. (MB)':>20} {'Python pico (MB)':>17}"
+    ]
+    for s in record["stages"]:
+        lines.append(
+            f"{s['stage']:<20} {s['calls']:>8} {s['wall_s']:>11.3f} {s['cpu_s']:>9.3f} "
+            f"{_mb(s.get('rss_start_mb')):>16} {_mb(s.get('rss_peak_delta_mb')):>15} "
+            f"{_mb(s.get('process_rss_peak_mb')):>20} {_mb(s.get('py_peak_mb')):>17}"
+        )
+    lines.append(
+        f"{'total':<20} {'':>8} {record['wall_s']:>11.3f} {record['cpu_s']:>9.3f} {'':>16} {'':>15} "
+        f"{_mb(record['process_rss_peak_mb']):>20}"
+    )
+    if record["counters"]:
+        lines.append("  " + ", ".join(f"{k}={v}" for k, v in record["counters"].items()))
+    return "\n".join(lines)
+
+
+@contextmanager
+def profiled(path: Optional[str | Path]) -> Iterator[None]:
+    """Roda o bloco sob cProfile e grava o dump em path (None: sem profiling)."""
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(path))
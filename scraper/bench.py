@@ -0,0 +1,118 @@
+"""
+Benchmark de throughput do scraper contra o servidor local (scraper.fake_server).
+Roda scrape_thread com cada combinação de concorrência e reporta páginas/s,
+latência das requisições (p50/p99) e tempo de CPU por página.
+
+Uso:
+  python -m scraper.bench --pages 200 --latency 0.05 --jitter 0.02 --concurrency 1 4 8 --rate 100
+  python -m scraper.bench --error-rate 0.05 --adaptive --concurrency 8 --rate 20
+"""
+import argparse
+import json
+import time
+from typing import Optional
+
+from scraper.fake_server import StandInConfig, StandInServer
+from scraper.forum_client import AdaptiveRateController, ForumClient, TokenBucket
+from scraper.pagination import scrape_thread
+
+
+def percentile(values: list[float], q: float) -> Optional[float]:
+    """Percentil q (0–100) por interpolação linear; None se vazio."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def run_once(
+    url: str,
+    *,
+    concurrency: int,
+    rate: Optional[float],
+    adaptive: bool = False,
+    parse_workers: int = 1,
+) -> dict:
+    """Executa um scrape completo e retorna as métricas da execução."""
+    if adaptive:
+        limiter = AdaptiveRateController(rate or 1.0, max_in_flight=concurrency, max_rate=max(rate or 1.0, 1000.0))
+    elif rate is not None:
+        limiter = TokenBucket(rate, burst=concurrency, max_in_flight=concurrency)
+    else:
+        limiter = None
+    client = ForumClient(limiter=limiter, pool_size=max(concurrency, 1), record_latencies=True, backoff=0.05)
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    with client:
+        data = scrape_thread(url, client=client, concurrency=concurrency, parse_workers=parse_workers)
+    wall = time.perf_counter() - wall0
+    cpu = time.process_time() - cpu0
+    pages = data["total_pages"]
+    result = {
+        "concurrency": concurrency,
+        "rate": rate,
+        "adaptive": adaptive,
+        "parse_workers": parse_workers,
+        "pages": pages,
+        "posts": len(data["posts"]),
+        "wall_seconds": round(wall, 3),
+        "pages_per_second": round(pages / wall, 2) if wall > 0 else None,
+        "latency_p50_ms": round(percentile(client.latencies, 50) * 1000, 2) if client.latencies else None,
+        "latency_p99_ms": round(percentile(client.latencies, 99) * 1000, 2) if client.latencies else None,
+        "cpu_ms_per_page": round(cpu / pages * 1000, 2) if pages else None,
+        "requests": client.stats["requests"],
+        "retries": client.stats["retries"],
+    }
+    if isinstance(limiter, AdaptiveRateController):
+        result["adaptive_report"] = limiter.report()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de throughput do scraper (servidor local)")
+    parser.add_argument("--pages", type=int, default=100, help="Páginas do tópico sintético")
+    parser.add_argument("--posts-per-page", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="Latência do servidor (segundos)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variação da latência (± segundos)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilidade de 429 por requisição")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="Valores de concorrência a medir")
+    parser.add_argument("--rate", type=float, default=None, help="Requisições/segundo (omitir = sem limite)")
+    parser.add_argument("--adaptive", action="store_true", help="Usar AdaptiveRateController a partir de --rate")
+    parser.add_argument("--parse-workers", type=int, default=1)
+    parser.add_argument("--json-out", default=None, help="Salvar resultados em JSON")
+    args = parser.parse_args()
+
+    config = StandInConfig(
+        pages=args.pages,
+        posts_per_page=args.posts_per_page,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        retry_after=0,
+    )
+    results = []
+    with StandInServer(config) as server:
+        for c in args.concurrency:
+            r = run_once(
+                server.thread_url("1"),
+                concurrency=c,
+                rate=args.rate,
+                adaptive=args.adaptive,
+                parse_workers=args.parse_workers,
+            )
+            results.append(r)
+            print(
+                f"concurrency={c:<3} {r['pages_per_second']:>8} páginas/s  "
+                f"p50={r['latency_p50_ms']} ms  p99={r['latency_p99_ms']} ms  "
+                f"CPU={r['cpu_ms_per_page']} ms/página  retentativas={r['retries']}"
+            )
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"Resultados salvos: {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark do parser: páginas/s do caminho rápido (lxml/XPath) contra o parser
+com BeautifulSoup, sobre o mesmo HTML.
+
+Uso:
+  python -m scraper.bench_parser                     # páginas sintéticas
+  python -m scraper.bench_parser pagina1.html ...    # HTML salvo do fórum
+"""
+import argparse
+import time
+from pathlib import Path
+from typing import Callable
+
+from scraper.parser import parse_thread_page, parse_thread_page_soup
+from scraper.synthetic import render_thread_page
+
+
+def bench(parse_fn: Callable[[str], tuple], pages: list[str], repeat: int = 3) -> float:
+    """Retorna o melhor resultado (páginas/s) entre `repeat` execuções."""
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            parse_fn(html)
+        elapsed = time.perf_counter() - start
+        best = max(best, len(pages) / elapsed if elapsed > 0 else float("inf"))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do parser de páginas do fórum")
+    parser.add_argument("files", nargs="*", help="Arquivos HTML (omitir para usar páginas sintéticas)")
+    parser.add_argument("--pages", type=int, default=50, help="Páginas sintéticas a gerar")
+    parser.add_argument("--posts-per-page", type=int, default=20, help="Posts por página sintética")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições (vale a melhor)")
+    args = parser.parse_args()
+
+    if args.files:
+        pages = [Path(f).read_text(encoding="utf-8", errors="replace") for f in args.files]
+    else:
+        pages = [
+            render_thread_page("bench", p, args.pages, posts_per_page=args.posts_per_page)
+            for p in range(1, args.pages + 1)
+        ]
+
+    fast_posts = sum(len(parse_thread_page(h)[0]) for h in pages)
+    soup_posts = sum(len(parse_thread_page_soup(h)[0]) for h in pages)
+    fast = bench(parse_thread_page, pages, args.repeat)
+    soup = bench(parse_thread_page_soup, pages, args.repeat)
+
+    print(f"Páginas: {len(pages)}")
+    print(f"  lxml/XPath:    {fast:8.1f} páginas/s  ({fast_posts} posts)")
+    print(f"  BeautifulSoup: {soup:8.1f} páginas/s  ({soup_posts} posts)")
+    if soup > 0:
+        print(f"  Speedup: {fast / soup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Crawler de board: descobre os tópicos listados em action=board&boardid=…
+e baixa cada um, com vários workers sob um único rate limit por host.
+
+Saída em output_dir: thread_<id>.json por tópico e board_<boardid>_manifest.json.
+"""
+import json
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+from urllib.parse import urlparse, parse_qs
+
+from lxml import etree
+from lxml import html as lxml_html
+
+from scraper.cache import PageCache
+from scraper.forum_client import ForumClient, HostRateLimiter, page_url
+from scraper.pagination import refresh_thread, scrape_thread
+from scraper.stream import jsonl_path, stream_thread, write_thread_json
+from instrumentation.metrics import Metrics
+
+THREAD_ID_PATTERN = re.compile(r"threadid=(\d+)")
+PAGE_NUMBER_PATTERN = re.compile(r"pagenumber=(\d+)")
+
+_XP_THREAD_LINKS = etree.XPath("//a[contains(@href, 'action=thread') and contains(@href, 'threadid=')]")
+_XP_BOARD_PAGE_HREFS = etree.XPath("//a[contains(@href, 'action=board') and contains(@href, 'pagenumber=')]/@href")
+_HTML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+
+def parse_board_url(url: str) -> tuple[str, str]:
+    """
+    Extrai board_id e URL base do board a partir da URL.
+    Retorna (board_id, url_base_sem_pagenumber).
+    """
+    parsed = urlparse(url)
+    qs = parse_qs(parsed.query)
+    board_id = qs.get("boardid", [""])[0]
+    if not board_id:
+        raise ValueError(f"URL inválida: não contém boardid: {url}")
+    base = f"{parsed.scheme}://{parsed.netloc}{parsed.path}?action=board&boardid={board_id}"
+    return board_id, base
+
+
+def is_board_url(url: str) -> bool:
+    return "action=board" in url and "boardid=" in url
+
+
+def parse_board_page(html: str) -> tuple[list[dict], Optional[int]]:
+    """
+    Parse de uma página de listagem do board.
+    Retorna (tópicos [{"thread_id", "title"}] na ordem da página, total de páginas do board ou None).
+    Links de paginação interna de um tópico (threadid=…&pagenumber=…) não contam como título.
+    """
+    try:
+        root = lxml_html.fromstring(html.encode("utf-8"), parser=_HTML_PARSER)
+    except etree.ParserError:
+        return [], None
+    threads: dict[str, dict] = {}
+    for a in _XP_THREAD_LINKS(root):
+        href = a.get("href", "")
+        m = THREAD_ID_PATTERN.search(href)
+        if not m:
+            continue
+        tid = m.group(1)
+        entry = threads.setdefault(tid, {"thread_id": tid, "title": None})
+        text = " ".join(a.text_content().split())
+        if entry["title"] is None and text and "pagenumber=" not in href and not text.isdigit():
+            entry["title"] = text
+    numbers = [int(m.group(1)) for m in map(PAGE_NUMBER_PATTERN.search, _XP_BOARD_PAGE_HREFS(root)) if m]
+    return list(threads.values()), (max(numbers) if numbers else None)
+
+
+class Frontier:
+    """Fila de tópicos a baixar, sem duplicatas e segura entre threads."""
+
+    def __init__(self):
+        self._queue: deque = deque()
+        self._seen: set[str] = set()
+        self._lock = threading.Lock()
+
+    def add(self, item: dict) -> bool:
+        """Enfileira o tópico se ainda não foi visto; retorna True se foi adicionado."""
+        with self._lock:
+            if item["thread_id"] in self._seen:
+                return False
+            self._seen.add(item["thread_id"])
+            self._queue.append(item)
+            return True
+
+    def pop(self) -> Optional[dict]:
+        with self._lock:
+            return self._queue.popleft() if self._queue else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+
+def iter_board_threads(
+    board_url: str,
+    fetch_fn: Callable[[str], str],
+    *,
+    max_board_pages: Optional[int] = None,
+) -> Iterator[dict]:
+    """Percorre as páginas de listagem do board e gera os tópicos encontrados."""
+    _, base_url = parse_board_url(board_url)
+    page, total = 1, 1
+    while page <= total:
+        threads, board_pages = parse_board_page(fetch_fn(page_url(base_url, page)))
+        if board_pages:
+            total = max(total, board_pages)
+        if max_board_pages is not None:
+            total = min(total, max_board_pages)
+        yield from threads
+        page += 1
+
+
+def crawl_board(
+    board_url: str,
+    output_dir: str | Path,
+    *,
+    workers: int = 4,
+    rate: float = 1.0,
+    max_threads: Optional[int] = None,
+    max_board_pages: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    refresh: bool = False,
+    client: Optional[ForumClient] = None,
+    cache: Optional[PageCache] = None,
+    page_concurrency: Optional[int] = None,
+    adaptive: bool = False,
+    parse_workers: int = 1,
+    stream: bool = False,
+    metrics: Optional[Metrics] = None,
+) -> dict:
+    """
+    Descobre os tópicos do board e baixa cada um em `workers` threads; as páginas de
+    cada tópico também são buscadas em paralelo (page_concurrency, padrão `workers`),
+    então um tópico grande não serializa o crawl. Todas as requisições (listagem e
+    páginas de tópicos) passam pelo mesmo ForumClient, limitado a `rate` req/s e
+    `workers` requisições simultâneas por host, qualquer que seja o número de threads.
+    refresh: tópicos com thread_<id>.json existente são atualizados só com as páginas novas.
+    adaptive: taxa de cada host ajustada pelas respostas (AdaptiveRateController).
+    parse_workers: processos de parse por tópico em andamento (ver scrape_thread).
+    stream: cada tópico é gravado em JSONL com checkpoint (stream_thread), retomável.
+    metrics: etapas fetch/parse/dedupe dos tópicos, board_fetch e write_json; contadores
+    threads, pages, posts e requests.
+    Retorna (e grava) o manifest do crawl.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    board_id, base_url = parse_board_url(board_url)
+    metrics = metrics or Metrics.disabled()
+    page_concurrency = max(page_concurrency or workers, 1)
+    own_client = client is None
+    if client is None:
+        limiter = HostRateLimiter(rate, max_in_flight=workers, adaptive=adaptive)
+        client = ForumClient(limiter=limiter, pool_size=max(workers, 1))
+    fetch = cache.wrap(client.get_text, client=client) if cache is not None else client.get_text
+    options = dict(
+        fetch_fn=fetch,
+        max_pages=max_pages,
+        concurrency=page_concurrency,
+        parse_workers=parse_workers,
+        metrics=metrics,
+    )
+    thread_base = base_url.replace(f"action=board&boardid={board_id}", "action=thread&threadid=")
+
+    def _scrape_one(item: dict) -> dict:
+        tid = item["thread_id"]
+        out_path = output_dir / f"thread_{tid}.json"
+        url = f"{thread_base}{tid}"
+        try:
+            if stream:
+                checkpoint = stream_thread(url, output_dir, **options)
+                with metrics.stage("write_json"):
+                    n_posts = write_thread_json(
+                        jsonl_path(output_dir, tid), out_path, {"title": item.get("title"), **checkpoint}
+                    )
+                metrics.add("threads")
+                return {
+                    **item,
+                    "status": "ok",
+                    "posts": n_posts,
+                    "total_pages": checkpoint.get("total_pages"),
+                    "file": out_path.name,
+                }
+            if refresh and out_path.exists():
+                with open(out_path, encoding="utf-8") as f:
+                    data = refresh_thread(json.load(f), url, **options)
+            else:
+                data = scrape_thread(url, **options)
+        except Exception as e:  # um tópico com erro não interrompe o crawl
+            return {**item, "status": "error", "error": f"{type(e).__name__}: {e}"}
+        if not data.get("title"):
+            data["title"] = item.get("title")
+        with metrics.stage("write_json"):
+            with open(out_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        metrics.add("threads")
+        return {
+            **item,
+            "status": "ok",
+            "posts": len(data["posts"]),
+            "total_pages": data["total_pages"],
+            "file": out_path.name,
+        }
+
+    frontier = Frontier()
+    order: dict[str, int] = {}
+    results: list[dict] = []
+    start = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="crawl") as pool:
+            running: set = set()
+            discovered = 0
+
+            def _drain(block: bool) -> None:
+                # Agenda tópicos da fronteira e coleta os concluídos
+                while len(running) < workers and (item := frontier.pop()) is not None:
+                    running.add(pool.submit(_scrape_one, item))
+                if running:
+                    done, _ = wait(running, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        running.discard(fut)
+                        results.append(fut.result())
+
+            listing = iter_board_threads(board_url, metrics.timed("board_fetch", fetch), max_board_pages=max_board_pages)
+            for item in listing:
+                if max_threads is not None and discovered >= max_threads:
+                    break
+                if frontier.add(item):
+                    order[item["thread_id"]] = discovered
+                    discovered += 1
+                _drain(block=False)
+            while running or len(frontier):
+                _drain(block=True)
+    finally:
+        if cache is not None:
+            cache.flush()
+        if own_client:
+            client.close()
+
+    results.sort(key=lambda r: order.get(r["thread_id"], 0))
+    metrics.count("posts", sum(r.get("posts", 0) for r in results))
+    metrics.count("requests", client.stats["requests"])
+    manifest = {
+        "board_id": board_id,
+        "board_url": base_url,
+        "crawled_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "elapsed_seconds": round(time.monotonic() - start, 3),
+        "requests": client.stats["requests"],
+        "threads": results,
+    }
+    with open(output_dir / f"board_{board_id}_manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
@@ -0,0 +1,268 @@
+"""
+Cache em disco das páginas HTML do fórum, plugável em scrape_thread via fetch_fn.
+
+Layout em cache_dir:
+  index.json               (thread_id, página) -> sha256 do HTML, timestamps, validadores
+  blobs/<ab>/<sha256>.gz   HTML comprimido (gzip), endereçado pelo conteúdo
+
+Páginas intermediárias de um tópico (nem a primeira nem a última conhecida) são
+imutáveis e nunca expiram; a página 1 (que informa o total de páginas) e a última
+página conhecida expiram após `ttl` segundos. O tamanho total é limitado a
+`max_bytes`, com remoção LRU: o índice fica em ordem de último acesso (a entrada
+usada vai para o fim), então a remoção percorre só as entradas que saem.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import urlparse, parse_qs
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512 MB
+DEFAULT_TTL = 15 * 60  # segundos
+INDEX_FILENAME = "index.json"
+INDEX_FLUSH_EVERY = 50  # gravações entre persistências do índice
+
+
+class CacheMiss(LookupError):
+    """Página não está no cache e o modo offline impede buscá-la."""
+
+
+def page_key_from_url(url: str) -> Optional[tuple[str, int]]:
+    """Extrai (thread_id, página) de uma URL de tópico; None se não for página de tópico."""
+    qs = parse_qs(urlparse(url).query)
+    thread_id = qs.get("threadid", [""])[0]
+    if not thread_id:
+        return None
+    try:
+        page = int(qs.get("pagenumber", ["1"])[0])
+    except ValueError:
+        return None
+    return thread_id, page
+
+
+class PageCache:
+    """
+    Cache de páginas por (thread_id, página), com HTML comprimido, TTL para as
+    páginas mutáveis do tópico e limite de tamanho com remoção LRU.
+    offline: serve entradas mesmo expiradas e nunca acessa a rede (CacheMiss se faltar).
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path,
+        *,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: float = DEFAULT_TTL,
+        offline: bool = False,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.blob_dir = self.cache_dir / "blobs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.offline = offline
+        self._lock = threading.RLock()
+        self._dirty = 0
+        self._entries: dict[str, dict] = self._load_index()
+        self._max_page: dict[str, int] = {}
+        self._rebuild_max_page()
+        # Blobs são compartilhados entre páginas de HTML igual: total conta cada sha uma vez
+        self._refs: Counter = Counter(e["sha"] for e in self._entries.values())
+        self._sizes: dict[str, int] = {e["sha"]: e["size"] for e in self._entries.values()}
+        self.total_bytes = sum(self._sizes.values())
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0}
+
+    # ---- índice ----
+
+    @staticmethod
+    def _entry_key(thread_id: str, page: int) -> str:
+        return f"{thread_id}:{page}"
+
+    def _load_index(self) -> dict[str, dict]:
+        path = self.cache_dir / INDEX_FILENAME
+        if not path.exists():
+            return {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return dict(sorted(entries.items(), key=lambda kv: kv[1]["last_access"]))
+
+    def flush(self) -> None:
+        """Persiste o índice (escrita atômica)."""
+        with self._lock:
+            path = self.cache_dir / INDEX_FILENAME
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp, path)
+            self._dirty = 0
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "PageCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---- blobs ----
+
+    def _blob_path(self, sha: str) -> Path:
+        return self.blob_dir / sha[:2] / f"{sha}.gz"
+
+    def _read_blob(self, sha: str) -> Optional[str]:
+        try:
+            with gzip.open(self._blob_path(sha), "rt", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_blob(self, html: str) -> tuple[str, int]:
+        data = html.encode("utf-8")
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(sha)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp, "wb") as f:
+                f.write(gzip.compress(data, compresslevel=6))
+            os.replace(tmp, path)
+        return sha, path.stat().st_size
+
+    # ---- política ----
+
+    def _rebuild_max_page(self) -> None:
+        self._max_page = {}
+        for e in self._entries.values():
+            tid = e["thread_id"]
+            self._max_page[tid] = max(self._max_page.get(tid, 0), e["page"])
+
+    def _last_known_page(self, thread_id: str) -> int:
+        return self._max_page.get(thread_id, 0)
+
+    def is_fresh(self, entry: dict) -> bool:
+        """Páginas intermediárias nunca expiram; a primeira e a última respeitam o TTL."""
+        page = entry["page"]
+        if 1 < page < self._last_known_page(entry["thread_id"]):
+            return True
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    def _release(self, sha: str) -> None:
+        """Solta uma referência ao blob; sem referências, o remove do disco e do total."""
+        self._refs[sha] -= 1
+        if self._refs[sha] > 0:
+            return  # blob ainda referenciado por outra página
+        del self._refs[sha]
+        self.total_bytes -= self._sizes.pop(sha, 0)
+        try:
+            self._blob_path(sha).unlink()
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """Remove entradas menos usadas (o início do índice) até o total de blobs caber em max_bytes."""
+        # _max_page não é recalculado: a última página conhecida do tópico continua valendo
+        while self.total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._release(self._entries.pop(key)["sha"])
+
+    # ---- API ----
+
+    def lookup(self, thread_id: str, page: int) -> Optional[dict]:
+        """Retorna a entrada do índice (sem ler o HTML) ou None."""
+        with self._lock:
+            entry = self._entries.get(self._entry_key(thread_id, page))
+            return dict(entry) if entry else None
+
+    def get(self, thread_id: str, page: int, *, allow_stale: bool = False) -> Optional[str]:
+        """Retorna o HTML em cache se existir e estiver válido (ou allow_stale)."""
+        with self._lock:
+            key = self._entry_key(thread_id, page)
+            entry = self._entries.get(key)
+            if entry is None or not (allow_stale or self.offline or self.is_fresh(entry)):
+                return None
+            entry["last_access"] = time.time()
+            self._entries[key] = self._entries.pop(key)  # mais recente no fim
+            sha = entry["sha"]
+        return self._read_blob(sha)
+
+    def put(
+        self,
+        thread_id: str,
+        page: int,
+        html: str,
+        *,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """Guarda o HTML da página com o timestamp do fetch e validadores HTTP."""
+        sha, size = self._write_blob(html)
+        now = time.time()
+        with self._lock:
+            key = self._entry_key(thread_id, page)
+            self._refs[sha] += 1
+            if sha not in self._sizes:
+                self._sizes[sha] = size
+                self.total_bytes += size
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._release(old["sha"])
+            self._entries[key] = {
+                "thread_id": thread_id,
+                "page": page,
+                "sha": sha,
+                "size": size,
+                "fetched_at": now,
+                "last_access": now,
+                "etag": etag,
+                "last_modified": last_modified,
+            }
+            self._max_page[thread_id] = max(self._max_page.get(thread_id, 0), page)
+            self._evict()
+            self._dirty += 1
+            if self._dirty >= INDEX_FLUSH_EVERY:
+                self.flush()
+
+    def wrap(self, fetch_fn: Callable[[str], str], client=None) -> Callable[[str], str]:
+        """
+        Retorna um fetch_fn que consulta o cache antes de `fetch_fn`.
+        Com `client` (ForumClient), entradas expiradas são revalidadas por GET
+        condicional usando o ETag/Last-Modified guardados.
+        """
+        def _fetch(url: str) -> str:
+            key = page_key_from_url(url)
+            if key is None:
+                if self.offline:
+                    raise CacheMiss(url)
+                return fetch_fn(url)
+            thread_id, page = key
+            html = self.get(thread_id, page)
+            if html is not None:
+                with self._lock:
+                    self.stats["hits"] += 1
+                return html
+            if self.offline:
+                raise CacheMiss(url)
+            with self._lock:
+                self.stats["misses"] += 1
+            entry = self.lookup(thread_id, page)
+            if client is not None and entry and (entry.get("etag") or entry.get("last_modified")):
+                stale = self.get(thread_id, page, allow_stale=True)
+                if stale is not None:
+                    client.seed_validators(url, stale, entry.get("etag"), entry.get("last_modified"))
+                    with self._lock:
+                        self.stats["revalidated"] += 1
+            html = fetch_fn(url)
+            etag, last_modified = client.validators_for(url) if client is not None else (None, None)
+            self.put(thread_id, page, html, etag=etag, last_modified=last_modified)
+            return html
+
+        return _fetch
@@ -0,0 +1,173 @@
+"""
+Servidor HTTP local que imita o fórum (páginas sintéticas no markup real), para
+medir throughput e testar concorrência do scraper sem acessar tibia.com.
+
+Uso:
+  python -m scraper.fake_server --port 8000 --pages 100 --latency 0.05 --error-rate 0.02
+  python -m scraper.run "http://127.0.0.1:8000/forum/?action=thread&threadid=1" --concurrency 8 --rate 50
+"""
+import argparse
+import multiprocessing
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+
+from scraper.synthetic import render_board_page, render_thread_page
+
+
+@dataclass
+class StandInConfig:
+    """Parâmetros do servidor: tamanho do tópico, latência e injeção de 429."""
+    pages: int = 50
+    posts_per_page: int = 20
+    latency: float = 0.0  # segundos por resposta
+    jitter: float = 0.0  # variação uniforme ± jitter
+    error_rate: float = 0.0  # probabilidade de responder 429
+    retry_after: int = 1
+    board_pages: int = 1
+    threads_per_board_page: int = 30
+    seed: int = 0
+
+
+def _make_handler(config: StandInConfig):
+    rng = random.Random(config.seed)
+    rng_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+        disable_nagle_algorithm = True  # cabeçalho e corpo saem em escritas separadas
+
+        def do_GET(self):
+            with rng_lock:
+                delay = max(0.0, config.latency + rng.uniform(-config.jitter, config.jitter))
+                throttle = rng.random() < config.error_rate
+            if delay:
+                time.sleep(delay)
+            if throttle:
+                self._send(429, b"Too Many Requests", {"Retry-After": str(config.retry_after)})
+                return
+            qs = parse_qs(urlparse(self.path).query)
+            action = qs.get("action", [""])[0]
+            page = int(qs.get("pagenumber", ["1"])[0])
+            if action == "thread" and qs.get("threadid"):
+                if not 1 <= page <= config.pages:
+                    self._send(404, b"Not Found")
+                    return
+                html = render_thread_page(
+                    qs["threadid"][0], page, config.pages, config.posts_per_page, seed=config.seed
+                )
+            elif action == "board" and qs.get("boardid"):
+                html = render_board_page(
+                    qs["boardid"][0], page, config.board_pages, config.threads_per_board_page, config.pages
+                )
+            else:
+                self._send(404, b"Not Found")
+                return
+            self._send(200, html.encode("utf-8"), {"Content-Type": "text/html; charset=utf-8"})
+
+        def _send(self, status: int, body: bytes, headers: Optional[dict] = None) -> None:
+            self.send_response(status)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):  # silencioso
+            pass
+
+    return Handler
+
+
+def make_server(config: StandInConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), _make_handler(config))
+    server.daemon_threads = True
+    return server
+
+
+def _serve(config: StandInConfig, host: str, port_queue) -> None:
+    server = make_server(config, host)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+class StandInServer:
+    """
+    Sobe o servidor num processo separado (para não contaminar a medição de CPU
+    do cliente). Uso: `with StandInServer(config) as srv: srv.thread_url("1")`.
+    """
+
+    def __init__(self, config: Optional[StandInConfig] = None, host: str = "127.0.0.1"):
+        self.config = config or StandInConfig()
+        self.host = host
+        self.port: Optional[int] = None
+        self._process: Optional[multiprocessing.Process] = None
+
+    def start(self) -> "StandInServer":
+        port_queue = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(self.config, self.host, port_queue), daemon=True
+        )
+        self._process.start()
+        self.port = port_queue.get(timeout=10)
+        return self
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/forum/"
+
+    def thread_url(self, thread_id: str = "1") -> str:
+        return f"{self.base_url}?action=thread&threadid={thread_id}"
+
+    def board_url(self, board_id: str = "1") -> str:
+        return f"{self.base_url}?action=board&boardid={board_id}"
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita o fórum Tibia (páginas sintéticas)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--pages", type=int, default=50, help="Páginas por tópico")
+    parser.add_argument("--posts-per-page", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latência por resposta (segundos)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variação da latência (± segundos)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilidade de responder 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Valor do Retry-After nas respostas 429")
+    parser.add_argument("--board-pages", type=int, default=1, help="Páginas de listagem do board")
+    args = parser.parse_args()
+
+    config = StandInConfig(
+        pages=args.pages,
+        posts_per_page=args.posts_per_page,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        board_pages=args.board_pages,
+    )
+    server = make_server(config, args.host, args.port)
+    print(f"Servindo em http://{args.host}:{server.server_address[1]}/forum/?action=thread&threadid=1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,16 @@
 Cliente HTTP para fetch de páginas do fórum Tibia.
 Tratamento de erros, timeout e rate limiting.
 """
+import random
+import threading
 import time
 import re
+from email.utils import parsedate_to_datetime
+from typing import Optional
 from urllib.parse import urljoin, urlparse, parse_qs
 
 import requests
+from requests.adapters import HTTPAdapter
 
 DEFAULT_TIMEOUT = 30
 DEFAULT_DELAY_BETWEEN_REQUESTS = 1.5  # segundos
@@ -18,18 +23,124 @@ USER_AGENT = (
     "Chrome/120.0.0.0 Safari/537.36"
 )
 
+DEFAULT_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+# Conexões mantidas abertas por host no pool da sessão
+DEFAULT_POOL_SIZE = 10
+
+# Retentativas de GET (idempotente) com backoff exponencial e jitter
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 1.0  # segundos (base)
+MAX_BACKOFF = 60.0
+RETRY_STATUS = (429, 500, 502, 503, 504)
+THROTTLE_STATUS = (429, 503)
+
+
+class TokenBucket:
+    """
+    Rate limiter token-bucket compartilhado entre threads.
+    Libera até `rate` requisições por segundo (com rajada de até `burst`)
+    e limita o número de requisições simultâneas a `max_in_flight`.
+    Uso: `with bucket: fetch(...)`.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, max_in_flight: Optional[int] = None):
+        if rate <= 0:
+            raise ValueError(f"rate deve ser positivo: {rate}")
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self._in_flight = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+
+    def _take_token(self) -> float:
+        """Tenta consumir um token; retorna 0 se conseguiu ou o tempo de espera necessário."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> None:
+        """Bloqueia até haver vaga em voo e um token disponível."""
+        if self._in_flight is not None:
+            self._in_flight.acquire()
+        while True:
+            wait = self._take_token()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def release(self) -> None:
+        """Libera a vaga em voo ocupada por acquire()."""
+        if self._in_flight is not None:
+            self._in_flight.release()
+
+    def for_url(self, url: str) -> "TokenBucket":
+        """Um único bucket serve qualquer URL (mesma interface de HostRateLimiter)."""
+        return self
+
+    def __enter__(self) -> "TokenBucket":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class HostRateLimiter:
+    """
+    Um TokenBucket por host, criado sob demanda com os mesmos parâmetros.
+    Permite que vários tópicos (e workers) compartilhem o mesmo orçamento por host.
+    adaptive: cada host recebe um AdaptiveRateController (taxa inicial `rate`).
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        max_in_flight: Optional[int] = None,
+        adaptive: bool = False,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.adaptive = adaptive
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                if self.adaptive:
+                    bucket = AdaptiveRateController(self.rate, max_in_flight=self.max_in_flight)
+                else:
+                    bucket = TokenBucket(self.rate, self.burst, self.max_in_flight)
+                self._buckets[host] = bucket
+            return bucket
+
+    def buckets(self) -> dict[str, TokenBucket]:
+        """Buckets criados até agora, por host."""
+        with self._lock:
+            return dict(self._buckets)
+
 
 def fetch_page(url: str, timeout: int = DEFAULT_TIMEOUT) -> requests.Response:
     """
     Faz o fetch de uma URL do fórum com headers adequados.
     Levanta requests.RequestException em caso de erro.
     """
-    headers = {
-        "User-Agent": USER_AGENT,
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9",
-    }
-    response = requests.get(url, headers=headers, timeout=timeout)
+    response = requests.get(url, headers=DEFAULT_HEADERS, timeout=timeout)
     response.raise_for_status()
     return response
 
@@ -48,6 +159,255 @@ def fetch_page_with_delay(
     return resp.text
 
 
+class AdaptiveRateController(TokenBucket):
+    """
+    Token-bucket com taxa ajustada pelas respostas do servidor (AIMD):
+    - resposta 2xx/304 rápida: taxa += `increase` (aumento aditivo);
+    - 429/503 ou latência acima de `latency_factor` x a latência de referência
+      (e acima de `min_slow_latency`): taxa *= `decrease` (corte multiplicativo);
+    - Retry-After: pausa todas as requisições até o prazo indicado.
+    A taxa fica entre min_rate e max_rate; report() resume a vazão efetiva obtida.
+    """
+
+    def __init__(
+        self,
+        initial_rate: float = 1.0,
+        *,
+        min_rate: float = 0.2,
+        max_rate: float = 10.0,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        latency_factor: float = 2.0,
+        min_slow_latency: float = 0.25,
+        max_in_flight: Optional[int] = None,
+    ):
+        super().__init__(initial_rate, burst=1, max_in_flight=max_in_flight)
+        self.min_slow_latency = min_slow_latency
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self._baseline: Optional[float] = None  # média móvel (EWMA) da latência de respostas boas
+        self._pause_until = 0.0
+        self._started = time.monotonic()
+        self._ok = 0
+        self._throttled = 0
+        self._latency_sum = 0.0
+        self._peak_rate = self.rate
+
+    def acquire(self) -> None:
+        super().acquire()
+        while True:
+            with self._lock:
+                wait = self._pause_until - time.monotonic()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def on_response(self, status: int, latency: float, retry_after: Optional[float] = None) -> None:
+        """Ajusta a taxa a partir do status HTTP e da latência (segundos) de uma resposta."""
+        with self._lock:
+            slow = (
+                self._baseline is not None
+                and latency > self.min_slow_latency
+                and latency > self.latency_factor * self._baseline
+            )
+            if status in THROTTLE_STATUS or slow:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                if status in THROTTLE_STATUS:
+                    self._throttled += 1
+            elif status < 400:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+            if status < 400:
+                self._ok += 1
+                self._latency_sum += latency
+                self._baseline = latency if self._baseline is None else 0.8 * self._baseline + 0.2 * latency
+            if retry_after:
+                self._pause_until = max(self._pause_until, time.monotonic() + retry_after)
+            # não acumular tokens da taxa antiga
+            self._tokens = min(self._tokens, 1.0)
+            self._peak_rate = max(self._peak_rate, self.rate)
+
+    def report(self) -> dict:
+        """Vazão efetiva: respostas boas por segundo desde a criação, taxa atual e de pico."""
+        with self._lock:
+            elapsed = time.monotonic() - self._started
+            return {
+                "rate": round(self.rate, 3),
+                "peak_rate": round(self._peak_rate, 3),
+                "throughput": round(self._ok / elapsed, 3) if elapsed > 0 else 0.0,
+                "responses_ok": self._ok,
+                "throttled": self._throttled,
+                "mean_latency": round(self._latency_sum / self._ok, 4) if self._ok else None,
+            }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Converte o header Retry-After (segundos ou data HTTP) em segundos de espera."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class ForumClient:
+    """
+    Cliente HTTP do fórum com `requests.Session` em pool (keep-alive entre páginas),
+    compressão gzip/deflate negociada e GET condicional: guarda ETag/Last-Modified
+    de cada URL e reenvia como If-None-Match/If-Modified-Since, reaproveitando o
+    HTML guardado quando o servidor responde 304.
+
+    limiter: TokenBucket, AdaptiveRateController ou HostRateLimiter compartilhado.
+    delay: pausa após cada requisição (modo sequencial, como fetch_page_with_delay).
+    max_retries: retentativas do GET em erro de rede, 429 ou 5xx, com backoff
+    exponencial e jitter (ou o Retry-After do servidor).
+    record_latencies: guarda a latência de cada requisição em `latencies` (benchmarks).
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout: int = DEFAULT_TIMEOUT,
+        delay: float = 0.0,
+        limiter: Optional[TokenBucket | HostRateLimiter] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        record_latencies: bool = False,
+    ):
+        self.timeout = timeout
+        self.delay = delay
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(DEFAULT_HEADERS)
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+        # url -> (etag, last_modified, html)
+        self._validators: dict[str, tuple[Optional[str], Optional[str], str]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "not_modified": 0, "retries": 0}
+        self.latencies: Optional[list[float]] = [] if record_latencies else None
+
+    def seed_validators(
+        self,
+        url: str,
+        html: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """Registra validadores (ex.: vindos de um cache em disco) para a próxima requisição."""
+        if etag or last_modified:
+            with self._lock:
+                self._validators[url] = (etag, last_modified, html)
+
+    def validators_for(self, url: str) -> tuple[Optional[str], Optional[str]]:
+        """Retorna (etag, last_modified) guardados para a URL."""
+        with self._lock:
+            etag, last_modified, _ = self._validators.get(url, (None, None, ""))
+        return etag, last_modified
+
+    def _request(self, url: str) -> requests.Response:
+        """Um GET (condicional, se houver validadores), passando pelo limiter."""
+        with self._lock:
+            stored = self._validators.get(url)
+        headers = {}
+        if stored:
+            etag, last_modified, _ = stored
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        bucket = self.limiter.for_url(url) if self.limiter is not None else None
+        if bucket is not None:
+            bucket.acquire()
+        try:
+            start = time.monotonic()
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            latency = time.monotonic() - start
+        finally:
+            if bucket is not None:
+                bucket.release()
+        with self._lock:
+            self.stats["requests"] += 1
+            if self.latencies is not None:
+                self.latencies.append(latency)
+        if isinstance(bucket, AdaptiveRateController):
+            bucket.on_response(
+                response.status_code,
+                latency,
+                parse_retry_after(response.headers.get("Retry-After")),
+            )
+        return response
+
+    def _backoff_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, MAX_BACKOFF)
+        return min(MAX_BACKOFF, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def get_text(self, url: str) -> str:
+        """
+        Faz o fetch (condicional, se houver validadores) e retorna o HTML.
+        Erros de rede, 429 e 5xx são retentados até max_retries vezes.
+        Levanta requests.RequestException em caso de erro.
+        """
+        attempt = 0
+        while True:
+            try:
+                response = self._request(url)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                response = None
+            if response is not None and response.status_code not in RETRY_STATUS:
+                break
+            if attempt >= self.max_retries:
+                break
+            with self._lock:
+                self.stats["retries"] += 1
+            time.sleep(self._backoff_delay(attempt, response))
+            attempt += 1
+
+        with self._lock:
+            stored = self._validators.get(url)
+        if response.status_code == 304 and stored:
+            with self._lock:
+                self.stats["not_modified"] += 1
+            html = stored[2]
+        else:
+            response.raise_for_status()
+            html = response.text
+            self.seed_validators(
+                url,
+                html,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        if self.delay > 0:
+            time.sleep(self.delay)
+        return html
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "ForumClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
 def parse_thread_url(url: str) -> tuple[str, str]:
     """
     Extrai thread_id e URL base do tópico a partir da URL.
@@ -2,14 +2,148 @@
 Lógica de paginação: descobre o total de páginas e percorre todas,
 agregando os posts de um tópico.
 """
-from typing import Callable, Optional
+import queue
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional
 
 from scraper.forum_client import (
+    BASE_URL,
+    AdaptiveRateController,
+    ForumClient,
+    TokenBucket,
     parse_thread_url,
     page_url,
-    fetch_page_with_delay,
 )
+from scraper.cache import PageCache
 from scraper.parser import parse_thread_page
+from scraper.posts import post_key
+from instrumentation.metrics import Metrics
+
+
+def iter_pages_html(
+    fetch_fn: Callable[[str], str],
+    urls: Iterable[str],
+    concurrency: int = 1,
+) -> Iterator[str]:
+    """
+    Busca as URLs e produz o HTML de cada uma na mesma ordem de `urls`.
+    Com concurrency > 1 usa um pool de threads com janela limitada
+    (no máximo 2 * concurrency páginas pendentes ou prontas em memória).
+    """
+    if concurrency <= 1:
+        for u in urls:
+            yield fetch_fn(u)
+        return
+
+    window = 2 * concurrency
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="fetch") as pool:
+        pending: deque = deque()
+        for u in urls:
+            pending.append(pool.submit(fetch_fn, u))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+_END = object()
+
+
+def prefetch(items: Iterable, maxsize: int) -> Iterator:
+    """
+    Consome `items` numa thread própria, enfileirando até `maxsize` itens prontos.
+    Desacopla o produtor (fetch) do consumidor (parse): um não espera o outro.
+    Exceções do produtor são relançadas no consumidor.
+    """
+    q: queue.Queue = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def _produce() -> None:
+        try:
+            for item in items:
+                while not stop.is_set():
+                    try:
+                        q.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            q.put(_END)
+        except BaseException as e:  # repassado ao consumidor
+            q.put(e)
+
+    producer = threading.Thread(target=_produce, name="prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def iter_parsed_pages(
+    htmls: Iterable[str],
+    parse_workers: int = 1,
+    metrics: Optional[Metrics] = None,
+) -> Iterator[tuple[list[dict], Optional[int], Optional[int]]]:
+    """
+    Aplica parse_thread_page a cada HTML, mantendo a ordem.
+    Com parse_workers > 1 o parse (CPU) roda num pool de processos, alimentado
+    por uma fila limitada de HTML preenchida em paralelo pelos fetchers.
+    metrics: etapa "parse" (no modo com processos, "parse_wait": espera pelo resultado).
+    """
+    metrics = metrics or Metrics.disabled()
+    if parse_workers <= 1:
+        for html in htmls:
+            with metrics.stage("parse"):
+                parsed = parse_thread_page(html)
+            yield parsed
+        return
+
+    window = 2 * parse_workers
+    with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+        pending: deque = deque()
+        for html in prefetch(htmls, maxsize=window):
+            pending.append(pool.submit(parse_thread_page, html))
+            if len(pending) >= window:
+                with metrics.stage("parse_wait"):
+                    parsed = pending.popleft().result()
+                yield parsed
+        while pending:
+            with metrics.stage("parse_wait"):
+                parsed = pending.popleft().result()
+            yield parsed
+
+
+def make_client(
+    delay: float = 1.5,
+    concurrency: int = 1,
+    rate: Optional[float] = None,
+    adaptive: bool = False,
+) -> ForumClient:
+    """
+    Cria o ForumClient adequado ao modo: sequencial (pausa `delay` após cada página),
+    concorrente (sem pausa fixa; cadência pelo token-bucket de `rate` req/s) ou
+    adaptativo (taxa inicial `rate` ajustada pelas respostas do servidor).
+    """
+    if adaptive or concurrency > 1 or rate is not None:
+        if rate is None:
+            rate = 1.0 / delay if delay > 0 else float(concurrency)
+        if adaptive:
+            limiter = AdaptiveRateController(rate, max_in_flight=concurrency)
+        else:
+            limiter = TokenBucket(rate, max_in_flight=concurrency)
+        return ForumClient(limiter=limiter, pool_size=max(concurrency, 1))
+    return ForumClient(delay=delay)
 
 
 def scrape_thread(
@@ -18,48 +152,211 @@ def scrape_thread(
     fetch_fn: Optional[Callable[[str], str]] = None,
     delay: float = 1.5,
     max_pages: Optional[int] = None,
+    concurrency: int = 1,
+    rate: Optional[float] = None,
+    client: Optional[ForumClient] = None,
+    cache: Optional[PageCache] = None,
+    parse_workers: int = 1,
+    adaptive: bool = False,
+    metrics: Optional[Metrics] = None,
 ) -> dict:
     """
     Faz o scraping de um tópico completo (todas as páginas).
     Retorna um dict com thread_id, title (se disponível), total_pages, posts.
     fetch_fn: se fornecido, usa essa função para obter HTML (útil para testes com cache).
+    concurrency: número de páginas buscadas em paralelo (1 = sequencial com `delay`).
+    rate: requisições/segundo do token-bucket no modo concorrente (padrão: 1 / delay).
+    client: ForumClient a reutilizar (sessão e validadores); se omitido, um é criado
+    a partir de delay/concurrency/rate e fechado ao final.
+    cache: PageCache consultado antes da rede (páginas em cache não geram requisição).
+    parse_workers: processos para o parse (> 1 desacopla parse e fetch).
+    adaptive: taxa ajustada pelas respostas (AdaptiveRateController), começando em `rate`.
+    metrics: registra as etapas fetch, parse e dedupe e os contadores pages/posts.
     """
     thread_id, base_url = parse_thread_url(url)
-    if fetch_fn is None:
-        def _fetch(u: str) -> str:
-            return fetch_page_with_delay(u, delay=delay)
-        fetch_fn = _fetch
+    with open_fetch_fn(fetch_fn, delay, concurrency, rate, client, cache, adaptive) as fetch:
+        return _scrape_pages(
+            thread_id,
+            base_url,
+            fetch,
+            max_pages=max_pages,
+            concurrency=concurrency,
+            parse_workers=parse_workers,
+            metrics=metrics,
+        )
 
-    all_posts = []
-    total_pages = None
-    total_results = None
-    title = None
 
-    # Primeira página
-    page1_url = page_url(base_url, 1)
-    html = fetch_fn(page1_url)
-    posts, total_results, total_pages = parse_thread_page(html)
-    all_posts.extend(posts)
+@contextmanager
+def open_fetch_fn(
+    fetch_fn: Optional[Callable[[str], str]],
+    delay: float,
+    concurrency: int,
+    rate: Optional[float],
+    client: Optional[ForumClient],
+    cache: Optional[PageCache],
+    adaptive: bool = False,
+) -> Iterator[Callable[[str], str]]:
+    """
+    Context manager que monta o fetch_fn efetivo (fetch_fn explícito ou ForumClient,
+    com o cache por cima) e libera ao final os recursos criados aqui.
+    """
+    own_client = None
+    if fetch_fn is None:
+        if client is None:
+            client = own_client = make_client(delay=delay, concurrency=concurrency, rate=rate, adaptive=adaptive)
+        fetch_fn = client.get_text
+    if cache is not None:
+        fetch_fn = cache.wrap(fetch_fn, client=client)
+    try:
+        yield fetch_fn
+    finally:
+        if cache is not None:
+            cache.flush()
+        if own_client is not None:
+            own_client.close()
+
 
+def iter_thread_pages(
+    base_url: str,
+    fetch_fn: Callable[[str], str],
+    *,
+    start_page: int = 2,
+    max_pages: Optional[int] = None,
+    concurrency: int = 1,
+    parse_workers: int = 1,
+    metrics: Optional[Metrics] = None,
+) -> Iterator[tuple[int, list[dict], Optional[int], int]]:
+    """
+    Gera (página, posts, total_results, total_pages) em ordem de página.
+    A página 1 é sempre buscada e produzida primeiro (ela informa os totais);
+    em seguida vêm as páginas de max(2, start_page) até total_pages.
+    parse_workers > 1: parse em pool de processos, em paralelo ao fetch.
+    metrics: etapas "fetch" (cada página, somadas entre threads) e "parse"; contadores pages e posts_parsed.
+    """
+    metrics = metrics or Metrics.disabled()
+    fetch_fn = metrics.timed("fetch", fetch_fn)
+    html = fetch_fn(page_url(base_url, 1))
+    with metrics.stage("parse"):
+        posts, total_results, total_pages = parse_thread_page(html)
     if total_pages is None:
         total_pages = 1
     if max_pages is not None:
         total_pages = min(total_pages, max_pages)
+    metrics.add("pages")
+    metrics.add("posts_parsed", len(posts))
+    yield 1, posts, total_results, total_pages
+
+    # Demais páginas (em ordem, mesmo no modo concorrente)
+    pages = range(max(2, start_page), total_pages + 1)
+    urls = (page_url(base_url, p) for p in pages)
+    htmls = iter_pages_html(fetch_fn, urls, concurrency=concurrency)
+    for p, (posts_n, _, _) in zip(pages, iter_parsed_pages(htmls, parse_workers, metrics)):
+        metrics.add("pages")
+        metrics.add("posts_parsed", len(posts_n))
+        yield p, posts_n, total_results, total_pages
 
-    for p in range(2, total_pages + 1):
-        page_url_n = page_url(base_url, p)
-        html_n = fetch_fn(page_url_n)
-        posts_n, _, _ = parse_thread_page(html_n)
-        all_posts.extend(posts_n)
 
-    # Deduplicar por (author, date, body) para segurança
-    seen = set()
-    unique_posts = []
-    for p in all_posts:
-        key = (p.get("author"), p.get("date"), (p.get("body") or "")[:200])
+def merge_posts(existing: list[dict], new: Iterable[dict]) -> list[dict]:
+    """Acrescenta a `existing` os posts de `new` ainda não presentes (por post_id), mantendo a ordem."""
+    seen = {post_key(p) for p in existing}
+    merged = list(existing)
+    for p in new:
+        key = post_key(p)
         if key not in seen:
             seen.add(key)
-            unique_posts.append(p)
+            merged.append(p)
+    return merged
+
+
+def refresh_thread(
+    existing: dict,
+    url: Optional[str] = None,
+    *,
+    fetch_fn: Optional[Callable[[str], str]] = None,
+    delay: float = 1.5,
+    max_pages: Optional[int] = None,
+    concurrency: int = 1,
+    rate: Optional[float] = None,
+    client: Optional[ForumClient] = None,
+    cache: Optional[PageCache] = None,
+    parse_workers: int = 1,
+    adaptive: bool = False,
+    metrics: Optional[Metrics] = None,
+) -> dict:
+    """
+    Atualiza um tópico já baixado (dict no formato de scrape_thread) baixando só o necessário:
+    a página 1 (para descobrir total_results/total_pages atuais), a última página conhecida
+    (que pode ter ganhado posts) e as páginas novas. Os posts novos são mesclados por post_id.
+    O custo depende do número de páginas novas, não do tamanho do tópico.
+    """
+    if url is None:
+        url = f"{BASE_URL}?action=thread&threadid={existing['thread_id']}"
+    thread_id, base_url = parse_thread_url(url)
+    known_last = existing.get("total_pages") or 1
+
+    new_posts = []
+    total_results = total_pages = None
+    with open_fetch_fn(fetch_fn, delay, concurrency, rate, client, cache, adaptive) as fetch:
+        first = max(2, known_last)
+        pages = iter_thread_pages(
+            base_url,
+            fetch,
+            start_page=first,
+            max_pages=max_pages,
+            concurrency=concurrency,
+            parse_workers=parse_workers,
+            metrics=metrics,
+        )
+        for _, posts_n, total_results, total_pages in pages:
+            new_posts.extend(posts_n)
+
+    return {
+        "thread_id": thread_id,
+        "title": existing.get("title"),
+        "total_pages": max(total_pages, known_last),
+        "total_results": total_results if total_results is not None else existing.get("total_results"),
+        "posts": merge_posts(existing.get("posts", []), new_posts),
+    }
+
+
+def _scrape_pages(
+    thread_id: str,
+    base_url: str,
+    fetch_fn: Callable[[str], str],
+    *,
+    max_pages: Optional[int],
+    concurrency: int,
+    parse_workers: int = 1,
+    metrics: Optional[Metrics] = None,
+) -> dict:
+    """Percorre as páginas do tópico com `fetch_fn` e agrega os posts."""
+    metrics = metrics or Metrics.disabled()
+    all_posts = []
+    total_pages = None
+    total_results = None
+    title = None
+
+    pages = iter_thread_pages(
+        base_url,
+        fetch_fn,
+        max_pages=max_pages,
+        concurrency=concurrency,
+        parse_workers=parse_workers,
+        metrics=metrics,
+    )
+    for _, posts_n, total_results, total_pages in pages:
+        all_posts.extend(posts_n)
+
+    # Deduplicar pela identidade do post (a mesma de merge_posts e do streaming)
+    with metrics.stage("dedupe"):
+        seen = set()
+        unique_posts = []
+        for p in all_posts:
+            key = post_key(p)
+            if key not in seen:
+                seen.add(key)
+                unique_posts.append(p)
+    metrics.count("posts", len(unique_posts))
 
     return {
         "thread_id": thread_id,
@@ -1,11 +1,17 @@
 """
 Parse de páginas do fórum Tibia: extração de posts e informação de paginação.
+
+Caminho rápido: XPath (lxml) direto nos nós do markup do fórum (td.CipPost,
+.PostDetails, .PostText, div[id^=Post_]), sem árvore BeautifulSoup.
+Se o markup não for reconhecido, usa as heurísticas com BeautifulSoup.
 """
 import re
 from dataclasses import dataclass
 from typing import Optional
 
 from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
 
 
 @dataclass
@@ -33,6 +39,24 @@ PAGES_TEXT_PATTERN = re.compile(r"Pages:\s*([\d\s]+)", re.I)
 
 POSTS_PER_PAGE = 20  # valor típico do fórum Tibia
 
+EDITED_PATTERN = re.compile(r"Edited by [^\n]+ on \d{2}\.\d{2}\.\d{4}[^\n]*", re.I)
+
+
+def _has_class(name: str) -> str:
+    """Predicado XPath equivalente ao seletor CSS `.name`."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_XP_POST_CELLS = etree.XPath(f"//td[{_has_class('CipPost')}]")
+_XP_AUTHOR = etree.XPath(".//a[contains(@href, 'subtopic=characters') and contains(@href, 'name=')]")
+_XP_DETAILS = etree.XPath(f".//*[{_has_class('PostDetails')}]")
+_XP_TEXT = etree.XPath(f".//*[{_has_class('PostText')}]")
+_XP_POST_DIV_ID = etree.XPath(".//div[starts-with(@id, 'Post_')]/@id")
+_XP_RESULTS = etree.XPath("//*[contains(text(), 'Results:')]")
+_XP_PAGE_HREFS = etree.XPath("//a[contains(@href, 'pagenumber=')]/@href")
+# HTML já decodificado (requests.Response.text) é reenviado ao lxml como UTF-8
+_HTML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
 
 def _normalize_whitespace(text: str) -> str:
     """Colapsa espaços e newlines em espaço único e strip."""
@@ -142,6 +166,72 @@ def _find_posts_by_post_id(soup: BeautifulSoup):
     return posts_data
 
 
+def _clean_body(text: str) -> str:
+    """Remove marcas de edição e linhas de assinatura; colapsa espaços."""
+    text = EDITED_PATTERN.sub("", text)
+    text = re.sub(r"_+", "", text)
+    return _normalize_whitespace(text)
+
+
+def _parse_posts_fast(root) -> list[dict]:
+    """Extrai os posts das células td.CipPost (mesma estrutura usada pelo browser_fetch_script.js)."""
+    posts_data = []
+    for cell in _XP_POST_CELLS(root):
+        author_links = _XP_AUTHOR(cell)
+        if not author_links:
+            continue
+        author = author_links[0].text_content().strip()
+        if not author or len(author) > 50:
+            continue
+        details = _XP_DETAILS(cell)
+        details_text = details[0].text_content() if details else cell.text_content()
+        date_match = DATE_PATTERN.search(details_text)
+        if not date_match:
+            continue
+        text_nodes = _XP_TEXT(cell)
+        body = _clean_body(text_nodes[0].text_content()) if text_nodes else ""
+        post_id = None
+        ids = _XP_POST_DIV_ID(cell)
+        if ids:
+            post_id = ids[0][len("Post_"):] or None
+        if post_id is None:
+            pid_match = POST_ID_PATTERN.search(details_text)
+            if pid_match:
+                post_id = pid_match.group(1)
+        posts_data.append(
+            {"post_id": post_id, "author": author, "date": date_match.group(0), "body": body}
+        )
+    return posts_data
+
+
+def _pagination_fast(root) -> tuple[Optional[int], Optional[int]]:
+    """Lê 'Results: N' e o maior pagenumber= dos links, sem extrair o texto da página inteira."""
+    total_results = None
+    for el in _XP_RESULTS(root):
+        parent = el.getparent()
+        res_match = RESULTS_PATTERN.search((parent if parent is not None else el).text_content())
+        if res_match:
+            total_results = int(res_match.group(1))
+            break
+    total_pages = None
+    numbers = [int(m.group(1)) for m in map(PAGES_PATTERN.search, _XP_PAGE_HREFS(root)) if m]
+    if numbers:
+        total_pages = max(numbers)
+    return total_results, total_pages
+
+
+def _dedup_by_author_date(posts_data: list[dict]) -> list[dict]:
+    """Deduplicar por (author, date) para evitar repetir o mesmo post."""
+    seen = set()
+    unique = []
+    for p in posts_data:
+        key = (p["author"], p["date"])
+        if key not in seen:
+            seen.add(key)
+            unique.append(p)
+    return unique
+
+
 def parse_thread_page(html: str) -> tuple[list[dict], Optional[int], Optional[int]]:
     """
     Parse uma página HTML do tópico.
@@ -149,17 +239,32 @@ def parse_thread_page(html: str) -> tuple[list[dict], Optional[int], Optional[in
       - lista de dicts com keys: post_id, author, date, body
       - total de resultados (Results: N) ou None
       - número total de páginas ou None
+    Usa o caminho rápido (lxml/XPath); se nenhum post for reconhecido,
+    recorre a parse_thread_page_soup.
+    """
+    try:
+        root = lxml_html.fromstring(html.encode("utf-8"), parser=_HTML_PARSER)
+    except etree.ParserError:
+        # Documento vazio ou ilegível
+        return parse_thread_page_soup(html)
+    posts_data = _parse_posts_fast(root)
+    if not posts_data:
+        return parse_thread_page_soup(html)
+
+    total_results, total_pages = _pagination_fast(root)
+    if total_pages is None and total_results is not None:
+        total_pages = max(1, (total_results + POSTS_PER_PAGE - 1) // POSTS_PER_PAGE)
+    return _dedup_by_author_date(posts_data), total_results, total_pages
+
+
+def parse_thread_page_soup(html: str) -> tuple[list[dict], Optional[int], Optional[int]]:
+    """
+    Parse com BeautifulSoup e heurísticas (subida de ancestrais a partir do marcador
+    de fim de post). Fallback de parse_thread_page para markup desconhecido.
     """
     soup = BeautifulSoup(html, "lxml")
     posts_data = _find_post_containers(soup)
-    # Deduplicar por (author, date) para evitar repetir o mesmo post
-    seen = set()
-    unique = []
-    for p in posts_data:
-        key = (p["author"], p["date"])
-        if key not in seen:
-            seen.add(key)
-            unique.append(p)
+    unique = _dedup_by_author_date(posts_data)
 
     total_results = None
     text = soup.get_text()
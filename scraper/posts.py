@@ -0,0 +1,11 @@
+"""
+Identidade de um post, compartilhada pelo scraper (dedupe, --refresh) e pela análise
+incremental. Sem dependências externas: importar não carrega requests nem bs4.
+"""
+
+
+def post_key(post: dict) -> tuple:
+    """Identidade de um post: post_id quando disponível, senão (author, date, body[:200])."""
+    if post.get("post_id"):
+        return ("id", post["post_id"])
+    return (post.get("author"), post.get("date"), (post.get("body") or "")[:200])
@@ -1,30 +1,166 @@
 """
-CLI para rodar o scraper: recebe URL do tópico e salva JSON em data/.
+CLI para rodar o scraper: recebe URL do tópico (ou de um board) e salva JSON em data/.
 """
 import argparse
 import json
 from pathlib import Path
+from typing import Optional
 
-from scraper.pagination import scrape_thread
+from scraper.board import crawl_board, is_board_url
+from scraper.cache import PageCache
+from scraper.forum_client import AdaptiveRateController, ForumClient, HostRateLimiter, parse_thread_url
+from scraper.pagination import make_client, refresh_thread, scrape_thread
+from scraper.stream import jsonl_path, stream_thread, write_thread_json
+from instrumentation.metrics import Metrics, format_stages, profiled
 
 
 def main():
-    parser = argparse.ArgumentParser(description="Scraper do fórum Tibia - baixa um tópico completo")
-    parser.add_argument("url", help="URL do tópico (ex: https://www.tibia.com/forum/?action=thread&threadid=4992269)")
+    parser = argparse.ArgumentParser(description="Scraper do fórum Tibia - baixa um tópico completo (ou todos de um board)")
+    parser.add_argument(
+        "url",
+        help="URL do tópico (ex: https://www.tibia.com/forum/?action=thread&threadid=4992269) "
+        "ou do board (action=board&boardid=…)",
+    )
     parser.add_argument("-o", "--output-dir", default="data", help="Diretório de saída para o JSON")
     parser.add_argument("--delay", type=float, default=1.5, help="Delay entre requisições (segundos)")
     parser.add_argument("--max-pages", type=int, default=None, help="Máximo de páginas a baixar (útil para testes)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Páginas buscadas em paralelo (1 = sequencial)")
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=1,
+        help="Processos para o parse das páginas (> 1 roda o parse em paralelo ao fetch)",
+    )
+    parser.add_argument("--rate", type=float, default=None, help="Requisições/segundo no modo concorrente (padrão: 1/delay)")
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Ajustar a taxa pelas respostas do servidor (sobe enquanto rápido, cai em 429/503)",
+    )
+    parser.add_argument("--cache-dir", default=None, help="Diretório do cache de páginas HTML (reutiliza páginas já baixadas)")
+    parser.add_argument("--offline", action="store_true", help="Usar apenas o cache (--cache-dir), sem acessar a rede")
+    parser.add_argument("--refresh", action="store_true", help="Atualizar o thread_<id>.json existente baixando só as páginas novas")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Gravar posts em JSONL página a página, com checkpoint (retoma execuções interrompidas)",
+    )
+    parser.add_argument("--max-threads", type=int, default=None, help="Board: máximo de tópicos a baixar")
+    parser.add_argument("--max-board-pages", type=int, default=None, help="Board: máximo de páginas de listagem")
+    parser.add_argument(
+        "--metrics-out",
+        default=None,
+        help="Grava tempo, CPU e memória por etapa (fetch, parse, gravação) neste JSON",
+    )
+    parser.add_argument("--profile", default=None, help="Grava um dump do cProfile da execução neste arquivo")
     args = parser.parse_args()
 
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    print(f"Baixando tópico: {args.url}")
-    data = scrape_thread(args.url, delay=args.delay, max_pages=args.max_pages)
-    thread_id = data["thread_id"]
-    out_path = output_dir / f"thread_{thread_id}.json"
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    if args.offline and not args.cache_dir:
+        parser.error("--offline requer --cache-dir")
+    cache = PageCache(args.cache_dir, offline=args.offline) if args.cache_dir else None
+
+    metrics = Metrics("scrape", trace_memory=True) if args.metrics_out else None
+    if is_board_url(args.url):
+        print(f"Crawl do board: {args.url}")
+        limiter = HostRateLimiter(
+            args.rate if args.rate is not None else 1.0 / args.delay if args.delay > 0 else 1.0,
+            max_in_flight=max(args.concurrency, 1),
+            adaptive=args.adaptive,
+        )
+        with ForumClient(limiter=limiter, pool_size=max(args.concurrency, 1)) as client, profiled(args.profile):
+            manifest = crawl_board(
+                args.url,
+                output_dir,
+                workers=max(args.concurrency, 1),
+                max_threads=args.max_threads,
+                max_board_pages=args.max_board_pages,
+                max_pages=args.max_pages,
+                refresh=args.refresh,
+                client=client,
+                cache=cache,
+                parse_workers=args.parse_workers,
+                stream=args.stream,
+                metrics=metrics,
+            )
+        ok = sum(1 for t in manifest["threads"] if t["status"] == "ok")
+        print(f"Tópicos: {ok}/{len(manifest['threads'])} salvos em {output_dir} (manifest: board_{manifest['board_id']}_manifest.json)")
+        for host, bucket in limiter.buckets().items():
+            if isinstance(bucket, AdaptiveRateController):
+                _print_adaptive_report(bucket, client, host)
+        _finish(args, metrics)
+        return
+
+    client = make_client(
+        delay=args.delay,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        adaptive=args.adaptive,
+    )
+    options = dict(
+        max_pages=args.max_pages,
+        concurrency=args.concurrency,
+        client=client,
+        cache=cache,
+        parse_workers=args.parse_workers,
+        metrics=metrics,
+    )
+    thread_id, _ = parse_thread_url(args.url)
+    with client, profiled(args.profile):
+        if args.stream:
+            print(f"Baixando tópico (streaming): {args.url}")
+            checkpoint = stream_thread(args.url, output_dir, **options)
+            out_path = output_dir / f"thread_{thread_id}.json"
+            with (metrics or Metrics.disabled()).stage("write_json"):
+                n = write_thread_json(jsonl_path(output_dir, thread_id), out_path, checkpoint)
+            print(f"Salvo: {out_path} ({n} posts)")
+        else:
+            _scrape_to_json(args, output_dir, thread_id, options)
+        if isinstance(client.limiter, AdaptiveRateController):
+            _print_adaptive_report(client.limiter, client)
+    _finish(args, metrics, client)
+
+
+def _print_adaptive_report(limiter: AdaptiveRateController, client: ForumClient, host: str = "") -> None:
+    report = limiter.report()
+    print(
+        f"Taxa adaptativa{f' ({host})' if host else ''}: {report['throughput']:.2f} req/s efetivas "
+        f"(final {report['rate']:.2f}, pico {report['peak_rate']:.2f}, "
+        f"{report['throttled']} respostas 429/503, {client.stats['retries']} retentativas)"
+    )
+
+
+def _finish(args, metrics: Optional[Metrics], client: Optional[ForumClient] = None) -> None:
+    """Grava e mostra as métricas (--metrics-out) e informa o profile (--profile)."""
+    if metrics is not None:
+        if client is not None:
+            metrics.count("requests", client.stats.get("requests", 0))
+        metrics.write_json(args.metrics_out)
+        metrics.close()
+        print(format_stages(metrics.to_dict()))
+        print(f"Métricas salvas: {args.metrics_out}")
+    if args.profile:
+        print(f"Profile salvo: {args.profile}")
+
+
+def _scrape_to_json(args, output_dir: Path, thread_id: str, options: dict) -> None:
+    """Modo padrão: baixa (ou atualiza, com --refresh) e grava thread_<id>.json."""
+    existing_path = output_dir / f"thread_{thread_id}.json"
+    if args.refresh and existing_path.exists():
+        with open(existing_path, encoding="utf-8") as f:
+            existing = json.load(f)
+        print(f"Atualizando tópico: {args.url} (a partir da página {existing.get('total_pages') or 1})")
+        data = refresh_thread(existing, args.url, **options)
+        print(f"Posts novos: {len(data['posts']) - len(existing.get('posts', []))}")
+    else:
+        print(f"Baixando tópico: {args.url}")
+        data = scrape_thread(args.url, **options)
+    out_path = output_dir / f"thread_{data['thread_id']}.json"
+    with (options["metrics"] or Metrics.disabled()).stage("write_json"):
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
     print(f"Salvo: {out_path} ({len(data['posts'])} posts)")
 
 
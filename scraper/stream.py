@@ -0,0 +1,158 @@
+"""
+Pipeline de scraping em streaming: fetch -> parse -> dedup -> append em JSONL,
+página a página, com checkpoint para retomar uma execução interrompida.
+
+Arquivos em output_dir:
+  thread_<id>.posts.jsonl       um post por linha, na ordem das páginas
+  thread_<id>.checkpoint.json   última página concluída, totais e offset do JSONL
+  thread_<id>.json              gerado a partir do JSONL ao final (mesmo formato de scrape_thread)
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from scraper.cache import PageCache
+from scraper.forum_client import ForumClient, parse_thread_url
+from scraper.pagination import iter_thread_pages, open_fetch_fn
+from scraper.posts import post_key
+from instrumentation.metrics import Metrics
+
+
+def jsonl_path(output_dir: Path, thread_id: str) -> Path:
+    return output_dir / f"thread_{thread_id}.posts.jsonl"
+
+
+def checkpoint_path(output_dir: Path, thread_id: str) -> Path:
+    return output_dir / f"thread_{thread_id}.checkpoint.json"
+
+
+def _dedup_key(post: dict) -> bytes:
+    """Digest de post_key — mesma identidade de scrape_thread e merge_posts, em tamanho fixo."""
+    return hashlib.blake2b(repr(post_key(post)).encode("utf-8"), digest_size=16).digest()
+
+
+def iter_jsonl_posts(path: Path) -> Iterator[dict]:
+    """Lê os posts de um arquivo JSONL, um por vez."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _load_checkpoint(path: Path) -> Optional[dict]:
+    if not path.exists():
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _save_checkpoint(path: Path, checkpoint: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+
+def stream_thread(
+    url: str,
+    output_dir: str | Path,
+    *,
+    fetch_fn: Optional[Callable[[str], str]] = None,
+    delay: float = 1.5,
+    max_pages: Optional[int] = None,
+    concurrency: int = 1,
+    rate: Optional[float] = None,
+    client: Optional[ForumClient] = None,
+    cache: Optional[PageCache] = None,
+    parse_workers: int = 1,
+    adaptive: bool = False,
+    metrics: Optional[Metrics] = None,
+) -> dict:
+    """
+    Baixa o tópico gravando os posts em JSONL à medida que cada página chega.
+    Se existir checkpoint, retoma da página seguinte à última concluída (ou
+    rebusca a última, se o tópico já estava completo, para pegar posts novos).
+    Retorna o checkpoint final: thread_id, last_page, total_pages, total_results, posts, offset.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    thread_id, base_url = parse_thread_url(url)
+    posts_file = jsonl_path(output_dir, thread_id)
+    ckpt_file = checkpoint_path(output_dir, thread_id)
+
+    checkpoint = _load_checkpoint(ckpt_file) if posts_file.exists() else None
+    seen: set[bytes] = set()
+    if checkpoint:
+        # Descartar linhas gravadas após o último checkpoint (página incompleta)
+        with open(posts_file, "r+b") as f:
+            f.truncate(checkpoint["offset"])
+        seen.update(_dedup_key(p) for p in iter_jsonl_posts(posts_file))
+        last = checkpoint["last_page"]
+        start_page = last + 1 if last < (checkpoint.get("total_pages") or 1) else last
+    else:
+        checkpoint = {"thread_id": thread_id, "last_page": 0, "posts": 0, "offset": 0}
+        posts_file.write_bytes(b"")
+        start_page = 2
+
+    with open_fetch_fn(fetch_fn, delay, concurrency, rate, client, cache, adaptive) as fetch, \
+            open(posts_file, "a", encoding="utf-8") as out:
+        pages = iter_thread_pages(
+            base_url,
+            fetch,
+            start_page=start_page,
+            max_pages=max_pages,
+            concurrency=concurrency,
+            parse_workers=parse_workers,
+            metrics=metrics,
+        )
+        for page, posts, total_results, total_pages in pages:
+            for p in posts:
+                key = _dedup_key(p)
+                if key in seen:
+                    continue
+                seen.add(key)
+                out.write(json.dumps(p, ensure_ascii=False) + "\n")
+                checkpoint["posts"] += 1
+            out.flush()
+            checkpoint.update(
+                last_page=max(page, checkpoint["last_page"]),
+                total_pages=total_pages,
+                total_results=total_results,
+                offset=out.tell(),
+            )
+            _save_checkpoint(ckpt_file, checkpoint)
+    return checkpoint
+
+
+def write_thread_json(posts_file: Path, out_path: Path, meta: dict) -> int:
+    """
+    Gera thread_<id>.json a partir do JSONL, post a post (sem carregar todos em memória),
+    no mesmo formato (indent=2) de `json.dump` do resultado de scrape_thread.
+    Retorna o número de posts escritos.
+    """
+    header = {
+        "thread_id": meta.get("thread_id"),
+        "title": meta.get("title"),
+        "total_pages": meta.get("total_pages"),
+        "total_results": meta.get("total_results"),
+    }
+    n = 0
+    tmp = out_path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("{\n")
+        for k, v in header.items():
+            f.write(f"  {json.dumps(k)}: {json.dumps(v, ensure_ascii=False)},\n")
+        f.write('  "posts": [')
+        for post in iter_jsonl_posts(posts_file):
+            block = json.dumps(post, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+            f.write(("," if n else "") + "\n    " + block)
+            n += 1
+        f.write("\n  ]\n}" if n else "]\n}")
+    os.replace(tmp, out_path)
+    return n
@@ -0,0 +1,98 @@
+"""
+Páginas sintéticas de tópico no markup do fórum Tibia (td.CipPost, .PostDetails,
+.PostText, div[id^=Post_], table.TableContent), para benchmarks e testes offline.
+"""
+import random
+from html import escape
+
+WORDS = (
+    "monk damage healing exeta penance virtue justice party hunt spell mana "
+    "knight paladin sorcerer druid balance nerf buff loot respawn boss charm "
+    "dano cura magia equilíbrio caçada vocação nível arma escudo poção "
+    "gameplay change update patch feedback great terrible please need better"
+).split()
+
+VOCATIONS = ("Monk", "Knight", "Paladin", "Sorcerer", "Druid")
+
+
+def _post_html(rng: random.Random, post_id: int, index: int) -> str:
+    author = f"Player {index % 997}"
+    date = f"{rng.randint(1, 28):02d}.01.2026 {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+    n_words = max(3, int(rng.lognormvariate(3.3, 0.8)))
+    body = " ".join(rng.choice(WORDS) for _ in range(n_words))
+    edited = ""
+    if rng.random() < 0.1:
+        edited = f'<br/><font class="ff_info">Edited by {escape(author)} on {date}</font>'
+    return (
+        '<tr class="Odd"><td class="CipPost">'
+        '<div class="PostCharacterText">'
+        f'<a href="https://www.tibia.com/community/?subtopic=characters&amp;name={escape(author).replace(" ", "+")}">'
+        f"{escape(author)}</a><br/>"
+        f'<font class="ff_smallinfo">Vocation: {rng.choice(VOCATIONS)}<br/>Level: {rng.randint(8, 1200)}</font>'
+        "</div>"
+        f'<div class="PostDetails"><div class="AdditionalBox">Post #{post_id}</div>{date}</div>'
+        f'<div id="Post_{post_id}" class="PostBody"><div class="PostText">{escape(body)}{edited}</div></div>'
+        '<div class="PostSignature">________________<br/>gl hf</div>'
+        '<img src="https://static.tibia.com/images/forum/logo_oldpost.gif" alt="post"/>'
+        "</td></tr>"
+    )
+
+
+def render_thread_page(
+    thread_id: str,
+    page: int,
+    total_pages: int,
+    posts_per_page: int = 20,
+    seed: int = 0,
+) -> str:
+    """Gera o HTML determinístico da página `page` de um tópico com `total_pages` páginas."""
+    rng = random.Random(f"{seed}:{thread_id}:{page}")
+    total_results = total_pages * posts_per_page
+    first = (page - 1) * posts_per_page
+    rows = "".join(
+        _post_html(rng, 39_000_000 + first + i, first + i) for i in range(posts_per_page)
+    )
+    links = " ".join(
+        f'<a href="?action=thread&amp;threadid={thread_id}&amp;pagenumber={p}">{p}</a>'
+        for p in range(max(1, page - 3), min(total_pages, page + 3) + 1)
+    )
+    last = f' ... <a href="?action=thread&amp;threadid={thread_id}&amp;pagenumber={total_pages}">{total_pages}</a>'
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Tibia - Forum</title></head><body>"
+        f'<div class="ForumPagination">» Pages: {links}{last if page + 3 < total_pages else ""}</div>'
+        f'<div class="ResultsInfo"><b>Results:</b> {total_results}</div>'
+        '<div class="TableContainer"><table class="Table5"><tr><td><div class="InnerTableContainer">'
+        f'<table class="TableContent">{rows}</table>'
+        "</div></td></tr></table></div></body></html>"
+    )
+
+
+def render_board_page(
+    board_id: str,
+    page: int,
+    total_pages: int,
+    threads_per_page: int = 30,
+    thread_pages: int = 3,
+) -> str:
+    """Gera a página `page` da listagem de um board, com links para os tópicos e suas páginas."""
+    first = (page - 1) * threads_per_page
+    rows = []
+    for i in range(threads_per_page):
+        tid = 5_000_000 + first + i
+        inner = " ".join(
+            f'<a href="?action=thread&amp;threadid={tid}&amp;pagenumber={p}">{p}</a>'
+            for p in range(1, thread_pages + 1)
+        )
+        rows.append(
+            f'<tr><td class="CipBoardThread"><a href="?action=thread&amp;threadid={tid}">Feedback thread {tid}</a>'
+            f" <small>» Pages: {inner}</small></td></tr>"
+        )
+    links = " ".join(
+        f'<a href="?action=board&amp;boardid={board_id}&amp;pagenumber={p}">{p}</a>'
+        for p in range(1, total_pages + 1)
+    )
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Tibia - Forum</title></head><body>"
+        f'<div class="ForumPagination">» Pages: {links}</div>'
+        f'<table class="TableContent">{"".join(rows)}</table></body></html>'
+    )